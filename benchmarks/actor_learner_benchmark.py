@@ -0,0 +1,132 @@
+"""
+Compares training throughput of the sequential PPO loop (collect, then update)
+with the actor-learner mode, where actor processes keep collecting rollouts while
+the learner updates the policy.
+
+Both runs step their environments in a gymnasium SyncVectorEnv built the same way:
+the sequential loop in the trainer process (`async_env` is turned off), the
+actor-learner mode in each actor process. So only the training architecture differs.
+
+Both runs train for the same number of updates and report:
+
+*   startup: configuring the trainer and the first update, which includes starting
+    the actors and the model save and evaluation that follow the first update
+*   SPS: environment steps per second from the second update on
+*   CPU per update: CPU time the learner and each actor used per update, from the
+    second update on. Actor CPU time is read from /proc, so it's only reported on Linux.
+
+The actors and the learner only overlap if each has a core of its own. The
+projected SPS is the batch size over the largest per-update CPU time of any one
+process, which is what the actor-learner mode reaches with at least
+`num_actors + 1` idle cores. On fewer cores the measured SPS is what to expect.
+
+Usage:
+    python benchmarks/actor_learner_benchmark.py train_blue.yaml --num-envs 8 --num-actors 2 --updates 20
+"""
+import argparse
+import os
+import time
+
+import cyberwheel.utils  # imported first, the network modules can't be imported on their own
+from cyberwheel.utils import YAMLConfig, Trainer
+
+
+def process_cpu_time(pid: int) -> float | None:
+    """
+    Returns the user and system CPU time of process `pid` in seconds, or None without /proc.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def run(args: YAMLConfig, actor_learner: bool, updates: int) -> dict:
+    """
+    Trains for `updates` updates and returns the startup time, the SPS and the CPU
+    time per update from the second update on.
+    """
+    args.actor_learner = actor_learner
+    args.batch_size = args.num_envs * args.num_steps
+    args.minibatch_size = args.batch_size // args.num_minibatches
+    args.num_updates = updates
+    # only save and evaluate after the first update
+    args.save_frequency = updates + 1
+
+    start = time.perf_counter()
+    trainer = Trainer(args)
+    trainer.configure_training()
+    try:
+        trainer.train(1)
+        startup = time.perf_counter() - start
+
+        actor_pids = [actor.pid for actor in trainer.actor_pool.actors] if actor_learner else []
+        actor_cpu = [process_cpu_time(pid) for pid in actor_pids]
+        learner_cpu = time.process_time()
+        start = time.perf_counter()
+        for update in range(2, updates + 1):
+            trainer.train(update)
+        elapsed = time.perf_counter() - start
+        learner_cpu = (time.process_time() - learner_cpu) / (updates - 1)
+        actor_cpu = [
+            None if before is None else (process_cpu_time(pid) - before) / (updates - 1)
+            for pid, before in zip(actor_pids, actor_cpu)
+        ]
+    finally:
+        trainer.close()
+    return {
+        "startup": startup,
+        "sps": (updates - 1) * args.batch_size / elapsed,
+        "learner_cpu": learner_cpu,
+        "actor_cpu": actor_cpu,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the actor-learner training mode")
+    parser.add_argument("config", type=str, help="environment config filename in configs/environment")
+    parser.add_argument("--network-config", type=str, help="overrides the config's network")
+    parser.add_argument("--num-envs", type=int, default=8)
+    parser.add_argument("--num-actors", type=int, default=2)
+    parser.add_argument("--updates", type=int, default=20)
+    bench_args = parser.parse_args()
+
+    args = YAMLConfig(bench_args.config)
+    args.parse_config()
+    if bench_args.network_config:
+        args.network_config = bench_args.network_config
+    args.num_envs = bench_args.num_envs
+    args.num_actors = bench_args.num_actors
+    args.experiment_name = "actor_learner_benchmark"
+    args.track = False
+    # the same environment backend as the actors
+    args.async_env = False
+
+    sequential = run(args, False, bench_args.updates)
+    actor_learner = run(args, True, bench_args.updates)
+
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    batch_size = args.num_envs * args.num_steps
+    print(f"\n{args.network_config}, {args.num_envs} envs, {bench_args.updates} updates, {cores} CPU core(s)")
+    print(f"{'mode':<28}{'startup (s)':>12}{'SPS':>10}{'gain':>8}{'learner CPU/update (s)':>24}{'actor CPU/update (s)':>22}")
+    print(f"{'sequential':<28}{sequential['startup']:>12.2f}{sequential['sps']:>10.1f}{1:>7.2f}x{sequential['learner_cpu']:>24.3f}{'-':>22}")
+    actor_cpu = actor_learner["actor_cpu"]
+    actor_cpu_text = "-" if None in actor_cpu else " ".join(f"{cpu:.3f}" for cpu in actor_cpu)
+    print(
+        f"{f'actor-learner ({args.num_actors} actors)':<28}{actor_learner['startup']:>12.2f}{actor_learner['sps']:>10.1f}"
+        f"{actor_learner['sps'] / sequential['sps']:>7.2f}x{actor_learner['learner_cpu']:>24.3f}{actor_cpu_text:>22}"
+    )
+    if None not in actor_cpu:
+        projected = batch_size / max([actor_learner["learner_cpu"]] + actor_cpu)
+        print(
+            f"\nprojected actor-learner SPS with {args.num_actors + 1} idle cores: {projected:.1f} "
+            f"({projected / sequential['sps']:.2f}x the sequential loop)"
+        )
+    if cores < args.num_actors + 1:
+        print(f"the actors and the learner shared {cores} core(s), so the measured SPS includes no overlap")
+
+
+if __name__ == "__main__":
+    main()
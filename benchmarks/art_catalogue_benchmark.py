@@ -0,0 +1,134 @@
+"""
+Compares the import time and memory of the ART technique catalogue loaded eagerly,
+from the generated `art_techniques` source module, and lazily, from the indexed
+catalogue that `python -m cyberwheel art-catalogue` builds from it.
+
+Every measurement runs in a fresh interpreter, after `cyberwheel.utils` has been
+imported, and records:
+
+*   import_time: importing the catalogue module
+*   access_time: first access of the requested techniques through `technique_mapping`
+*   rss_mb: growth of the resident set size over both. Without /proc (e.g. on macOS),
+    growth of the peak resident set size, which hides growth below the peak that
+    importing `cyberwheel.utils` reaches
+
+Techniques accessed:
+
+*   none: only the import
+*   killchain: every MITRE id in `ARTKillChainPhase.validity_mapping`, as a service map needs
+*   all: every technique in the catalogue
+
+Eager loading is how the catalogue was loaded before it was indexed, so the summary
+after the table reports each metric before (eager) and after (lazy). The catalogue is
+built from the source first if it's missing or older than the source.
+
+Usage:
+    python benchmarks/art_catalogue_benchmark.py [path/to/art_techniques.py] --catalogue cyberwheel/data/art_techniques
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CHILD = """
+import json, os, resource, sys, time
+import cyberwheel.utils
+from cyberwheel.red_actions.actions import ARTKillChainPhase
+
+def get_rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        scale = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is in bytes on macOS, KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+mode, source, techniques = sys.argv[1:4]
+rss = get_rss()
+
+start = time.perf_counter()
+if mode == "eager":
+    from cyberwheel.red_actions.technique_catalogue import load_source_module
+    module = load_source_module(source)
+else:
+    from cyberwheel.red_actions import art_techniques as module
+    module.catalogue.index
+import_time = time.perf_counter() - start
+
+if techniques == "killchain":
+    mids = {mid for phases in ARTKillChainPhase.validity_mapping.values() for ids in phases.values() for mid in ids}
+    mids = [mid for mid in mids if mid in module.technique_mapping]
+elif techniques == "all":
+    mids = list(module.technique_mapping)
+else:
+    mids = []
+start = time.perf_counter()
+for mid in mids:
+    module.technique_mapping[mid].get_atomic_tests()
+access_time = time.perf_counter() - start
+
+rss = get_rss() - rss
+print(json.dumps({"import_time": import_time, "access_time": access_time, "rss_mb": rss / 2**20, "techniques": len(mids)}))
+"""
+
+
+def measure(mode: str, source: str, catalogue: str, techniques: str, repeats: int) -> dict[str, float]:
+    """
+    Returns the median of each metric over `repeats` fresh interpreters.
+    """
+    env = dict(os.environ, CYBERWHEEL_ART_CATALOGUE=catalogue)
+    runs = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", CHILD, mode, source, techniques],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {metric: statistics.median(run[metric] for run in runs) for metric in runs[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark eager and lazy loading of the ART technique catalogue")
+    parser.add_argument("source", type=str, nargs="?", help="path to the generated art_techniques.py. Default: cyberwheel/red_actions/art_techniques_source.py")
+    parser.add_argument("--catalogue", type=str, help="catalogue directory built from it. Default: cyberwheel/data/art_techniques")
+    parser.add_argument("--techniques", nargs="+", default=["none", "killchain", "all"], choices=["none", "killchain", "all"])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    import cyberwheel.utils  # imported first, the network modules can't be imported on their own
+    from cyberwheel.red_actions.technique_catalogue import TechniqueCatalogue, default_catalogue_dir, default_source_path
+
+    source = args.source if args.source else default_source_path()
+    catalogue = args.catalogue if args.catalogue else default_catalogue_dir()
+    # builds the catalogue if needed, so the lazy runs don't time it
+    TechniqueCatalogue(catalogue, source).index
+
+    results = {}
+    print(f"{'mode':<8}{'techniques':>12}{'loaded':>8}{'import (s)':>14}{'access (s)':>14}{'total (s)':>12}{'RSS (MB)':>12}")
+    for techniques in args.techniques:
+        for mode in ("eager", "lazy"):
+            m = results[mode, techniques] = measure(mode, source, catalogue, techniques, args.repeats)
+            m["total_time"] = m["import_time"] + m["access_time"]
+            print(
+                f"{mode:<8}{techniques:>12}{int(m['techniques']):>8}{m['import_time']:>14.4f}"
+                f"{m['access_time']:>14.4f}{m['total_time']:>12.4f}{m['rss_mb']:>12.1f}"
+            )
+
+    print("\nBefore (eager) -> after (lazy):")
+    for techniques in args.techniques:
+        before, after = results["eager", techniques], results["lazy", techniques]
+        print(
+            f"  {techniques:<10} import {before['import_time']:.4f}s -> {after['import_time']:.4f}s, "
+            f"import + access {before['total_time']:.4f}s -> {after['total_time']:.4f}s "
+            f"({before['total_time'] / max(after['total_time'], 1e-9):.1f}x), "
+            f"RSS {before['rss_mb']:.1f} MB -> {after['rss_mb']:.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Checks that sharding evaluation episodes across worker processes doesn't change
+them: evaluates the same model serially and with `--eval-workers` workers, in
+deterministic mode, and compares the two action logs row by row. Exits with status 1
+if they differ.
+
+Deterministic mode also seeds the UUIDs of decoys and blue actions, so the logs
+are compared in full.
+
+Any other arguments are passed on as evaluation overrides, like
+`python -m cyberwheel evaluate`.
+
+Usage:
+    python benchmarks/eval_sharding_check.py evaluate_blue.yaml --eval-workers 2 --num-episodes 10
+"""
+import argparse
+import sys
+
+import cyberwheel.utils  # imported first, the network modules can't be imported on their own
+from cyberwheel.utils import Evaluator, parse
+
+
+def evaluate(config: str, overrides: list[str], eval_workers: int):
+    """
+    Returns the action log of evaluating `config` with `eval_workers` workers.
+    """
+    sys.argv = [sys.argv[0]] + overrides
+    args = parse(config, "evaluate")
+    args.evaluation = True
+    args.deterministic = True
+    args.visualize = False
+    args.eval_workers = eval_workers
+    args.graph_name = f"eval_sharding_check_{eval_workers}"
+    evaluator = Evaluator(args)
+    evaluator.configure_evaluation()
+    evaluator.evaluate()
+    return evaluator.actions_df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that sharded evaluation matches serial evaluation")
+    parser.add_argument("config", type=str, help="evaluation config filename in configs/environment")
+    parser.add_argument("--eval-workers", type=int, default=2, help="workers of the sharded run")
+    check_args, overrides = parser.parse_known_args()
+    # set before parse() so that every module sees deterministic mode
+    overrides += ["--deterministic", "true"]
+
+    serial = evaluate(check_args.config, overrides, 1)
+    sharded = evaluate(check_args.config, overrides, check_args.eval_workers)
+
+    if serial.shape != sharded.shape:
+        print(f"Action logs differ: {serial.shape[0]} serial rows, {sharded.shape[0]} sharded rows")
+        sys.exit(1)
+    if not serial.equals(sharded):
+        # missing values (e.g. blue action targets) compare unequal to themselves
+        differs = ((serial != sharded) & ~(serial.isna() & sharded.isna())).any(axis=1)
+        first = differs.idxmax()
+        print(f"Action logs differ in {int(differs.sum())} of {len(serial)} rows, first at episode {serial.at[first, 'episode']} step {serial.at[first, 'step']}:")
+        print(serial.loc[[first]].to_string())
+        print(sharded.loc[[first]].to_string())
+        sys.exit(1)
+    print(f"Serial and sharded ({check_args.eval_workers} workers) action logs match: {len(serial)} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Measures what it costs a worker process to get its network, against network size,
+for the two ways of sending a network to workers:
+
+*   pickle: the network and service mapping are pickled once into shared memory, and
+    every worker unpickles a private copy of them
+*   attach: a NetworkSnapshot. Workers attach to the network's topology and technique
+    maps in shared memory and only build their own host state and the hosts they use
+
+For every network config and mode, `--workers` spawned processes each load one
+network, build an environment on it and step it. The results are averaged over the
+workers:
+
+*   spawn: starting the worker process, including its imports
+*   load: getting the network (unpickling it, or attaching to the snapshot)
+*   RSS after load / env / steps: resident memory of the worker after loading the
+    network, after building and resetting the environment and after `--steps` steps,
+    minus its resident memory before loading the network
+*   private: the same, without pages shared with other processes (i.e. the snapshot's
+    segment), which is what every additional worker costs
+
+Memory is read from /proc/self/statm, so it's only reported on Linux.
+
+Usage:
+    python benchmarks/network_snapshot_benchmark.py train_blue.yaml --networks 200-host-network.yaml 10000-host-network.yaml --workers 2
+
+The red agent has to be able to run on every network (i.e. a random leader host).
+"""
+import argparse
+import importlib
+import multiprocessing as mp
+import os
+import pickle
+import queue
+import time
+import numpy as np
+
+from importlib.resources import files
+from multiprocessing import shared_memory
+
+# cyberwheel.utils is imported first, the network modules can't be imported on their own
+from cyberwheel.utils import YAMLConfig, NetworkSnapshot, get_service_map
+from cyberwheel.network.network_base import Network
+
+
+def memory_mb() -> tuple[float, float] | None:
+    """
+    Returns the resident and the private resident memory of this process in MB, or None without /proc.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            fields = f.read().split()
+    except OSError:
+        return None
+    page_mb = os.sysconf("SC_PAGE_SIZE") / 2**20
+    resident, shared = int(fields[1]), int(fields[2])
+    return resident * page_mb, (resident - shared) * page_mb
+
+
+def run_worker(args, mode: str, source, size: int, steps: int, seed: int, started: float, results) -> None:
+    """
+    Worker process. Loads the network from `source` (a shared memory segment name for
+    'pickle', a NetworkSnapshot for 'attach'), builds an environment on it, steps it
+    and puts its timings and memory use into `results`.
+    """
+    spawn = time.perf_counter() - started
+    env_class = getattr(importlib.import_module("cyberwheel.cyberwheel_envs"), args.environment)
+    before = memory_mb()
+
+    start = time.perf_counter()
+    if mode == "pickle":
+        shm = shared_memory.SharedMemory(name=source)
+        network, args.service_mapping = pickle.loads(shm.buf[:size])
+        shm.close()
+    else:
+        network = source.load()
+        args.service_mapping = source.service_mapping
+    load = time.perf_counter() - start
+    after_load = memory_mb()
+
+    env = env_class(args, network=network, evaluation=False)
+    _, info = env.reset(seed=seed)
+    after_env = memory_mb()
+
+    rng = np.random.default_rng(seed)
+    for step in range(steps):
+        if step % args.num_steps == 0:
+            _, info = env.reset()
+        _, _, _, _, info = env.step(int(rng.integers(info["action_space_size"])))
+    after_steps = memory_mb()
+
+    memory = None
+    if before is not None:
+        memory = [
+            (after[0] - before[0], after[1] - before[1]) for after in (after_load, after_env, after_steps)
+        ]
+    results.put({"spawn": spawn, "load": load, "memory": memory})
+
+
+def benchmark(mode: str, args: YAMLConfig, network: Network, service_mapping: dict, workers: int, steps: int, seed: int) -> dict:
+    """
+    Runs `workers` workers at once on `network` sent with `mode` and returns their
+    averaged results.
+    """
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    snapshot = shm = None
+    size = 0
+    try:
+        if mode == "pickle":
+            data = pickle.dumps((network, service_mapping), protocol=pickle.HIGHEST_PROTOCOL)
+            size = len(data)
+            shm = shared_memory.SharedMemory(create=True, size=size)
+            shm.buf[:size] = data
+            source = shm.name
+        else:
+            snapshot = NetworkSnapshot(network, service_mapping)
+            source = snapshot
+        processes = []
+        for rank in range(workers):
+            process = ctx.Process(
+                target=run_worker,
+                args=(args, mode, source, size, steps, seed + rank, time.perf_counter(), results),
+                daemon=True,
+            )
+            process.start()
+            processes.append(process)
+        worker_results = []
+        while len(worker_results) < workers:
+            try:
+                worker_results.append(results.get(timeout=1))
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes) and results.empty():
+                    raise RuntimeError(f"a {mode} worker exited without reporting its results")
+        for process in processes:
+            process.join()
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+        if snapshot is not None:
+            snapshot.unlink()
+
+    result = {
+        "spawn": np.mean([r["spawn"] for r in worker_results]),
+        "load": np.mean([r["load"] for r in worker_results]),
+        "memory": None,
+    }
+    if worker_results[0]["memory"] is not None:
+        result["memory"] = np.mean([r["memory"] for r in worker_results], axis=0)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark loading the network in worker processes")
+    parser.add_argument("config", type=str, help="environment config filename in configs/environment")
+    parser.add_argument(
+        "--networks",
+        nargs="+",
+        default=["15-host-network.yaml", "200-host-network.yaml", "1000-host-network.yaml", "10000-host-network.yaml"],
+    )
+    parser.add_argument("--red-agent", type=str, help="overrides the config's red agent")
+    parser.add_argument("--workers", type=int, default=2, help="workers started at once per network and mode")
+    parser.add_argument("--steps", type=int, default=200, help="environment steps per worker")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--modes", nargs="+", default=["pickle", "attach"], choices=["pickle", "attach"])
+    bench_args = parser.parse_args()
+
+    args = YAMLConfig(bench_args.config)
+    args.parse_config()
+    if bench_args.red_agent:
+        args.red_agent = bench_args.red_agent
+
+    rows = []
+    for network_config in bench_args.networks:
+        network = Network.create_network_from_yaml(
+            files("cyberwheel.data.configs.network").joinpath(network_config),
+            cache=args.network_cache if hasattr(args, "network_cache") else True,
+        )
+        service_mapping = get_service_map(network)
+        args.network_config = network_config
+        for mode in bench_args.modes:
+            result = benchmark(mode, args, network, service_mapping, bench_args.workers, bench_args.steps, bench_args.seed)
+            rows.append((network_config, len(network.hosts), mode, result))
+
+    print(f"\n{bench_args.workers} workers per run, {bench_args.steps} steps per worker, memory in MB (RSS / private)")
+    print(f"{'network':<26}{'hosts':>7}{'mode':>8}{'spawn (s)':>11}{'load (s)':>10}{'after load':>16}{'after env':>16}{'after steps':>16}")
+    for network_config, hosts, mode, result in rows:
+        memory = result["memory"]
+        columns = ["-"] * 3 if memory is None else [f"{rss:.1f} / {private:.1f}" for rss, private in memory]
+        print(
+            f"{network_config:<26}{hosts:>7}{mode:>8}{result['spawn']:>11.2f}{result['load']:>10.3f}"
+            + "".join(f"{column:>16}" for column in columns)
+        )
+
+
+if __name__ == "__main__":
+    main()
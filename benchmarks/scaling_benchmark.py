@@ -0,0 +1,245 @@
+"""
+Measures how the simulator scales with network size. For every network config it
+records:
+
+*   build_time: building the Network from YAML (without the network cache)
+*   service_map_time: get_service_map(), with its caches emptied first
+*   env_construct_time: constructing one CyberwheelRL environment
+*   reset_time: one environment reset
+*   step_sps_random / step_sps_fixed: CyberwheelRL.step throughput with uniformly
+    random valid actions / always action 0
+*   env_memory_mb: memory allocated per environment (traced with tracemalloc)
+*   train_sps: end-to-end steps per second of a short PPO run. The first update isn't
+    timed, so the run is skipped with --train-updates below 2
+
+Results are written as JSON. Given a baseline written by an earlier run, every metric
+is compared against it, and the script exits with status 1 if any got worse by more
+than its threshold.
+
+Usage:
+    python benchmarks/scaling_benchmark.py train_blue.yaml --networks 15-host-network.yaml 200-host-network.yaml --output scaling.json
+    python benchmarks/scaling_benchmark.py train_blue.yaml --baseline scaling.json --threshold 0.15 --metric-threshold train_sps=0.3
+"""
+import argparse
+import importlib
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+from importlib.resources import files
+
+# cyberwheel.utils is imported first, the network modules can't be imported on their own
+from cyberwheel.utils import YAMLConfig, Trainer, get_service_map
+from cyberwheel.utils.get_service_map import clear_service_map_caches
+from cyberwheel.network.network_base import Network
+
+
+# Whether a higher value of each metric is better
+METRICS = {
+    "build_time": False,
+    "service_map_time": False,
+    "env_construct_time": False,
+    "reset_time": False,
+    "step_sps_random": True,
+    "step_sps_fixed": True,
+    "env_memory_mb": False,
+    "train_sps": True,
+}
+
+
+def shipped_network_configs() -> list[str]:
+    """
+    Returns the shipped `<n>-host-network.yaml` configs, smallest first.
+    """
+    names = [f.name for f in files("cyberwheel.data.configs.network").iterdir() if f.name.endswith("-host-network.yaml")]
+    return sorted(names, key=lambda name: int(name.split("-")[0]))
+
+
+def step_sps(env, args: YAMLConfig, steps: int, policy: str, seed: int) -> float:
+    """
+    Returns the steps per second of `env.step()` with a 'random' or 'fixed' policy.
+    Episodes are reset every `args.num_steps` steps and when they end, untimed.
+    """
+    rng = np.random.default_rng(seed)
+    elapsed = 0.0
+    done = True
+    episode_step = 0
+    for _ in range(steps):
+        if done or episode_step == args.num_steps:
+            env.reset(seed=seed)
+            episode_step = 0
+        action = int(rng.integers(env.rl_agent_action_space_size)) if policy == "random" else 0
+        start = time.perf_counter()
+        _, _, done, _, _ = env.step(action)
+        elapsed += time.perf_counter() - start
+        episode_step += 1
+    return steps / elapsed
+
+
+def train_sps(args: YAMLConfig, num_envs: int, updates: int) -> float:
+    """
+    Returns the steps per second of `updates` PPO updates, excluding the first, which
+    is followed by the model save and evaluation.
+    """
+    args.num_envs = num_envs
+    args.batch_size = args.num_envs * args.num_steps
+    args.minibatch_size = args.batch_size // args.num_minibatches
+    args.num_updates = updates
+    args.save_frequency = updates + 1
+    args.eval_episodes = 1
+    args.eval_workers = 0
+
+    trainer = Trainer(args)
+    trainer.configure_training()
+    try:
+        trainer.train(1)
+        start = time.perf_counter()
+        for update in range(2, updates + 1):
+            trainer.train(update)
+        elapsed = time.perf_counter() - start
+    finally:
+        trainer.close()
+    return (updates - 1) * args.batch_size / elapsed
+
+
+def benchmark_network(args: YAMLConfig, network_config: str, bench_args) -> dict[str, float]:
+    args.network_config = network_config
+    env_class = getattr(importlib.import_module("cyberwheel.cyberwheel_envs"), args.environment)
+    config_path = files("cyberwheel.data.configs.network").joinpath(network_config)
+    results = {}
+
+    start = time.perf_counter()
+    network = Network.create_network_from_yaml(config_path)
+    results["build_time"] = time.perf_counter() - start
+
+    # the signature caches are shared by every network in the process
+    clear_service_map_caches()
+    start = time.perf_counter()
+    args.service_mapping = get_service_map(network)
+    results["service_map_time"] = time.perf_counter() - start
+
+    construct_times = []
+    for _ in range(bench_args.envs):
+        fork = network.fork()
+        start = time.perf_counter()
+        env = env_class(args, network=fork)
+        construct_times.append(time.perf_counter() - start)
+    results["env_construct_time"] = float(np.mean(construct_times))
+
+    reset_times = []
+    for i in range(bench_args.resets):
+        start = time.perf_counter()
+        env.reset(seed=bench_args.seed + i)
+        reset_times.append(time.perf_counter() - start)
+    results["reset_time"] = float(np.mean(reset_times))
+
+    results["step_sps_random"] = step_sps(env, args, bench_args.steps, "random", bench_args.seed)
+    results["step_sps_fixed"] = step_sps(env, args, bench_args.steps, "fixed", bench_args.seed)
+    env.close()
+
+    # Traced separately, since tracemalloc slows down everything it traces
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    envs = [env_class(args, network=network.fork()) for _ in range(bench_args.envs)]
+    for env in envs:
+        env.reset(seed=bench_args.seed)
+    results["env_memory_mb"] = (tracemalloc.get_traced_memory()[0] - baseline) / bench_args.envs / 2**20
+    tracemalloc.stop()
+    del envs
+
+    if bench_args.train_updates > 1:
+        results["train_sps"] = train_sps(args, bench_args.train_envs, bench_args.train_updates)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float, metric_thresholds: dict[str, float]) -> list[str]:
+    """
+    Returns a description of every metric that regressed by more than its threshold,
+    relative to the baseline. Metrics missing from either side are skipped.
+    """
+    regressions = []
+    for network_config, metrics in results.items():
+        for metric, value in metrics.items():
+            base = baseline.get(network_config, {}).get(metric)
+            if not base:
+                continue
+            change = (value - base) / base
+            worse = -change if METRICS[metric] else change
+            limit = metric_thresholds.get(metric, threshold)
+            if worse > limit:
+                regressions.append(f"{network_config} {metric}: {base:.4g} -> {value:.4g} ({change:+.1%}, threshold {limit:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark how Cyberwheel scales across network configs")
+    parser.add_argument("config", type=str, help="environment config filename in configs/environment")
+    parser.add_argument("--networks", nargs="+", help="network configs to benchmark. Default: every shipped <n>-host-network.yaml")
+    parser.add_argument("--envs", type=int, default=4, help="environments to construct per network")
+    parser.add_argument("--resets", type=int, default=10)
+    parser.add_argument("--steps", type=int, default=500, help="timed steps per policy")
+    parser.add_argument("--train-envs", type=int, default=4)
+    parser.add_argument("--train-updates", type=int, default=4, help="PPO updates of the training run. The first isn't timed, so fewer than 2 skips it.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, help="JSON file to write the results to")
+    parser.add_argument("--baseline", type=str, help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed relative regression of every metric")
+    parser.add_argument(
+        "--metric-threshold",
+        nargs="+",
+        default=[],
+        metavar="METRIC=THRESHOLD",
+        help=f"per-metric thresholds. Metrics: {', '.join(METRICS)}",
+    )
+    bench_args = parser.parse_args()
+
+    metric_thresholds = {}
+    for item in bench_args.metric_threshold:
+        metric, _, value = item.partition("=")
+        if metric not in METRICS:
+            parser.error(f"unknown metric '{metric}'")
+        metric_thresholds[metric] = float(value)
+
+    args = YAMLConfig(bench_args.config)
+    args.parse_config()
+    args.experiment_name = "scaling_benchmark"
+    args.track = False
+    args.step_timing = False
+
+    results = {}
+    for network_config in bench_args.networks or shipped_network_configs():
+        print(f"Benchmarking {network_config}...", file=sys.stderr)
+        results[network_config] = benchmark_network(args, network_config, bench_args)
+
+    print(f"\n{'network':<26}" + "".join(f"{metric:>20}" for metric in METRICS))
+    for network_config, metrics in results.items():
+        print(f"{network_config:<26}" + "".join(f"{metrics[m]:>20.4g}" if m in metrics else f"{'-':>20}" for m in METRICS))
+
+    if bench_args.output:
+        report = {
+            "config": bench_args.config,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": {k: v for k, v in vars(bench_args).items() if k not in ("output", "baseline")},
+            "results": results,
+        }
+        with open(bench_args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if bench_args.baseline:
+        with open(bench_args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, bench_args.threshold, metric_thresholds)
+        if regressions:
+            print("\nRegressions against the baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
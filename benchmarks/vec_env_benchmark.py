@@ -0,0 +1,137 @@
+"""
+Compares the steps per second of the three ways the trainer can run environments:
+SyncVectorEnv, AsyncVectorEnv and CyberwheelVecEnv ('batched').
+
+Actions are sampled uniformly from each environment's valid actions, so only
+environment stepping is measured (no policy inference or PPO updates).
+
+Before timing, the batched mode is checked against the sync mode: both are reset
+with the same seeds and stepped with the same actions for `--check-steps` steps,
+and must return the same observations, rewards and terminations.
+
+Usage:
+    python benchmarks/vec_env_benchmark.py train_blue.yaml --num-envs 8 --steps 500
+"""
+import argparse
+import importlib
+import time
+import gymnasium as gym
+import numpy as np
+
+from importlib.resources import files
+
+# cyberwheel.utils is imported first, the network modules can't be imported on their own
+from cyberwheel.utils import YAMLConfig, NetworkSnapshot, get_service_map
+from cyberwheel.utils.async_call import make_env
+from cyberwheel.cyberwheel_envs import CyberwheelVecEnv
+from cyberwheel.network.network_base import Network
+
+
+def build_envs(mode: str, args: YAMLConfig, network: Network, num_envs: int):
+    env_class = getattr(importlib.import_module("cyberwheel.cyberwheel_envs"), args.environment)
+    if mode == "batched":
+        return CyberwheelVecEnv(args, num_envs, network=network), None
+    if mode == "async":
+        snapshot = NetworkSnapshot(network)
+        env_funcs = [make_env(env_class, args, snapshot, i) for i in range(num_envs)]
+        return gym.vector.AsyncVectorEnv(env_funcs), snapshot
+    networks = [network.fork() for _ in range(num_envs)]
+    env_funcs = [make_env(env_class, args, networks, i) for i in range(num_envs)]
+    return gym.vector.SyncVectorEnv(env_funcs), None
+
+
+def benchmark(
+    mode: str, args: YAMLConfig, network: Network, num_envs: int, steps: int, warmup: int, seed: int
+) -> float:
+    """
+    Returns the environment steps per second of `mode` ('sync', 'async' or 'batched').
+    The first `warmup` steps fill the per-process caches and aren't timed.
+    """
+    envs, snapshot = build_envs(mode, args, network, num_envs)
+    rng = np.random.default_rng(seed)
+    try:
+        _, info = envs.reset(seed=[seed + i for i in range(num_envs)])
+        start = None
+        for step in range(warmup + steps):
+            if step == warmup:
+                start = time.perf_counter()
+            # episodes are reset every num_steps steps, like Trainer.train()
+            if step % args.num_steps == 0:
+                _, info = envs.reset()
+            _, _, _, _, info = envs.step(rng.integers(info["action_space_size"]))
+        elapsed = time.perf_counter() - start
+    finally:
+        envs.close()
+        if snapshot is not None:
+            snapshot.unlink()
+    return steps * num_envs / elapsed
+
+
+def check_batched(args: YAMLConfig, network: Network, num_envs: int, steps: int, seed: int) -> None:
+    """
+    Raises an AssertionError if the batched mode doesn't return what the sync mode
+    does, given the same seeds and actions.
+    """
+    trajectories = {}
+    for mode in ("sync", "batched"):
+        envs, _ = build_envs(mode, args, network, num_envs)
+        rng = np.random.default_rng(seed)
+        try:
+            obs, info = envs.reset(seed=[seed + i for i in range(num_envs)])
+            trajectory = [obs.copy()]
+            for step in range(steps):
+                if step % args.num_steps == 0:
+                    obs, info = envs.reset()
+                    trajectory.append(obs.copy())
+                obs, reward, done, _, info = envs.step(rng.integers(info["action_space_size"]))
+                trajectory.extend((obs.copy(), reward.copy(), done.copy()))
+        finally:
+            envs.close()
+        trajectories[mode] = trajectory
+    for step, (expected, actual) in enumerate(zip(trajectories["sync"], trajectories["batched"])):
+        assert np.array_equal(expected, actual), f"the batched and sync modes differ at item {step}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Cyberwheel vector environment modes")
+    parser.add_argument("config", type=str, help="environment config filename in configs/environment")
+    parser.add_argument("--network-config", type=str, help="overrides the config's network")
+    parser.add_argument("--num-envs", type=int, default=8)
+    parser.add_argument("--steps", type=int, default=500, help="vector steps per mode")
+    parser.add_argument("--warmup", type=int, default=50, help="untimed vector steps run before each mode")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check-steps", type=int, default=200, help="vector steps compared between the batched and sync modes. 0 skips the check")
+    parser.add_argument("--modes", nargs="+", default=["sync", "async", "batched"], choices=["sync", "async", "batched"])
+    bench_args = parser.parse_args()
+
+    args = YAMLConfig(bench_args.config)
+    args.parse_config()
+    if bench_args.network_config:
+        args.network_config = bench_args.network_config
+
+    network = Network.create_network_from_yaml(
+        files("cyberwheel.data.configs.network").joinpath(args.network_config),
+        cache=args.network_cache if hasattr(args, "network_cache") else True,
+    )
+    args.service_mapping = get_service_map(network)
+
+    if "batched" in bench_args.modes and bench_args.check_steps > 0:
+        check_batched(args, network, bench_args.num_envs, bench_args.check_steps, bench_args.seed)
+        print(f"batched matches sync over {bench_args.check_steps} steps")
+
+    results = {}
+    for mode in bench_args.modes:
+        results[mode] = benchmark(
+            mode, args, network, bench_args.num_envs, bench_args.steps, bench_args.warmup, bench_args.seed
+        )
+
+    baseline = results.get("sync")
+    print(f"\n{args.network_config}, {bench_args.num_envs} envs, {bench_args.steps} steps")
+    print(f"{'mode':<10}{'SPS':>12}{'vs sync':>10}")
+    for mode, sps in results.items():
+        ratio = f"{sps / baseline:.2f}x" if baseline else "-"
+        print(f"{mode:<10}{sps:>12.1f}{ratio:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import sys
 from cyberwheel.utils import train_cyberwheel, evaluate_cyberwheel, run_cyberwheel, run_visualization_server, parse_default_override_args, parse_eval_override_args, parse_override_args, parse
+from cyberwheel.red_actions.technique_catalogue import main as build_art_catalogue
 
 def display_help():
     sys.argv = ['']
@@ -9,8 +10,13 @@ def display_help():
     parse_eval_override_args(print_help=True)
     print("---------------------------------------------------------------------------------------------------\nRunning Cyberwheel:\n\n")
     parse_default_override_args(print_help=True)
+    print("---------------------------------------------------------------------------------------------------\nBuilding the ART technique catalogue:\n\n")
+    print("python -m cyberwheel art-catalogue [art_techniques source] [--output DIR]")
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == 'art-catalogue':
+        build_art_catalogue(sys.argv[2:])
+        sys.exit(0)
     if len(sys.argv) > 2:
         mode = sys.argv.pop(1)
         config = sys.argv.pop(1)
@@ -36,18 +36,22 @@ class DeployDecoyHost(SubnetAction):
             return BlueActionReturn("decoy_limit_exceeded", False, 0, target=subnet.name)
         seed = kwargs.get("seed", None)
         name = generate_id(seed=seed)
-        if "server" in self.type.lower():
-            host_type = HostType(
-                name="Server", services=self.services, decoy=True, cve_list=self.cves
-            )
-        else:
-            host_type = HostType(
-                name="Workstation",
-                services=self.services,
-                decoy=True,
-                cve_list=self.cves,
-            )
+        host_type = self.network.host_types.get_host_type(
+            f"decoy:{self.type}", self._create_host_type
+        )
 
         self.host = self.network.create_decoy_host(name, subnet, host_type)
         self.decoy_list.append(name)
         return BlueActionReturn(name, True, 1, target=subnet.name)
+
+    def _create_host_type(self) -> HostType:
+        if "server" in self.type.lower():
+            return HostType(
+                name="Server", services=self.services, decoy=True, cve_list=self.cves
+            )
+        return HostType(
+            name="Workstation",
+            services=self.services,
+            decoy=True,
+            cve_list=self.cves,
+        )
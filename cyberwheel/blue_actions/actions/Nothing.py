@@ -11,4 +11,4 @@ class Nothing(StandaloneAction):
         super().__init__(network, configs)
 
     def execute(self, **kwargs) ->  BlueActionReturn:
-        return BlueActionReturn(generate_id(), True)                                                                                                                                                                                                                   
+        return BlueActionReturn(generate_id(seed=kwargs.get("seed", None)), True)                                                                                                                                                                                                                   
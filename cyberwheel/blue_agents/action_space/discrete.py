@@ -1,3 +1,5 @@
+import numpy as np
+
 from typing import List
 from gymnasium import Space
 from gymnasium.spaces import Discrete
@@ -40,23 +42,37 @@ class DiscreteActionSpace(ActionSpace):
                 f"provided action is of type {type(action)} and is unsupported by the chosen ActionSpaceConverter"
             )
 
-        for ac in self._action_checkers:
-            if not ac.check_range(action):
-                continue
-            name = ac.name
-            if ac.type == "standalone":
-                return ASReturn(name, ac.action)
-            elif ac.type == "host":
-                index = (action - ac.lower_bound) % self.num_hosts
-                return ASReturn(name, ac.action, args=[self.hosts[index]])
-            elif ac.type == "subnet":
-                index = (action - ac.lower_bound) % self.num_subnets
-                return ASReturn(name, ac.action, args=[self.network.subnets[self.subnets[index]]])
-            elif ac.type == "range":
-                index = (action - ac.lower_bound) % (ac.upper_bound - ac.lower_bound)
-                return ASReturn(name, ac.action, args=[index])
-            else:
-                raise TypeError(f"Unknown action type: {ac.type}.")
+        for i, ac in enumerate(self._action_checkers):
+            if ac.check_range(action):
+                return self.select_ranged_action(i, action)
+
+    def select_ranged_action(self, checker: int, action: int) -> ASReturn:
+        """
+        Selects `action`, which is known to be in the range of the `checker`th action
+        added (see `get_upper_bounds()`).
+        """
+        ac = self._action_checkers[checker]
+        name = ac.name
+        if ac.type == "standalone":
+            return ASReturn(name, ac.action)
+        elif ac.type == "host":
+            index = (action - ac.lower_bound) % self.num_hosts
+            return ASReturn(name, ac.action, args=[self.hosts[index]])
+        elif ac.type == "subnet":
+            index = (action - ac.lower_bound) % self.num_subnets
+            return ASReturn(name, ac.action, args=[self.network.subnets[self.subnets[index]]])
+        elif ac.type == "range":
+            index = (action - ac.lower_bound) % (ac.upper_bound - ac.lower_bound)
+            return ASReturn(name, ac.action, args=[index])
+        else:
+            raise TypeError(f"Unknown action type: {ac.type}.")
+
+    def get_upper_bounds(self) -> np.ndarray:
+        """
+        Returns the end of each action's range of indices, in the order the actions were added.
+        The action a batch of indices selects is found with one `np.searchsorted(bounds, actions, side="right")`.
+        """
+        return np.array([ac.upper_bound for ac in self._action_checkers], dtype=np.int64)
 
     def add_action(self, name: str, action: BlueAction, **kwargs):
         action_type = kwargs.get("type", "")
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 
 from cyberwheel.reward import RewardMap
+from cyberwheel.utils.step_timer import DISABLED_TIMER
 
 class BlueAgentResult():
     def __init__(self, name: str, id: str, success: bool, recurring: int, target=None) -> None:
@@ -19,6 +20,9 @@ class BlueAgentResult():
 
 
 class BlueAgent(ABC):
+    # Replaced by the environment's StepTimer
+    timer = DISABLED_TIMER
+
     def __init__(self) -> None:
         pass
 
@@ -9,7 +9,7 @@ from gymnasium import Space
 from cyberwheel.blue_agents.blue_agent import BlueAgent, BlueAgentResult
 from cyberwheel.reward.reward_base import RewardMap
 from cyberwheel.network.network_base import Network, Host
-from cyberwheel.blue_agents.action_space.action_space import ActionSpace
+from cyberwheel.blue_agents.action_space.action_space import ActionSpace, ASReturn
 from cyberwheel.observation import BlueObservation, BlueObservationProactive
 
 
@@ -185,8 +185,13 @@ class RLBlueAgent(BlueAgent):
 
     def act(self, action: int) -> BlueAgentResult:
         self.observation.detector.reset()
-        asc_return = self.action_space.select_action(action)
+        return self.execute(self.action_space.select_action(action))
 
+    def execute(self, asc_return: ASReturn) -> BlueAgentResult:
+        """
+        Runs the action selected by the action space. `act()` without the
+        action selection or the detector reset.
+        """
         if self.args.deterministic:
             asc_return.kwargs["seed"] = self.args.seed
             self.args.seed += 1
@@ -205,8 +210,16 @@ class RLBlueAgent(BlueAgent):
         return self.action_space.create_action_space(action_space_size)
     
     def get_observation_space(self, red_agent_result) -> Iterable:
+        timer = self.timer
+        if timer.enabled:
+            start = timer.now()
         alerts = self.observation.detector.obs([red_agent_result.action_results.detector_alert])
-        return self.observation.create_obs_vector(alerts, self.network.get_num_decoys())
+        if timer.enabled:
+            start = timer.lap("observation/detector_obs", start)
+        obs_vec = self.observation.create_obs_vector(alerts, self.network.get_num_decoys())
+        if timer.enabled:
+            timer.lap("observation/create_obs_vector", start)
+        return obs_vec
     
     def reset(self) -> None:
         for v in self.shared_data.values():
@@ -26,5 +26,13 @@ class RLBlueAgentProactive(RLBlueAgent):
         super().__init__(network, args)
     
     def get_observation_space(self, red_agent_result, headstart: bool) -> Iterable:
+        timer = self.timer
+        if timer.enabled:
+            start = timer.now()
         alerts = self.observation.detector.obs([red_agent_result.action_results.detector_alert])
-        return self.observation.create_obs_vector(alerts, headstart, self.network.get_num_decoys())
\ No newline at end of file
+        if timer.enabled:
+            start = timer.lap("observation/detector_obs", start)
+        obs_vec = self.observation.create_obs_vector(alerts, headstart, self.network.get_num_decoys())
+        if timer.enabled:
+            timer.lap("observation/create_obs_vector", start)
+        return obs_vec
\ No newline at end of file
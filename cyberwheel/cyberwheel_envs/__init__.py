@@ -1,3 +1,4 @@
 from cyberwheel.cyberwheel_envs.cyberwheel import Cyberwheel
 from cyberwheel.cyberwheel_envs.cyberwheel_rl import CyberwheelRL
 from cyberwheel.cyberwheel_envs.cyberwheel_proactive import CyberwheelProactive
+from cyberwheel.cyberwheel_envs.cyberwheel_vec_env import CyberwheelVecEnv
@@ -26,14 +26,24 @@ class CyberwheelProactive(CyberwheelRL):
 
         in_headstart = self.current_step < self.args.decoy_limit
 
+        timer = self.timer
+        if timer.enabled:
+            start = timer.now()
+
         blue_agent_result = self.blue_agent.act(action)
+        if timer.enabled:
+            start = timer.lap("blue_act", start)
 
         if in_headstart:
             action_results = Nothing(self.red_agent.current_host, self.red_agent.current_host).sim_execute()
             red_agent_result = RedAgentResult(action_results.action, self.red_agent.current_host, self.red_agent.current_host, False, action_results=action_results)
         else:
             red_agent_result = self.red_agent.act(action)
+        if timer.enabled:
+            start = timer.lap("red_act", start)
         obs_vec = self.blue_agent.get_observation_space(red_agent_result, in_headstart)
+        if timer.enabled:
+            start = timer.lap("observation", start)
 
         reward = self.reward_sign * self.reward_calculator.calculate_reward(
             red_agent_result.action.get_name(),
@@ -48,39 +58,15 @@ class CyberwheelProactive(CyberwheelRL):
         )
 
         self.total += reward
+        if timer.enabled:
+            timer.lap("reward", start)
 
         done = red_agent_result.action.get_name() == "impact"
 
         self.current_step += 1
-        info = {}
-        
-        pingsweeped_decoy = False
-        if (red_agent_result.action.get_name() == "pingsweep"):
-            for host in red_agent_result.action_results.metadata.get("sweeped_hosts"):
-                if host.decoy:
-                    pingsweeped_decoy = True
-        
+        info = {"action_space_size": self.rl_agent_action_space_size}
+
         if self.evaluation:
-            info = {
-                "red_action": red_agent_result.action.get_name(),
-                "red_action_src": red_agent_result.src_host.name,
-                "red_action_dst": red_agent_result.target_host.name,
-                "red_action_dst_is_decoy": red_agent_result.target_host.decoy,
-                "red_action_success": red_agent_result.success,
-                "blue_action": blue_agent_result.name,
-                "blue_action_id": blue_agent_result.id,
-                "blue_action_target": blue_agent_result.target,
-                "killchain": self.red_agent.killchain,
-                "network": self.network,
-                "history": self.red_agent.history,
-                "commands": red_agent_result.action_results.metadata
-                    .get(red_agent_result.target_host.name, {})
-                    .get("commands", []),
-                "pingsweeped_decoy": pingsweeped_decoy,
-                "decoy_attacked": red_agent_result.target_host.decoy,
-                "impacted_decoys": self.network.get_num_compromised_decoys(),
-                "timestep_till_impact": self.current_step if done else 0,
-                "headstart": in_headstart
-            }
+            info.update(self.record_step(red_agent_result, blue_agent_result, done, headstart=in_headstart))
 
         return obs_vec, reward, done, False, info
\ No newline at end of file
@@ -6,11 +6,15 @@ from typing import Iterable, Any
 from gymnasium import spaces
 
 from cyberwheel.cyberwheel_envs.cyberwheel import Cyberwheel
+from cyberwheel.cyberwheel_envs.step_record import STEP_RECORD_DTYPE, ValueTable, decode_step_record
 from cyberwheel.blue_agents import RLBlueAgent, InactiveBlueAgent, RLBlueAgentProactive
+from cyberwheel.blue_agents.blue_agent import BlueAgentResult
 from cyberwheel.network.network_base import Network
 from cyberwheel.red_agents import RLRedAgent, ARTAgent, ARTCampaign
+from cyberwheel.red_agents.red_agent_base import RedAgentResult
 from cyberwheel.utils import YAMLConfig, HybridSetList
 from cyberwheel.utils.set_seed import set_seed
+from cyberwheel.utils.step_timer import StepTimer
 
 import pandas as pd
 
@@ -50,6 +54,27 @@ class CyberwheelRL(gym.Env, Cyberwheel):
 
         self.evaluation = evaluation
         self.total = 0
+
+        # Every step and reset returns the number of valid RL agent actions in
+        # `info["action_space_size"]`, so vector envs batch it alongside the observations.
+        # Evaluation steps also return a compact STEP_RECORD_DTYPE record in `info["step"]`.
+        # The network, red agent history and commands of the last step are fetched on
+        # demand with `get_step_payload()`, unless `record_step_payloads` puts them in info.
+        self.step_values = ValueTable()
+        self.record_step_payloads = args.record_step_payloads if hasattr(args, "record_step_payloads") else False
+        self.last_commands = []
+
+        # Host command histories keep the last `command_history_limit` interned command ids
+        # (the red agent's history is bounded the same way by `agent_history_limit`)
+        full_history = args.full_history if hasattr(args, "full_history") else False
+        command_history_limit = args.command_history_limit if hasattr(args, "command_history_limit") else 256
+        self.network.host_state.set_command_history_limit(None if full_history else command_history_limit)
+
+        # Per-phase step timings, drained by the trainer with `get_step_timings()`
+        step_timing = args.step_timing if hasattr(args, "step_timing") else False
+        self.timer = StepTimer(step_timing and not evaluation)
+        self.red_agent.timer = self.timer
+        self.blue_agent.timer = self.timer
     
     def initialize_agents(self) -> None:
         args = self.args
@@ -75,10 +100,13 @@ class CyberwheelRL(gym.Env, Cyberwheel):
             self.rl_agent = self.blue_agent
             self.static_agent = self.red_agent 
 
+            obs_dtype = self.blue_agent.observation.dtype
+            if args.decoy_limit + 2 > np.iinfo(obs_dtype).max:
+                raise ValueError(f"decoy_limit {args.decoy_limit} does not fit the {np.dtype(obs_dtype).name} blue observation")
             self.observation_space = spaces.Box(
-                low  = np.full(self.blue_agent.observation.shape, -1, dtype=np.int32),
-                high = np.full(self.blue_agent.observation.shape, args.decoy_limit + 2, dtype=np.int32),
-                dtype=np.int32
+                low  = np.full(self.blue_agent.observation.shape, -1, dtype=obs_dtype),
+                high = np.full(self.blue_agent.observation.shape, args.decoy_limit + 2, dtype=obs_dtype),
+                dtype=obs_dtype
             )
 
             self.max_action_space_size = len(self.network.subnets) * 2
@@ -94,11 +122,21 @@ class CyberwheelRL(gym.Env, Cyberwheel):
         4. Get obs from Red or Blue Observation
         5. Return obs and related metadata
         """
+        timer = self.timer
+        if timer.enabled:
+            start = timer.now()
+
         blue_agent_result = self.blue_agent.act(action)
+        if timer.enabled:
+            start = timer.lap("blue_act", start)
 
         red_agent_result = self.red_agent.act(action)
+        if timer.enabled:
+            start = timer.lap("red_act", start)
 
         obs_vec = self.red_agent.get_observation_space() if self.args.train_red else self.blue_agent.get_observation_space(red_agent_result)
+        if timer.enabled:
+            start = timer.lap("observation", start)
 
         reward = self.reward_sign * self.reward_calculator.calculate_reward(
             red_agent_result.action.get_name(),
@@ -112,12 +150,14 @@ class CyberwheelRL(gym.Env, Cyberwheel):
         )
 
         self.total += reward
+        if timer.enabled:
+            timer.lap("reward", start)
 
         # done = self.current_step >= self.max_steps
         done = red_agent_result.action.get_name() == "impact"
 
         self.current_step += 1
-        info = {}
+        info = {"action_space_size": self.rl_agent_action_space_size}
 
         #print(red_agent_result.target_host.name)
         #if blue_agent_result.success:
@@ -127,38 +167,77 @@ class CyberwheelRL(gym.Env, Cyberwheel):
 
 
         if self.evaluation:
-            pingsweeped_decoy = False
-            if (red_agent_result.action.get_name() == "pingsweep"):
-                for host in red_agent_result.action_results.metadata.get("sweeped_hosts"):
-                    if host.decoy:
-                        pingsweeped_decoy = True
-            
-            decoy_attacked = red_agent_result.target_host.decoy
-            
-            info = {
-                "red_action": red_agent_result.action.get_name(),
-                "red_action_src": red_agent_result.src_host.name,
-                "red_action_dst": red_agent_result.target_host.name,
-                "red_action_dst_is_decoy": red_agent_result.target_host.decoy,
-                "red_action_success": red_agent_result.success,
-                "blue_action": blue_agent_result.name,
-                "blue_action_id": blue_agent_result.id,
-                "blue_action_target": blue_agent_result.target,
-                "killchain": self.red_agent.killchain,
-                "network": self.network,
-                "history": self.red_agent.history,
-                "commands": red_agent_result.action_results.metadata
-                    .get(red_agent_result.target_host.name, {})
-                    .get("commands", []),
-                "pingsweeped_decoy": pingsweeped_decoy,
-                "decoy_attacked": decoy_attacked,
-                "impacted_decoys": self.network.get_num_compromised_decoys(),
-                "timestep_till_impact": self.current_step if done else 0
-            }
+            info.update(self.record_step(red_agent_result, blue_agent_result, done))
 
         return obs_vec, reward, done, False, info
 
+    def record_step(
+        self,
+        red_agent_result: RedAgentResult,
+        blue_agent_result: BlueAgentResult,
+        done: bool,
+        headstart: bool = False,
+    ) -> dict[str, Any]:
+        """
+        Returns the info dict for an evaluation step, which holds a STEP_RECORD_DTYPE
+        record under "step" and, if `record_step_payloads` is set, the payloads
+        returned by `get_step_payload()`.
+        """
+        red_action = red_agent_result.action.get_name()
+        target_host = red_agent_result.target_host
+
+        pingsweeped_decoy = False
+        if red_action == "pingsweep":
+            for host in red_agent_result.action_results.metadata.get("sweeped_hosts"):
+                if host.decoy:
+                    pingsweeped_decoy = True
+
+        self.last_commands = red_agent_result.action_results.metadata.get(target_host.name, {}).get("commands", [])
+
+        values = self.step_values
+        record = np.zeros((), dtype=STEP_RECORD_DTYPE)
+        record["step"] = self.current_step
+        record["red_action"] = values.get_id(red_action)
+        record["red_action_src"] = values.get_id(red_agent_result.src_host.name)
+        record["red_action_dst"] = values.get_id(target_host.name)
+        record["red_action_dst_is_decoy"] = target_host.decoy
+        record["red_action_success"] = red_agent_result.success
+        record["blue_action"] = values.get_id(blue_agent_result.name)
+        record["blue_action_id"] = values.get_id(blue_agent_result.id)
+        record["blue_action_target"] = values.get_id(blue_agent_result.target)
+        record["blue_action_success"] = blue_agent_result.success
+        record["pingsweeped_decoy"] = pingsweeped_decoy
+        record["impacted_decoys"] = self.network.get_num_compromised_decoys()
+        record["timestep_till_impact"] = self.current_step if done else 0
+        record["headstart"] = headstart
+
+        info = {"step": record}
+        if self.record_step_payloads:
+            info.update(self.get_step_payload())
+        return info
+
+    def decode_step_record(self, record: np.void | np.ndarray) -> dict[str, Any]:
+        """
+        Returns a step record produced by this environment as a dict with the same keys
+        as its fields, plus "decoy_attacked".
+        """
+        return decode_step_record(record, self.step_values)
+
+    def get_step_payload(self) -> dict[str, Any]:
+        """
+        Returns the objects that describe the last step in full. They are live objects,
+        so they have to be read before the next step.
+        """
+        return {
+            "killchain": self.red_agent.killchain,
+            "network": self.network,
+            "history": self.red_agent.history,
+            "commands": self.last_commands,
+        }
+
     def reset(self, seed=None, options=None) -> tuple[Iterable, dict]:
+        if self.timer.enabled:
+            start = self.timer.now()
         if seed is not None:
             set_seed(seed)
         self.current_step = 0
@@ -167,10 +246,21 @@ class CyberwheelRL(gym.Env, Cyberwheel):
         self.blue_agent.reset()
         self.reward_calculator.reset()
         self.total = 0
+        info = {"action_space_size": self.rl_agent_action_space_size}
         if self.args.train_red:
-            return self.red_agent.observation.obs_vec, {}
+            obs = self.red_agent.observation.obs_vec
         else:
-            return self.blue_agent.observation.reset(), {} # TODO
+            obs = self.blue_agent.observation.reset() # TODO
+        if self.timer.enabled:
+            self.timer.lap("reset", start)
+        return obs, info
+
+    def get_step_timings(self) -> dict[str, np.ndarray]:
+        """
+        Returns the phase durations recorded since the last call, in seconds.
+        Empty unless `step_timing` is enabled.
+        """
+        return self.timer.drain()
         
     def close(self) -> None:
         pass
@@ -0,0 +1,300 @@
+import numpy as np
+
+from copy import deepcopy
+from importlib.resources import files
+from typing import Any
+
+from gymnasium.vector import AutoresetMode, VectorEnv
+from gymnasium.vector.utils import batch_space
+
+from cyberwheel.blue_agents import RLBlueAgent
+from cyberwheel.blue_agents.action_space.discrete import DiscreteActionSpace
+from cyberwheel.cyberwheel_envs.cyberwheel_rl import CyberwheelRL
+from cyberwheel.network.network_base import Network
+from cyberwheel.network.topology import NetworkTopology
+from cyberwheel.reward import RLReward
+from cyberwheel.utils import YAMLConfig
+
+
+class CyberwheelVecEnv(VectorEnv):
+    """
+    A vector environment that steps `num_envs` CyberwheelRL environments in one
+    process, for training the blue agent against an ART red agent. Given the same
+    seeds and actions, it returns the same observations, rewards and terminations
+    as a SyncVectorEnv of CyberwheelRL environments, with gymnasium's default
+    next-step autoreset.
+
+    The environments' networks are attached to one NetworkTopology (see
+    `Network.from_topology()`), so they share the hosts, edges, services and
+    firewall rules and only keep their own state. A step works on the whole batch
+    wherever the environments don't depend on each other:
+
+    *   the blue actions are looked up in the action space's ranges at once
+    *   the observations are one array. Every environment's BlueObservation writes
+        into its row, and the alert flags and decoy counts of all environments are
+        written with one assignment each
+    *   rewards are computed as arrays from the reward maps, and the recurring
+        rewards are only summed again for the environments whose recurring actions
+        changed
+    *   terminations and the action space sizes are written into preallocated arrays
+
+    The blue actions, the red agent's killchain and the detectors still run once
+    per environment, in order. They change each environment's network and history
+    objects and draw from the global `random` module, so running them in another
+    order would change the trajectories.
+
+    Only CyberwheelRL with an RLBlueAgent using a DiscreteActionSpace and the
+    RLReward reward function is supported.
+
+    :param YAMLConfig args: environment config, as for CyberwheelRL
+    :param int num_envs: number of environments
+    :param Network network: network to share between the environments. If not passed,
+        it is built from `args.network_config`.
+    :param bool copy: whether `reset()` and `step()` return copies of the batch arrays.
+        Without copies, the next call overwrites them. Default: True
+    """
+
+    def __init__(self, args: YAMLConfig, num_envs: int, network: Network | None = None, copy: bool = True) -> None:
+        super().__init__()
+        if args.environment != "CyberwheelRL" or args.train_red:
+            raise ValueError("CyberwheelVecEnv only runs CyberwheelRL environments that train the blue agent")
+        if network is None:
+            network = Network.create_network_from_yaml(
+                files("cyberwheel.data.configs.network").joinpath(args.network_config),
+                cache=args.network_cache if hasattr(args, "network_cache") else True,
+            )
+        topology = NetworkTopology.from_network(network)
+
+        # built and reset in turn, like the environments of a SyncVectorEnv (see `make_env()`)
+        self.envs: list[CyberwheelRL] = []
+        for _ in range(num_envs):
+            env = CyberwheelRL(args, network=Network.from_topology(topology), evaluation=False)
+            if (
+                type(env.blue_agent) is not RLBlueAgent
+                or not isinstance(env.blue_agent.action_space, DiscreteActionSpace)
+                or type(env.reward_calculator) is not RLReward
+            ):
+                raise ValueError(
+                    "CyberwheelVecEnv only supports an RLBlueAgent with a DiscreteActionSpace and the RLReward reward function"
+                )
+            env.reset()
+            self.envs.append(env)
+
+        env = self.envs[0]
+        self.num_envs = num_envs
+        self.copy = copy
+        self.metadata = dict(env.metadata)
+        self.metadata["autoreset_mode"] = AutoresetMode.NEXT_STEP
+        self.single_observation_space = env.observation_space
+        self.single_action_space = env.action_space
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+        self.action_space = batch_space(self.single_action_space, num_envs)
+        self.max_action_space_size = env.max_action_space_size
+        self.reward_sign = env.reward_sign
+
+        # Every BlueObservation writes into its row of the batch
+        observation = env.blue_agent.observation
+        self._observations = np.zeros((num_envs,) + observation.obs_vec.shape, dtype=observation.obs_vec.dtype)
+        for i, env in enumerate(self.envs):
+            env.blue_agent.observation.obs_vec = self._observations[i]
+        self._barrier = observation.len_obs // 2
+
+        self._action_bounds = self.envs[0].blue_agent.action_space.get_upper_bounds()
+
+        # (immediate, recurring) reward of every red and blue action, by action id
+        calculator = self.envs[0].reward_calculator
+        self._red_action_ids = {name: i for i, name in enumerate(calculator.red_rewards)}
+        self._red_action_names = list(calculator.red_rewards)
+        self._red_rewards = np.array(list(calculator.red_rewards.values()), dtype=np.float64).reshape(-1, 2)
+        self._blue_action_ids = {name: i for i, name in enumerate(calculator.blue_rewards)}
+        self._blue_rewards = np.array(list(calculator.blue_rewards.values()), dtype=np.float64).reshape(-1, 2)
+
+        self._rewards = np.zeros(num_envs, dtype=np.float64)
+        self._terminations = np.zeros(num_envs, dtype=np.bool_)
+        self._truncations = np.zeros(num_envs, dtype=np.bool_)
+        self._autoreset_envs = np.zeros(num_envs, dtype=np.bool_)
+        self._recurring = np.zeros(num_envs, dtype=np.float64)
+        self._num_decoys = np.zeros(num_envs, dtype=np.int64)
+        self._red_actions = np.zeros(num_envs, dtype=np.int64)
+        self._red_success = np.zeros(num_envs, dtype=np.bool_)
+        self._red_valid = np.zeros(num_envs, dtype=np.bool_)
+        self._red_decoy = np.zeros(num_envs, dtype=np.bool_)
+        self._blue_actions = np.zeros(num_envs, dtype=np.int64)
+        self._blue_success = np.zeros(num_envs, dtype=np.bool_)
+        self._blue_recurring = np.zeros(num_envs, dtype=np.int64)
+        self._action_space_sizes = np.zeros(num_envs, dtype=np.int64)
+        self._infos = {"action_space_size": self._action_space_sizes, "_action_space_size": np.ones(num_envs, dtype=np.bool_)}
+
+    def reset(
+        self,
+        *,
+        seed: int | list[int | None] | None = None,
+        options: dict[str, Any] | None = None,
+    ) -> tuple[np.ndarray, dict[str, Any]]:
+        """
+        Resets every environment. `seed` is None, an int (environment i is reset
+        with `seed + i`) or a list with one seed per environment.
+        """
+        if seed is None:
+            seed = [None] * self.num_envs
+        elif isinstance(seed, int):
+            seed = [seed + i for i in range(self.num_envs)]
+        if len(seed) != self.num_envs:
+            raise ValueError(f"got {len(seed)} seeds for {self.num_envs} environments")
+
+        for i, (env, env_seed) in enumerate(zip(self.envs, seed)):
+            env.reset(seed=env_seed, options=options)
+            self._action_space_sizes[i] = env.rl_agent_action_space_size
+        self._recurring[:] = 0
+        self._terminations[:] = False
+        self._autoreset_envs[:] = False
+        return self._batch(self._observations), self._batch(self._infos)
+
+    def step(self, actions: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, dict[str, Any]]:
+        """
+        Steps every environment with its action. Environments that terminated on the
+        previous step are reset instead, and return a reward of 0.
+        """
+        actions = np.asarray(actions, dtype=np.int64).reshape(self.num_envs)
+        stepped = ~self._autoreset_envs
+        checkers = np.searchsorted(self._action_bounds, actions, side="right")
+        invalid = stepped & ((actions < 0) | (checkers >= len(self._action_bounds)))
+        if invalid.any():
+            raise ValueError(f"invalid actions {actions[invalid].tolist()} for environments {np.flatnonzero(invalid).tolist()}")
+
+        timer = self.envs[0].timer
+        alert_rows = []
+        alert_columns = []
+        blue_results = [None] * self.num_envs
+        for i, (env, action, checker) in enumerate(zip(self.envs, actions.tolist(), checkers.tolist())):
+            if self._autoreset_envs[i]:
+                env.reset()
+                self._recurring[i] = 0
+                self._terminations[i] = False
+                self._action_space_sizes[i] = env.rl_agent_action_space_size
+                continue
+
+            if timer.enabled:
+                start = timer.now()
+            blue_agent = env.blue_agent
+            blue_agent_result = blue_agent.execute(blue_agent.action_space.select_ranged_action(checker, action))
+            if timer.enabled:
+                start = env.timer.lap("blue_act", start)
+
+            red_agent_result = env.red_agent.act(action)
+            if timer.enabled:
+                start = env.timer.lap("red_act", start)
+
+            observation = blue_agent.observation
+            mapping = observation.mapping
+            for alert in observation.detector.run([red_agent_result.action_results.detector_alert]):
+                alerted_host = alert.src_host
+                if not alerted_host or alerted_host.name not in mapping:
+                    continue
+                alert_rows.append(i)
+                alert_columns.append(mapping[alerted_host.name])
+            self._num_decoys[i] = env.network.get_num_decoys()
+            if timer.enabled:
+                env.timer.lap("observation/detector_obs", start)
+
+            red_action = red_agent_result.action.get_name()
+            target_host = red_agent_result.target_host
+            self._red_actions[i] = self._red_action_ids[red_action]
+            self._red_success[i] = red_agent_result.success
+            self._red_decoy[i] = target_host.decoy
+            self._red_valid[i] = target_host.name in env.reward_calculator.get_valid_targets()
+            self._blue_actions[i] = self._blue_action_ids[blue_agent_result.name]
+            self._blue_success[i] = blue_agent_result.success
+            self._blue_recurring[i] = blue_agent_result.recurring
+            blue_results[i] = blue_agent_result
+            self._terminations[i] = red_action == "impact"
+            self._action_space_sizes[i] = env.rl_agent_action_space_size
+            env.current_step += 1
+
+        if timer.enabled:
+            start = timer.now()
+        rows = np.flatnonzero(stepped)
+        obs = self._observations
+        barrier = self._barrier
+        obs[rows, :barrier] = 0
+        if alert_rows:
+            obs[alert_rows, alert_columns] = 1
+            obs[alert_rows, np.add(alert_columns, barrier)] = 1
+        obs[rows, -2] = -1
+        obs[rows, -1] = self._num_decoys[rows]
+        if timer.enabled:
+            start = self._record_batched("observation/create_obs_vector", start, len(rows))
+
+        # RLReward.calculate_reward() for every stepped environment
+        hit = stepped & self._red_success & self._red_valid
+        scale = np.where(self._red_decoy, 10.0, -1.0)
+        red_rewards = self._red_rewards[self._red_actions]
+        red_reward = np.where(hit, red_rewards[:, 0] * scale, 0.0)
+        red_recurring = np.where(hit, red_rewards[:, 1] * scale, 0.0)
+        blue_reward = np.where(stepped & self._blue_success, self._blue_rewards[self._blue_actions, 0], 0.0)
+
+        changed = np.flatnonzero(red_recurring != 0).tolist()
+        for i in changed:
+            self.envs[i].reward_calculator.add_recurring_red_action(
+                "0", self._red_action_names[self._red_actions[i]], bool(self._red_decoy[i])
+            )
+        for i in np.flatnonzero(stepped & (self._blue_recurring != 0)).tolist():
+            calculator = self.envs[i].reward_calculator
+            blue_agent_result = blue_results[i]
+            if blue_agent_result.recurring == -1:
+                calculator.remove_recurring_blue_action(blue_agent_result.id)
+            elif blue_agent_result.recurring == 1:
+                calculator.add_recurring_blue_action(blue_agent_result.id, blue_agent_result.name)
+            changed.append(i)
+        for i in changed:
+            self._recurring[i] = self.envs[i].reward_calculator.sum_recurring()
+
+        rewards = self._rewards
+        np.multiply(self.reward_sign, red_reward + blue_reward + self._recurring, out=rewards)
+        rewards[self._autoreset_envs] = 0
+        for i, reward in zip(rows.tolist(), rewards[rows].tolist()):
+            self.envs[i].total += reward
+        if timer.enabled:
+            self._record_batched("reward", start, len(rows))
+
+        self._autoreset_envs = self._terminations | self._truncations
+        return (
+            self._batch(obs),
+            np.copy(rewards),
+            np.copy(self._terminations),
+            np.copy(self._truncations),
+            self._batch(self._infos),
+        )
+
+    def _batch(self, value):
+        return deepcopy(value) if self.copy else value
+
+    def _record_batched(self, phase: str, start: float, num_envs: int) -> float:
+        """
+        Records a phase run once for `num_envs` environments under every environment's
+        timer, as an equal share of its duration, so the timings compare with CyberwheelRL's.
+        """
+        end = self.envs[0].timer.now()
+        if num_envs:
+            share = (end - start) / num_envs
+            for env in self.envs:
+                env.timer.record(phase, share)
+        return end
+
+    def call(self, name: str, *args: Any, **kwargs: Any) -> tuple[Any, ...]:
+        """
+        Calls the method `name` of every environment and returns the results. If
+        `name` isn't callable, returns its value in every environment.
+        """
+        results = []
+        for env in self.envs:
+            function = getattr(env, name)
+            results.append(function(*args, **kwargs) if callable(function) else function)
+        return tuple(results)
+
+    def get_attr(self, name: str) -> tuple[Any, ...]:
+        return self.call(name)
+
+    def close_extras(self, **kwargs: Any) -> None:
+        for env in self.envs:
+            env.close()
@@ -0,0 +1,107 @@
+import numpy as np
+
+from typing import Any, Hashable
+
+
+# One row per environment step. Names (actions, hosts, subnets, blue action ids) are
+# stored as ids into the environment's ValueTable, -1 meaning None.
+STEP_RECORD_DTYPE = np.dtype(
+    [
+        ("step", np.int32),
+        ("red_action", np.int32),
+        ("red_action_src", np.int32),
+        ("red_action_dst", np.int32),
+        ("red_action_dst_is_decoy", np.bool_),
+        ("red_action_success", np.bool_),
+        ("blue_action", np.int32),
+        ("blue_action_id", np.int32),
+        ("blue_action_target", np.int32),
+        ("blue_action_success", np.bool_),
+        ("pingsweeped_decoy", np.bool_),
+        ("impacted_decoys", np.int32),
+        ("timestep_till_impact", np.int32),
+        ("headstart", np.bool_),
+    ]
+)
+
+# Fields holding ValueTable ids
+STEP_RECORD_VALUE_FIELDS = (
+    "red_action",
+    "red_action_src",
+    "red_action_dst",
+    "blue_action",
+    "blue_action_id",
+    "blue_action_target",
+)
+
+
+class ValueTable:
+    """
+    Assigns integer ids to the values stored in step records. Ids are never reused,
+    so a record can be decoded at any point during the environment's lifetime.
+    """
+
+    def __init__(self) -> None:
+        self.ids: dict[tuple[type, Hashable], int] = {}
+        self.values: list[Hashable] = []
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def get_id(self, value: Hashable) -> int:
+        """
+        Returns the id of `value`, adding it to the table if needed.
+        """
+        if value is None:
+            return -1
+        # keyed by type too so that e.g. 1 and True get different ids
+        key = (type(value), value)
+        value_id = self.ids.get(key)
+        if value_id is None:
+            value_id = self.ids[key] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+    def lookup(self, value: Hashable) -> int | None:
+        """
+        Returns the id of `value`, or None if it was never added.
+        """
+        if value is None:
+            return -1
+        return self.ids.get((type(value), value))
+
+    def get_value(self, value_id: int) -> Hashable:
+        return None if value_id < 0 else self.values[value_id]
+
+
+def decode_step_record(record: np.void | np.ndarray, values: ValueTable) -> dict[str, Any]:
+    """
+    Returns a step record as a dict of plain Python values, keyed by field name.
+
+    :param record: a single STEP_RECORD_DTYPE record
+    :param ValueTable values: table of the environment that produced the record
+    """
+    decoded = {}
+    for field in STEP_RECORD_DTYPE.names:
+        value = record[field].item()
+        decoded[field] = values.get_value(value) if field in STEP_RECORD_VALUE_FIELDS else value
+    decoded["decoy_attacked"] = decoded["red_action_dst_is_decoy"]
+    return decoded
+
+
+def decode_step_records(records: np.ndarray, values: ValueTable) -> dict[str, np.ndarray]:
+    """
+    Decodes an array of step records column by column. Returns one array per field,
+    with ValueTable ids replaced by their values (object arrays).
+
+    :param records: 1-D array of STEP_RECORD_DTYPE records
+    :param ValueTable values: table of the environment that produced the records
+    """
+    # index -1 (None) is the extra last entry
+    lookup = np.empty(len(values) + 1, dtype=object)
+    for value_id, value in enumerate(values.values):
+        lookup[value_id] = value
+    decoded = {}
+    for field in STEP_RECORD_DTYPE.names:
+        decoded[field] = lookup[records[field]] if field in STEP_RECORD_VALUE_FIELDS else records[field].copy()
+    return decoded
@@ -53,6 +53,8 @@ class DetectorHandler:
             elif node != 'end' and out_degree == 0:
                 raise ValueError(f"node '{node}' must have an out-degree > 0")
 
+        # the edges in the order obs() walks them, for run()
+        self.edges = [(u, v, data["attr"]["detector"]) for u, v, data in self.DG.edges(data=True)]
         return self.DG
 
     def obs(self, perfect_alerts: Iterator[Alert]) -> Iterator[Alert]:
@@ -76,6 +78,23 @@ class DetectorHandler:
             self.DG.add_node(edge[1], detector_output=next_node_input)
         return self.DG.nodes.data("detector_output", default=[])['end']
 
+    def run(self, perfect_alerts: Iterator[Alert]) -> list[Alert]:
+        """
+        Returns what `obs()` returns right after `reset()`, without storing the
+        detectors' output in the graph. Used by CyberwheelVecEnv, which doesn't
+        reset the handler between steps.
+
+        - `perfect_alerts`: an iterable of Alerts produced by the red agent. Used as input to the detector graph.
+        """
+        outputs: dict[str, list[Alert]] = {}
+        for u, v, detector in self.edges:
+            result = perfect_alerts if u == 'start' else detector.obs(outputs.get(u, []))
+            next_node_input = outputs.setdefault(v, [])
+            for r in result:
+                if r not in next_node_input:
+                    next_node_input.append(r)
+        return outputs.get('end', [])
+
     def reset(self) -> None:
         for node in self.DG.nodes:
             self.DG.add_node(node, detector_output=[])
@@ -6,4 +6,41 @@ class Command:
     def __init__(self, executor, content, privilege):
         self.executor = executor
         self.content = content
-        self.privilege = privilege
\ No newline at end of file
+        self.privilege = privilege
+
+
+class CommandTable:
+    """
+    Interns commands to integer ids. Host command histories store ids, and each
+    distinct (executor, content, privilege) command exists once as a Command object.
+
+    Atomic tests intern their commands when techniques are loaded, so running a
+    test only appends ids.
+    """
+
+    def __init__(self) -> None:
+        self.ids: dict[tuple, int] = {}
+        self.commands: list[Command] = []
+
+    def __len__(self) -> int:
+        return len(self.commands)
+
+    def intern(self, executor, content: str, privilege: str) -> int:
+        """
+        Returns the id of a command, adding it to the table if needed.
+        """
+        # Keyed by id, which stays valid because the table keeps the executor alive through its
+        # Command. Tuples of only atomic values are untracked by the garbage collector.
+        key = (id(executor), content, privilege)
+        command_id = self.ids.get(key)
+        if command_id is None:
+            command_id = self.ids[key] = len(self.commands)
+            self.commands.append(Command(executor, content, privilege))
+        return command_id
+
+    def get(self, command_id: int) -> Command:
+        return self.commands[command_id]
+
+
+# Process-wide table shared by every Network
+COMMANDS = CommandTable()
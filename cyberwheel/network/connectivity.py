@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import networkx as nx
+
+from collections import deque
+from itertools import count
+from typing import Hashable, Iterable, Iterator
+
+
+class ConnectivityIndex:
+    """
+    Connected components of a Network graph, kept up to date as edges and nodes are
+    added and removed so that reachability queries are O(1).
+
+    Edges are treated as undirected links. Hosts link to their subnet and subnets to
+    their router, so two nodes are reachable from each other if they are in the same
+    component.
+
+    *   Adding an edge merges two components by relabeling the smaller one.
+    *   Removing an edge searches from both endpoints at once and stops as soon as one
+        side runs out of nodes. That side becomes a new component, so isolating a host
+        only visits the host itself.
+
+    :param nx.DiGraph graph: graph to index. The index must be notified of every
+        change made to the graph after this point.
+    """
+
+    def __init__(self, graph: nx.Graph) -> None:
+        self.graph = graph
+        self._ids = count()
+        self.component_of: dict[Hashable, int] = {}
+        self.components: dict[int, set[Hashable]] = {}
+        for nodes in nx.connected_components(graph.to_undirected(as_view=True)):
+            self._new_component(nodes)
+
+    def __len__(self) -> int:
+        return len(self.components)
+
+    def copy(self, graph: nx.Graph) -> ConnectivityIndex:
+        """
+        Returns a copy of the index for `graph`, which must have the same structure.
+        """
+        new_index = ConnectivityIndex.__new__(ConnectivityIndex)
+        new_index.graph = graph
+        new_index._ids = count(next(self._ids))
+        new_index.component_of = dict(self.component_of)
+        new_index.components = {cid: set(nodes) for cid, nodes in self.components.items()}
+        return new_index
+
+    def _new_component(self, nodes: Iterable[Hashable]) -> int:
+        cid = next(self._ids)
+        members = set(nodes)
+        self.components[cid] = members
+        for node in members:
+            self.component_of[node] = cid
+        return cid
+
+    def neighbors(self, node: Hashable) -> Iterator[Hashable]:
+        if self.graph.is_directed():
+            yield from self.graph.successors(node)
+            yield from self.graph.predecessors(node)
+        else:
+            yield from self.graph.neighbors(node)
+
+    def is_connected(self, node1: Hashable, node2: Hashable) -> bool:
+        """
+        Returns True if there is a path between the two nodes.
+        """
+        cid = self.component_of.get(node1)
+        return cid is not None and cid == self.component_of.get(node2)
+
+    def get_component(self, node: Hashable) -> set[Hashable]:
+        """
+        Returns the set of nodes reachable from `node` (including itself). Do not modify it.
+        """
+        return self.components[self.component_of[node]]
+
+    def add_node(self, node: Hashable) -> None:
+        if node not in self.component_of:
+            self._new_component((node,))
+
+    def add_edge(self, node1: Hashable, node2: Hashable) -> None:
+        """
+        Updates the index after an edge between the two nodes was added to the graph.
+        """
+        self.add_node(node1)
+        self.add_node(node2)
+        cid1, cid2 = self.component_of[node1], self.component_of[node2]
+        if cid1 == cid2:
+            return
+        if len(self.components[cid1]) < len(self.components[cid2]):
+            cid1, cid2 = cid2, cid1
+        smaller = self.components.pop(cid2)
+        for node in smaller:
+            self.component_of[node] = cid1
+        self.components[cid1] |= smaller
+
+    def remove_edge(self, node1: Hashable, node2: Hashable) -> None:
+        """
+        Updates the index after an edge between the two nodes was removed from the graph
+        (or after any change that may have disconnected them).
+        """
+        split_off = self._find_smaller_side(node1, node2)
+        if split_off is not None:
+            cid = self.component_of[node1]
+            self.components[cid] -= split_off
+            self._new_component(split_off)
+
+    def remove_node(self, node: Hashable, neighbors: Iterable[Hashable]) -> None:
+        """
+        Updates the index after a node was removed from the graph.
+
+        :param Hashable node: removed node
+        :param Iterable neighbors: nodes it was linked to before it was removed
+        """
+        cid = self.component_of.pop(node, None)
+        if cid is None:
+            return
+        members = self.components[cid]
+        members.discard(node)
+        if not members:
+            del self.components[cid]
+            return
+        # a leaf (i.e. a host or decoy) can't split its component
+        checked = []
+        for neighbor in dict.fromkeys(neighbors):
+            if neighbor == node:
+                continue
+            for other in checked:
+                if self.is_connected(other, neighbor):
+                    self.remove_edge(other, neighbor)
+            checked.append(neighbor)
+
+    def _find_smaller_side(self, node1: Hashable, node2: Hashable) -> set[Hashable] | None:
+        """
+        Searches from both nodes in lockstep. Returns None if they are still connected,
+        otherwise the nodes reachable from whichever side was exhausted first.
+        """
+        if node1 == node2:
+            return None
+        seen = ({node1}, {node2})
+        frontiers = (deque([node1]), deque([node2]))
+        while frontiers[0] and frontiers[1]:
+            for side in (0, 1):
+                node = frontiers[side].popleft()
+                for neighbor in self.neighbors(node):
+                    if neighbor in seen[1 - side]:
+                        return None
+                    if neighbor not in seen[side]:
+                        seen[side].add(neighbor)
+                        frontiers[side].append(neighbor)
+                if not frontiers[side]:
+                    return seen[side]
+        return seen[0] if not frontiers[0] else seen[1]
@@ -0,0 +1,47 @@
+from typing import Iterable
+
+
+class CVEBitIndex:
+    """
+    Interns CVE ids to bit positions, so a set of CVEs becomes an integer mask and
+    checking whether a host is vulnerable to a technique is a single `&`.
+
+    Bit positions depend on the order CVEs are first seen, so masks are only
+    meaningful in the process that computed them. Host types are pickled into worker
+    processes, which is why masks are looked up here by their interned CVE frozenset
+    instead of being stored on the HostType.
+    """
+
+    def __init__(self) -> None:
+        self.bits: dict[str, int] = {}
+        self._masks: dict[frozenset[str], int] = {}
+
+    def __len__(self) -> int:
+        return len(self.bits)
+
+    def bit(self, cve: str) -> int:
+        """
+        Returns the bit position of a CVE, assigning the next free one if needed.
+        """
+        position = self.bits.get(cve)
+        if position is None:
+            position = self.bits[cve] = len(self.bits)
+        return position
+
+    def mask(self, cves: Iterable[str]) -> int:
+        """
+        Returns the mask of a set of CVEs. Masks of frozensets are cached, and
+        interned CVE sets (see `HostTypeRegistry.intern_cves()`) hash in constant time.
+        """
+        cves = frozenset(cves)
+        mask = self._masks.get(cves)
+        if mask is None:
+            mask = 0
+            for cve in cves:
+                mask |= 1 << self.bit(cve)
+            self._masks[cves] = mask
+        return mask
+
+
+# Process-wide index shared by every Network and technique
+CVE_BITS = CVEBitIndex()
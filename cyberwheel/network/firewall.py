@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+ALL = "all"
+
+
+def _get_rule_field(rule: Any, key: str, default: Any) -> Any:
+    """
+    Reads a field from a FirewallRule or a firewall dict from a network config file.
+    """
+    if isinstance(rule, dict):
+        value = rule.get(key, default)
+    else:
+        value = getattr(rule, key, default)
+    return default if value is None or value == "" else value
+
+
+def normalize_port(port: str | int | None) -> str | int:
+    """
+    Converts a port to an int, or to 'all' if it matches every port.
+    """
+    if port is None:
+        return ALL
+    if isinstance(port, str):
+        if port.lower() == ALL:
+            return ALL
+        return int(port)
+    return int(port)
+
+
+def get_scopes(obj) -> tuple[str, ...]:
+    """
+    Returns every name a firewall rule can use to refer to a network object.
+
+    A Host is matched by its own name, its subnet and its subnet's router, a Subnet by
+    its own name and its router, and a Router by its own name. All objects match 'all'.
+    """
+    subnet = getattr(obj, "subnet", None)
+    if subnet is not None:
+        return (obj.name, subnet.name, subnet.router.name, ALL)
+    router = getattr(obj, "router", None)
+    if router is not None:
+        return (obj.name, router.name, ALL)
+    return (obj.name, ALL)
+
+
+class CompiledFirewall:
+    """
+    A firewall rule set compiled into an index for constant-time matching.
+
+    Rules are indexed by (src, port, proto) and map to the set of dest names they
+    allow. A rule set with no rules allows all traffic, as documented on Router and
+    Subnet.
+
+    :param list[FirewallRule | dict] rules: rules to compile
+    """
+
+    def __init__(self, rules: Iterable[Any]) -> None:
+        self.allow_all = True
+        self.index: dict[tuple[str, str | int, str], set[str]] = {}
+        for rule in rules:
+            if rule is None:
+                continue
+            self.allow_all = False
+            key = (
+                str(_get_rule_field(rule, "src", ALL)),
+                normalize_port(_get_rule_field(rule, "port", ALL)),
+                str(_get_rule_field(rule, "proto", "tcp")).lower(),
+            )
+            self.index.setdefault(key, set()).add(str(_get_rule_field(rule, "dest", ALL)))
+
+    def allows(
+        self,
+        src_scopes: tuple[str, ...],
+        dest_scopes: tuple[str, ...],
+        port: str | int,
+        proto: str,
+    ) -> bool:
+        """
+        Returns True if any rule matches the given source, destination, port, and protocol.
+
+        :param tuple[str] src_scopes: names the source can be matched by (see `get_scopes()`)
+        :param tuple[str] dest_scopes: names the destination can be matched by
+        :param str | int port: normalized destination port
+        :param str proto: lowercase protocol
+        """
+        if self.allow_all:
+            return True
+        index = self.index
+        for src in src_scopes:
+            for p in (port, ALL):
+                for pr in (proto, ALL):
+                    dests = index.get((src, p, pr))
+                    if dests is not None and not dests.isdisjoint(dest_scopes):
+                        return True
+        return False
+
+    def matching_dests(
+        self,
+        src_scopes: tuple[str, ...],
+        port: str | int,
+        proto: str,
+    ) -> set[str] | None:
+        """
+        Returns every dest name allowed by the rules matching the given source, port, and
+        protocol, or None if the rule set allows all traffic. Traffic is allowed if the
+        result shares a name with the destination's scopes, so a batch of flows from one
+        source can share the index lookups.
+
+        :param tuple[str] src_scopes: names the source can be matched by (see `get_scopes()`)
+        :param str | int port: normalized destination port
+        :param str proto: lowercase protocol
+        """
+        if self.allow_all:
+            return None
+        index = self.index
+        matched = set()
+        for src in src_scopes:
+            for p in (port, ALL):
+                for pr in (proto, ALL):
+                    dests = index.get((src, p, pr))
+                    if dests is not None:
+                        matched |= dests
+        return matched
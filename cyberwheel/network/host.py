@@ -3,14 +3,16 @@ from __future__ import annotations
 import ipaddress as ipa
 import random
 
+from copy import deepcopy
 from pydantic import BaseModel
 from typing import Union, List
 
 from cyberwheel.network.network_object import NetworkObject
+from cyberwheel.network.host_state import HostStateTable
 from cyberwheel.network.service import Service
 from cyberwheel.network.subnet import Subnet
 from cyberwheel.network.process import Process
-from cyberwheel.network.command import Command
+from cyberwheel.network.command import Command, COMMANDS
 
 
 class HostType(BaseModel):
@@ -41,7 +43,11 @@ class Host(NetworkObject):
         :param str host_type: type of host
         :param list[FirewallRule] | list[None] **firewall_rules: list of FirewallRules
         :param list[Service] | list[None] **services: list of services
+        :param HostStateTable **state_table: table to store mutable state in (defaults to a private table)
         """
+        state_table = kwargs.get("state_table")
+        self._state: HostStateTable = state_table if state_table is not None else HostStateTable(capacity=1)
+        self._sid: int = self._state.allocate()
         super().__init__(name, kwargs.get("firewall_rules", []))
         self.subnet: Subnet = subnet
         self.host_type: HostType | None = host_type
@@ -77,6 +83,10 @@ class Host(NetworkObject):
     def __deepcopy__(self, memo):
         new_host = Host(name=self.name, subnet=self.subnet, host_type=self.host_type)
         memo[id(self)] = new_host
+        # share the copied state table so the new host stays bound to the copied Network
+        new_host._state.free(new_host._sid)
+        new_host._state = deepcopy(self._state, memo)
+        new_host._sid = self._sid
         # set decoy status
         new_host.decoy = self.decoy
         new_host.interfaces = self.interfaces
@@ -93,11 +103,78 @@ class Host(NetworkObject):
         new_host.ip_address = self.ip_address
         return new_host
     
+    def fork(self, memo: dict, state_table: HostStateTable) -> Host:
+        """
+        Forks the host onto an already forked subnet and a copy of its state table.
+        `interfaces` is remapped by `Network.fork()` once every host is forked.
+
+        :param dict memo: maps id() of original objects to their forks
+        :param HostStateTable state_table: copy of this host's state table
+        """
+        new_host = super().fork(memo)
+        new_host.subnet = memo[id(self.subnet)]
+        new_host._state = state_table
+        new_host.services = list(self.services)
+        new_host.vulnerabilities = list(self.vulnerabilities)
+        new_host.processes = list(self.processes)
+        new_host.interfaces = list(self.interfaces)
+        return new_host
+
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Host):
             return False
         return self.name == other.name
 
+    @property
+    def sid(self) -> int:
+        """Dense integer id of this host in its HostStateTable"""
+        return self._sid
+
+    @property
+    def is_compromised(self) -> bool:
+        return bool(self._state.is_compromised[self._sid])
+
+    @is_compromised.setter
+    def is_compromised(self, value: bool) -> None:
+        self._state.is_compromised[self._sid] = value
+        self._state.mark_dirty(self._sid)
+
+    @property
+    def isolated(self) -> bool:
+        return bool(self._state.isolated[self._sid])
+
+    @isolated.setter
+    def isolated(self, value: bool) -> None:
+        self._state.isolated[self._sid] = value
+        self._state.mark_dirty(self._sid)
+
+    @property
+    def restored(self) -> bool:
+        return bool(self._state.restored[self._sid])
+
+    @restored.setter
+    def restored(self, value: bool) -> None:
+        self._state.restored[self._sid] = value
+        self._state.mark_dirty(self._sid)
+
+    @property
+    def decoy(self) -> bool:
+        return bool(self._state.decoy[self._sid])
+
+    @decoy.setter
+    def decoy(self, value: bool) -> None:
+        self._state.decoy[self._sid] = value
+        self._state.mark_dirty(self._sid)
+
+    @property
+    def command_history(self) -> list[Command]:
+        # decoded copy of the interned ids; use run_command() to add to the history
+        return [COMMANDS.get(command_id) for command_id in self._state.command_history[self._sid] or ()]
+
+    @command_history.setter
+    def command_history(self, value: list[Command]) -> None:
+        self._state.set_commands(self._sid, [COMMANDS.intern(c.executor, c.content, c.privilege) for c in value])
+
     def _apply_host_type(self, host_type: HostType) -> None:
         """
         Override/update Host attributes from defined HostType
@@ -228,7 +305,13 @@ class Host(NetworkObject):
         )
     
     def run_command(self, command_executor, command_content, privilege):
-        self.command_history.append(Command(command_executor, command_content, privilege))
+        self._state.append_command(self._sid, COMMANDS.intern(command_executor, command_content, privilege))
+
+    def run_commands(self, command_ids: tuple[int, ...]):
+        """
+        Runs commands that were already interned in `COMMANDS`, i.e. an atomic test's `command_ids`.
+        """
+        self._state.extend_commands(self._sid, command_ids)
 
     def remove_process(self, process_name: str):
         new_processes = [p for p in self.processes if p.name != process_name]
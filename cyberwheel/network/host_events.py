@@ -0,0 +1,31 @@
+class HostEvents:
+    """
+    Names of the hosts added to and removed from a Network since a subscriber last
+    drained them, in the order it happened. Created by `Network.subscribe_host_events()`.
+
+    The Network only holds a weak reference, so a subscription ends when its
+    subscriber is garbage collected. An empty HostEvents is falsy, so subscribers
+    can skip all work on steps where the network didn't change:
+
+        if self.host_events:
+            added, removed = self.host_events.drain()
+    """
+
+    def __init__(self) -> None:
+        self.added: list[str] = []
+        self.removed: list[str] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.added) or bool(self.removed)
+
+    def drain(self) -> tuple[list[str], list[str]]:
+        """
+        Returns the names added and removed since the last call, and clears them.
+        """
+        added, removed = self.added, self.removed
+        self.added, self.removed = [], []
+        return added, removed
+
+    def clear(self) -> None:
+        self.added = []
+        self.removed = []
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import numpy as np
+
+from collections import deque
+from typing import Any, Optional
+
+
+class HostStateTable:
+    """
+    Struct-of-arrays store for the mutable, per-episode state of Hosts.
+
+    Every Host bound to a table is given a dense integer id (`Host.sid`) that indexes
+    the NumPy columns below. `Host` exposes `is_compromised`, `isolated`, `restored`,
+    `decoy` and `command_history` as properties backed by this table, so resets and
+    counting queries over a whole Network are vectorized instead of looping over Hosts.
+
+    Columns:
+    *   is_compromised - whether the host has been compromised by the red agent
+    *   isolated - whether the host has been isolated by the blue agent
+    *   restored - whether the host has been restored by the blue agent
+    *   decoy - whether the host is a decoy
+    *   active - whether the row currently belongs to a Host
+    *   has_commands - whether the row's command history may be non-empty
+    *   dirty - whether the row has been written since the last reset
+    *   command_history - per-row deque of command ids interned in `command.COMMANDS`,
+        None until the row's first command
+
+    Writes are journaled (see `mark_dirty()`), so `reset()` only clears the rows that
+    changed during the episode.
+
+    Command histories keep the last `command_history_limit` ids of each host (all of
+    them if None), so their memory stays flat over long episodes. Ids are only
+    meaningful in the process that interned them; networks are shared between
+    processes before any commands have run.
+    """
+
+    FLAGS = ("is_compromised", "isolated", "restored", "decoy")
+    EPISODE_FLAGS = ("is_compromised", "isolated", "restored")
+
+    def __init__(self, capacity: int = 16) -> None:
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.is_compromised = np.zeros(capacity, dtype=np.bool_)
+        self.isolated = np.zeros(capacity, dtype=np.bool_)
+        self.restored = np.zeros(capacity, dtype=np.bool_)
+        self.decoy = np.zeros(capacity, dtype=np.bool_)
+        self.active = np.zeros(capacity, dtype=np.bool_)
+        self.has_commands = np.zeros(capacity, dtype=np.bool_)
+        self.dirty = np.zeros(capacity, dtype=np.bool_)
+        self.command_history_limit: Optional[int] = None
+        self.command_history: list[deque | None] = [None] * capacity
+        self.size = 0  # high-water mark of allocated rows
+        self._free: list[int] = []
+        self._dirty: list[int] = []  # journal of rows written since the last reset
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.active[: self.size]))
+
+    def _grow(self, min_capacity: int) -> None:
+        capacity = self.capacity
+        while capacity < min_capacity:
+            capacity *= 2
+        for column in self.FLAGS + ("active", "has_commands", "dirty"):
+            old = getattr(self, column)
+            new = np.zeros(capacity, dtype=np.bool_)
+            new[: self.capacity] = old
+            setattr(self, column, new)
+        self.command_history.extend([None] * (capacity - self.capacity))
+        self.capacity = capacity
+
+    def allocate(self) -> int:
+        """
+        Reserves a cleared row and returns its id.
+        """
+        if self._free:
+            sid = self._free.pop()
+        else:
+            if self.size >= self.capacity:
+                self._grow(self.size + 1)
+            sid = self.size
+            self.size += 1
+        self.active[sid] = True
+        return sid
+
+    def free(self, sid: int) -> None:
+        """
+        Clears a row and makes its id available for reuse.
+        """
+        for column in self.FLAGS + ("active", "has_commands"):
+            getattr(self, column)[sid] = False
+        self.command_history[sid] = None
+        self._free.append(sid)
+
+    def copy(self) -> HostStateTable:
+        """
+        Returns an independent copy of the table, including the command histories.
+        """
+        new_table = HostStateTable.__new__(HostStateTable)
+        new_table.__dict__.update(self.__dict__)
+        for column in self.FLAGS + ("active", "has_commands", "dirty"):
+            setattr(new_table, column, getattr(self, column).copy())
+        new_table.command_history = [
+            None if history is None else self._new_history(history) for history in self.command_history
+        ]
+        new_table._free = list(self._free)
+        new_table._dirty = list(self._dirty)
+        return new_table
+
+    def get_row(self, sid: int) -> dict[str, Any]:
+        row = {column: bool(getattr(self, column)[sid]) for column in self.FLAGS}
+        row["command_history"] = list(self.command_history[sid] or ())
+        return row
+
+    def set_row(self, sid: int, row: dict[str, Any]) -> None:
+        for column in self.FLAGS:
+            getattr(self, column)[sid] = row[column]
+        self.set_commands(sid, row["command_history"])
+
+    def bind(self, host) -> int:
+        """
+        Moves a Host's state into this table and points the Host at it.
+
+        :param Host host: host to bind
+        :returns int: the host's new id in this table
+        """
+        if host._state is self:
+            return host._sid
+        row = host._state.get_row(host._sid)
+        host._state.free(host._sid)
+        sid = self.allocate()
+        self.set_row(sid, row)
+        host._state, host._sid = self, sid
+        return sid
+
+    def unbind(self, host) -> None:
+        """
+        Moves a Host's state out of this table into a private single-row table.
+
+        This keeps Host objects that are still referenced after being removed from the
+        Network (i.e. by agent histories) readable without aliasing a reused row.
+        """
+        if host._state is not self:
+            return
+        detached = HostStateTable(capacity=1)
+        sid = detached.allocate()
+        detached.set_row(sid, self.get_row(host._sid))
+        self.free(host._sid)
+        host._state, host._sid = detached, sid
+
+    def mark_dirty(self, sid: int) -> None:
+        """
+        Records that a row was written so the next `reset()` clears it.
+        """
+        if not self.dirty[sid]:
+            self.dirty[sid] = True
+            self._dirty.append(sid)
+
+    def _new_history(self, command_ids=()) -> deque:
+        return deque(command_ids, maxlen=self.command_history_limit)
+
+    def set_command_history_limit(self, limit: Optional[int]) -> None:
+        """
+        Bounds every command history to its last `limit` ids, or unbounds them if None.
+        """
+        self.command_history_limit = limit
+        self.command_history = [
+            None if history is None else self._new_history(history) for history in self.command_history
+        ]
+
+    def _history(self, sid: int) -> deque:
+        history = self.command_history[sid]
+        if history is None:
+            history = self.command_history[sid] = self._new_history()
+        return history
+
+    def set_commands(self, sid: int, command_ids) -> None:
+        history = self._new_history(command_ids)
+        self.command_history[sid] = history if history else None
+        self.has_commands[sid] = len(history) > 0
+        self.mark_dirty(sid)
+
+    def append_command(self, sid: int, command_id: int) -> None:
+        self._history(sid).append(command_id)
+        self.has_commands[sid] = True
+        self.mark_dirty(sid)
+
+    def extend_commands(self, sid: int, command_ids) -> None:
+        self._history(sid).extend(command_ids)
+        self.has_commands[sid] = True
+        self.mark_dirty(sid)
+
+    def reset(self) -> None:
+        """
+        Clears the per-episode flags and command histories of the rows written since the
+        last reset. Rows that were never touched are skipped, so the cost scales with
+        episode activity instead of the number of hosts.
+        """
+        if not self._dirty:
+            return
+        rows = np.fromiter(self._dirty, dtype=np.intp, count=len(self._dirty))
+        for column in self.EPISODE_FLAGS:
+            getattr(self, column)[rows] = False
+        for sid in rows[self.has_commands[rows]]:
+            self.command_history[sid] = None
+        self.has_commands[rows] = False
+        self.dirty[rows] = False
+        self._dirty = []
+
+    def count(self, *columns: str) -> int:
+        """
+        Returns the number of active rows where every given column is set.
+
+        :param str *columns: names of flag columns, i.e. count("decoy", "is_compromised")
+        """
+        n = self.size
+        mask = self.active[:n].copy()
+        for column in columns:
+            mask &= getattr(self, column)[:n]
+        return int(np.count_nonzero(mask))
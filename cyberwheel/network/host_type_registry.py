@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from typing import Callable, Iterable
+
+from cyberwheel.network.host import HostType
+from cyberwheel.network.service import Service
+
+
+class HostTypeRegistry:
+    """
+    Interns HostTypes, Services and CVE sets so that every Host of the same type
+    shares one instance.
+
+    A network has a dozen or so host types but can have thousands of hosts, so
+    building each HostType once and sharing it cuts build time and memory roughly
+    by the number of hosts per type. Interned CVE sets are frozensets, and interned
+    objects must be treated as read-only.
+    """
+
+    def __init__(self) -> None:
+        self.host_types: dict[str, HostType] = {}
+        self._by_content: dict[tuple, HostType] = {}
+        self._services: dict[tuple, Service] = {}
+        self._cve_sets: dict[frozenset[str], frozenset[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_content)
+
+    def intern_cves(self, cves: Iterable[str]) -> frozenset[str]:
+        """
+        Returns the shared frozenset equal to `cves`.
+        """
+        cves = frozenset(cves)
+        return self._cve_sets.setdefault(cves, cves)
+
+    def intern_service(self, service: Service) -> Service:
+        """
+        Returns the shared Service equal to `service`, including its vulnerabilities.
+        """
+        vulns = self.intern_cves(service.vulns)
+        key = (
+            service.name,
+            service.port,
+            service.protocol,
+            service.version,
+            service.description,
+            service.decoy,
+            vulns,
+        )
+        if (interned := self._services.get(key)) is not None:
+            return interned
+        service.vulns = vulns
+        self._services[key] = service
+        return service
+
+    def intern_host_type(self, host_type: HostType) -> HostType:
+        """
+        Returns the shared HostType equal to `host_type`. The first HostType seen with
+        given contents becomes the shared instance, with its services and CVE set interned.
+        """
+        services = frozenset(self.intern_service(s) for s in host_type.services)
+        cve_list = self.intern_cves(host_type.cve_list)
+        key = (
+            host_type.name,
+            host_type.decoy,
+            host_type.os,
+            frozenset(id(s) for s in services),
+            tuple(id(p) for p in host_type.processes),
+            cve_list,
+        )
+        if (interned := self._by_content.get(key)) is not None:
+            return interned
+        host_type.services = set(services)
+        host_type.cve_list = cve_list
+        self._by_content[key] = host_type
+        return host_type
+
+    def get_host_type(self, name: str, factory: Callable[[], HostType]) -> HostType:
+        """
+        Returns the HostType registered under `name`, calling `factory` to build it the
+        first time it is requested.
+
+        :param str name: host type name, i.e. from the host definitions file
+        :param Callable factory: builds the HostType if it isn't registered yet
+        """
+        key = name.lower()
+        if (host_type := self.host_types.get(key)) is None:
+            host_type = self.intern_host_type(factory())
+            self.host_types[key] = host_type
+        return host_type
@@ -0,0 +1,232 @@
+import ipaddress as ipa
+import random
+import numpy as np
+
+from copy import copy
+from typing import Iterator
+
+# marks keys deleted from a SharedIntMap
+_DELETED = None
+
+
+class SharedIntMap:
+    """
+    An int -> int mapping read from two sorted, read-only arrays of keys and values,
+    with every change kept in a private dict.
+
+    It lets the IPAllocators of networks attached to a NetworkTopology share the leases
+    made while the network was built, and only store the leases made afterwards. It
+    supports the dict methods IPAllocator uses (`get`, `pop`, item assignment and
+    `copy`). Pickling it produces a dict.
+
+    :param np.ndarray keys: sorted int64 keys
+    :param np.ndarray values: int64 value of each key
+    """
+
+    def __init__(self, keys: np.ndarray, values: np.ndarray) -> None:
+        self.keys = keys
+        self.values = values
+        self.changes: dict[int, int | None] = {}
+
+    def __reduce__(self):
+        return dict, (self.to_dict(),)
+
+    def _lookup(self, key: int) -> int | None:
+        value = self.changes.get(key, self)
+        if value is not self:
+            return value
+        if not self.keys.size or not self.keys[0] <= key <= self.keys[-1]:
+            return None
+        i = np.searchsorted(self.keys, key)
+        return int(self.values[i]) if self.keys[i] == key else None
+
+    def get(self, key: int, default=None):
+        value = self._lookup(key)
+        return default if value is None else value
+
+    def pop(self, key: int, default=None):
+        value = self._lookup(key)
+        if value is None:
+            return default
+        self.changes[key] = _DELETED
+        return value
+
+    def __setitem__(self, key: int, value: int) -> None:
+        self.changes[key] = value
+
+    def copy(self) -> "SharedIntMap":
+        new_map = SharedIntMap(self.keys, self.values)
+        new_map.changes = dict(self.changes)
+        return new_map
+
+    def to_dict(self) -> dict[int, int]:
+        """
+        Returns the mapping as a dict.
+        """
+        mapping = dict(zip(self.keys.tolist(), self.values.tolist()))
+        for key, value in self.changes.items():
+            if value is _DELETED:
+                mapping.pop(key, None)
+            else:
+                mapping[key] = value
+        return mapping
+
+
+class IPAllocator:
+    """
+    Tracks the free host addresses of an IP network without materializing them.
+
+    Addresses are stored as integer offsets from the first usable host address. The free
+    offsets are kept as the prefix `[0, num_free)` of a virtual permutation of
+    `[0, num_hosts)`; only positions that have been swapped are stored, in two
+    dictionaries (position -> offset and offset -> position). This makes random leases,
+    releases, and membership checks O(1) and keeps memory proportional to the number
+    of leased addresses, so very large IPv4 and IPv6 prefixes are cheap to create.
+
+    It supports the subset of the list API that was used on `Subnet.available_ips`
+    (`pop(0)`, `append`, `remove`, `len`, `in` and iteration).
+
+    :param IPv4Network | IPv6Network ip_network: network to allocate addresses from
+    """
+
+    def __init__(self, ip_network: ipa.IPv4Network | ipa.IPv6Network) -> None:
+        self.ip_network = ip_network
+        self._address_class = type(ip_network.network_address)
+        first, last = self._host_range(ip_network)
+        self.first = first
+        self.num_hosts = last - first + 1
+        self.num_free = self.num_hosts
+        # dicts, or SharedIntMaps in networks attached to a NetworkTopology
+        self._value_at: dict[int, int] = {}
+        self._position_of: dict[int, int] = {}
+
+    @staticmethod
+    def _host_range(ip_network: ipa.IPv4Network | ipa.IPv6Network) -> tuple[int, int]:
+        """
+        Returns the first and last integer address yielded by `ip_network.hosts()`.
+        """
+        network = int(ip_network.network_address)
+        broadcast = int(ip_network.broadcast_address)
+        if ip_network.num_addresses <= 2:
+            # /31 and /32 (or /127 and /128) use every address
+            return network, broadcast
+        if ip_network.version == 4:
+            return network + 1, broadcast - 1
+        # IPv6 only reserves the Subnet-Router anycast address
+        return network + 1, broadcast
+
+    def __len__(self) -> int:
+        # len() is limited to sys.maxsize, use num_free for very large IPv6 prefixes
+        return self.num_free
+
+    def __bool__(self) -> bool:
+        return self.num_free > 0
+
+    def __iter__(self) -> Iterator[ipa.IPv4Address | ipa.IPv6Address]:
+        """
+        Iterates over the free addresses in ascending order.
+        """
+        for offset in sorted(self._get_value(p) for p in range(self.num_free)):
+            yield self._to_ip(offset)
+
+    def __contains__(self, ip: object) -> bool:
+        if not isinstance(ip, self._address_class):
+            return False
+        offset = int(ip) - self.first
+        return 0 <= offset < self.num_hosts and self._is_free(offset)
+
+    def copy(self) -> "IPAllocator":
+        new_allocator = copy(self)
+        new_allocator._value_at = self._value_at.copy()
+        new_allocator._position_of = self._position_of.copy()
+        return new_allocator
+
+    def _get_value(self, position: int) -> int:
+        return self._value_at.get(position, position)
+
+    def _get_position(self, offset: int) -> int:
+        return self._position_of.get(offset, offset)
+
+    def _is_free(self, offset: int) -> bool:
+        return self._get_position(offset) < self.num_free
+
+    def _to_ip(self, offset: int) -> ipa.IPv4Address | ipa.IPv6Address:
+        return self._address_class(self.first + offset)
+
+    def _swap(self, p1: int, p2: int) -> None:
+        if p1 == p2:
+            return
+        v1, v2 = self._get_value(p1), self._get_value(p2)
+        self._set(p1, v2)
+        self._set(p2, v1)
+
+    def _set(self, position: int, offset: int) -> None:
+        # drop identity entries so untouched parts of the range cost no memory
+        if position == offset:
+            self._value_at.pop(position, None)
+            self._position_of.pop(offset, None)
+        else:
+            self._value_at[position] = offset
+            self._position_of[offset] = position
+
+    def _take(self, offset: int) -> ipa.IPv4Address | ipa.IPv6Address:
+        self._swap(self._get_position(offset), self.num_free - 1)
+        self.num_free -= 1
+        return self._to_ip(offset)
+
+    def lease(self) -> ipa.IPv4Address | ipa.IPv6Address:
+        """
+        Removes and returns a random free address.
+
+        :raises IndexError: if no addresses are free
+        """
+        if self.num_free == 0:
+            raise IndexError("no free addresses in {}".format(self.ip_network))
+        return self._take(self._get_value(random.randrange(self.num_free)))
+
+    def pop(self, index: int = 0) -> ipa.IPv4Address | ipa.IPv6Address:
+        """
+        Removes and returns the lowest (`index=0`) or highest (`index=-1`) free address.
+
+        The search skips over leased addresses, so it is fast as long as the edges of the
+        range are mostly free (i.e. router interfaces assigned before any DHCP lease).
+
+        :raises IndexError: if no addresses are free
+        """
+        if self.num_free == 0:
+            raise IndexError("pop from empty IPAllocator")
+        if index == 0:
+            offset = 0
+            while not self._is_free(offset):
+                offset += 1
+        elif index == -1:
+            offset = self.num_hosts - 1
+            while not self._is_free(offset):
+                offset -= 1
+        else:
+            raise IndexError("IPAllocator only supports pop(0) and pop(-1)")
+        return self._take(offset)
+
+    def remove(self, ip: ipa.IPv4Address | ipa.IPv6Address) -> None:
+        """
+        Marks a specific free address as assigned.
+
+        :raises ValueError: if the address is not free
+        """
+        if ip not in self:
+            raise ValueError("{} is not a free address in {}".format(ip, self.ip_network))
+        self._take(int(ip) - self.first)
+
+    def append(self, ip: ipa.IPv4Address | ipa.IPv6Address) -> None:
+        """
+        Releases an assigned address back to the pool. Releasing a free address is a no-op.
+
+        :raises ValueError: if the address is not a host address of this network
+        """
+        offset = int(ip) - self.first
+        if not isinstance(ip, self._address_class) or not 0 <= offset < self.num_hosts:
+            raise ValueError("{} is not a host address in {}".format(ip, self.ip_network))
+        if self._is_free(offset):
+            return
+        self._swap(self._get_position(offset), self.num_free)
+        self.num_free += 1
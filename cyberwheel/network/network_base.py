@@ -4,20 +4,40 @@ import yaml
 import ipaddress as ipa
 import matplotlib.pyplot as plt
 import networkx as nx
+import numpy as np
+import weakref
 
+from copy import copy
 from importlib.resources import files
 from os import PathLike
 from pathlib import PosixPath
-from typing import Union, List
+from typing import Iterable, Union, List
 from tqdm import tqdm
 
+from cyberwheel.network.connectivity import ConnectivityIndex
+from cyberwheel.network.firewall import get_scopes, normalize_port
 from cyberwheel.network.host import Host, HostType
+from cyberwheel.network.host_events import HostEvents
+from cyberwheel.network.host_state import HostStateTable
+from cyberwheel.network.host_type_registry import HostTypeRegistry
+from cyberwheel.network.ip_allocator import SharedIntMap
+from cyberwheel.network.network_cache import (
+    get_network_cache_key,
+    load_cached_network,
+    save_cached_network,
+)
 from cyberwheel.network.network_object import NetworkObject, FirewallRule
 from cyberwheel.network.router import Router
 from cyberwheel.network.service import Service
 from cyberwheel.network.subnet import Subnet
+from cyberwheel.network.topology import NetworkTopology, TopologyGraph, TopologyHostList, TopologyHosts
 from cyberwheel.utils.hybrid_set_list import HybridSetList
 
+SERVICES_CONFIG_FILE: PosixPath = files("cyberwheel.data.configs.services").joinpath(
+    "windows_exploitable_services.yaml"
+)  # type:ignore
+
+
 class Network:
 
     def __init__(
@@ -25,13 +45,33 @@ class Network:
         name: str = "Network",
         graph: nx.Graph = None,
     ):
-        self.graph : nx.DiGraph = graph if graph else nx.DiGraph(name=name)
+        self._graph : nx.DiGraph = graph if graph else nx.DiGraph(name=name)
+        # the NetworkTopology this network reads its hosts and graph from, see from_topology()
+        self.topology : NetworkTopology | None = None
         self.name : str = name
+        self.host_state : HostStateTable = HostStateTable()
+        self.host_types : HostTypeRegistry = HostTypeRegistry()
+        # built on first use, see the connectivity property
+        self._connectivity : ConnectivityIndex | None = None
+        # memoized firewall decisions keyed by (src, dest, port, proto)
+        self._traffic_cache : dict[tuple, bool] = {}
+        # bumped whenever the firewall rules of one of this network's nodes change,
+        # so that the memoized decisions can be invalidated
+        self.firewall_generation : int = 0
+        self._traffic_cache_generation : int = 0
+        for _, data in self._graph.nodes(data="data"):
+            data._network = self
         
         self.disconnected_nodes: list[Host] = []
         self.isolated_hosts: list[Host] = []
+        # undo journal of structural changes made during an episode, see reset()
+        self._journal: list[tuple] = []
+        # weak references to the HostEvents of subscribed agents, see subscribe_host_events()
+        self._host_subscribers: list[weakref.ref] = []
 
         self.hosts : dict[str, Host] = {name:host for name, host in self if isinstance(host, Host)}
+        for host in self.hosts.values():
+            self.host_state.bind(host)
         self.subnets : dict[str, Subnet] = {name:subnet for name, subnet in self if isinstance(subnet, Subnet)}
         self.decoys : dict[str, Host] = {hn:host for hn, host in self.hosts if host.decoy}
 
@@ -41,10 +81,101 @@ class Network:
     def __iter__(self):
         #print(self.graph.nodes.items())
         #return iter(self.graph.nodes("data").items())
-        return iter(self.graph.nodes.items())
+        return iter(self._graph.nodes.items())
 
     def __len__(self):
-        return len(self.graph)
+        return len(self._graph)
+
+    @property
+    def graph(self) -> nx.DiGraph:
+        """
+        The networkx graph of the Network. An attached network builds it (see `materialize()`).
+        """
+        self.materialize()
+        return self._graph
+
+    @graph.setter
+    def graph(self, graph: nx.DiGraph) -> None:
+        self._graph = graph
+        self._connectivity = None
+
+    @property
+    def connectivity(self) -> ConnectivityIndex:
+        """
+        Connected components of the graph, built on first use and kept up to date after that.
+        """
+        if self._connectivity is None:
+            self._connectivity = ConnectivityIndex(self.graph)
+        return self._connectivity
+
+    @classmethod
+    def from_topology(cls, topology: NetworkTopology) -> 'Network':
+        """
+        Returns a Network attached to a NetworkTopology (see `NetworkSnapshot`).
+
+        The network gets its own routers, subnets and host state table, and reads
+        everything else from the topology's arrays: hosts are created the first time
+        they're looked up and load their attributes on first use. Adding and removing
+        hosts and links works as usual. Anything that needs every node (`graph`,
+        `fork()`, `copy()`, pickling) first turns it into a regular network with
+        `materialize()`.
+
+        :param NetworkTopology topology: topology to attach to
+        """
+        state = topology.load_state()
+        network = cls.__new__(cls)
+        network.name = state["name"]
+        network.topology = topology
+        network.host_state = state["host_state"]
+        network.host_types = topology.host_types
+        network._connectivity = None
+        network._traffic_cache = {}
+        network.firewall_generation = 0
+        network._traffic_cache_generation = 0
+        network.disconnected_nodes = []
+        network.isolated_hosts = []
+        network._journal = []
+        network._host_subscribers = []
+
+        nodes = {}
+        for i, router in state["routers"]:
+            router._network = network
+            nodes[i] = router
+        hosts = TopologyHosts(network, topology, nodes, state)
+        network.subnets = {}
+        for i, subnet in state["subnets"]:
+            subnet.__dict__.update(_network=network, _source=hosts, _tid=i)
+            allocator = subnet.available_ips
+            if allocator.num_hosts <= np.iinfo(np.int64).max:
+                allocator._value_at = topology.shared_int_map("value", i)
+                allocator._position_of = topology.shared_int_map("position", i)
+            nodes[i] = network.subnets[subnet.name] = subnet
+        network.hosts = hosts
+        network._graph = TopologyGraph(topology, hosts.node, network.name)
+        network.decoys = {topology.name(i): hosts.node(i) for i in state["decoys"]}
+        network.user_hosts = TopologyHostList(topology, topology.user_hosts, *state["user_hosts"])
+        network.server_hosts = TopologyHostList(topology, topology.server_hosts, *state["server_hosts"])
+        return network
+
+    def materialize(self) -> None:
+        """
+        Turns a network attached to a NetworkTopology into a regular network that no
+        longer reads from it, creating every host. Does nothing for other networks.
+        """
+        topology_hosts = self.hosts
+        if self.topology is None or not isinstance(topology_hosts, TopologyHosts):
+            return
+        graph = self._graph.to_networkx()
+        for _, node in graph.nodes(data="data"):
+            topology_hosts.detach(node)
+            if isinstance(node, Subnet) and isinstance(node.available_ips._value_at, SharedIntMap):
+                node.available_ips._value_at = node.available_ips._value_at.to_dict()
+                node.available_ips._position_of = node.available_ips._position_of.to_dict()
+        self.hosts = topology_hosts.copy()
+        self.user_hosts.detach()
+        self.server_hosts.detach()
+        self._graph = graph
+        self.topology = None
     
     def get_num_hosts(self) -> int:
         """
@@ -64,6 +195,87 @@ class Network:
         """
         return Network(name=self.name, graph=self.graph.copy())
 
+    def fork(self) -> 'Network':
+        """
+        Returns an independent copy of the Network for another environment.
+
+        Routers, subnets, hosts, the graph and the host state table are copied, so
+        changes made to one fork (decoys, isolation, compromised hosts, leases,
+        firewall rules) never show up in another. Immutable data such as host types,
+        services, routes and firewall rule objects is shared between forks instead
+        of being deep copied.
+        """
+        self.materialize()
+        memo = {}
+        nodes = [data for _, data in self.graph.nodes(data="data")]
+        for node in nodes:
+            if isinstance(node, Router):
+                node.fork(memo)
+        for node in nodes:
+            if isinstance(node, Subnet):
+                node.fork(memo)
+        host_state = self.host_state.copy()
+        for node in nodes:
+            if isinstance(node, Host):
+                node.fork(memo, host_state)
+        for node in nodes:
+            if isinstance(node, Subnet):
+                new_subnet = memo[id(node)]
+                new_subnet.connected_hosts = [memo.get(id(h), h) for h in node.connected_hosts]
+            elif isinstance(node, Host):
+                new_host = memo[id(node)]
+                new_host.interfaces = [memo.get(id(i), i) for i in node.interfaces]
+
+        network = copy(self)
+        network.graph = self.graph.copy()
+        for _, attrs in network.graph.nodes(data=True):
+            attrs["data"] = memo[id(attrs["data"])]
+            attrs["data"]._network = network
+        network.host_state = host_state
+        if self._connectivity is not None:
+            network._connectivity = self._connectivity.copy(network.graph)
+        network._traffic_cache = dict(self._traffic_cache)
+
+        network.hosts = {name: memo[id(host)] for name, host in self.hosts.items()}
+        network.subnets = {name: memo[id(subnet)] for name, subnet in self.subnets.items()}
+        network.decoys = {name: memo[id(host)] for name, host in self.decoys.items()}
+        network.user_hosts = self.user_hosts.copy()
+        network.server_hosts = self.server_hosts.copy()
+        network.disconnected_nodes = list(self.disconnected_nodes)
+        network.isolated_hosts = [memo.get(id(h), h) for h in self.isolated_hosts]
+        network._journal = [
+            (entry[0], memo.get(id(entry[1]), entry[1])) if entry[0] == "decoy" else entry
+            for entry in self._journal
+        ]
+        network._host_subscribers = []
+        return network
+
+    def __getstate__(self) -> dict:
+        self.materialize()
+        # subscriptions belong to agents in this process
+        state = self.__dict__.copy()
+        state["_host_subscribers"] = []
+        return state
+
+    def subscribe_host_events(self) -> HostEvents:
+        """
+        Returns a HostEvents that records every host added to or removed from the
+        network from now on. The subscription lasts as long as the HostEvents is referenced.
+        """
+        events = HostEvents()
+        self._host_subscribers.append(weakref.ref(events))
+        return events
+
+    def _publish_host_event(self, name: str, added: bool) -> None:
+        live = []
+        for ref in self._host_subscribers:
+            events = ref()
+            if events is None:
+                continue
+            (events.added if added else events.removed).append(name)
+            live.append(ref)
+        self._host_subscribers = live
+
     def get_all_hosts_on_subnet(self, subnet: Subnet) -> set[Host]:
         """
         Returns a list of all Hosts within the given Subnet
@@ -89,6 +301,9 @@ class Network:
         """
         self.add_node(host)
         self.hosts[host.name] = host
+        self.host_state.bind(host)
+        if self._host_subscribers:
+            self._publish_host_event(host.name, added=True)
         if host.decoy:
             return
         host_type = host.host_type.name.lower()
@@ -101,16 +316,29 @@ class Network:
         """
         Adds a Node to the Network.
         """
-        self.graph.add_node(node.name, data=node)
+        self._graph.add_node(node.name, data=node)
+        if self._connectivity is not None:
+            self._connectivity.add_node(node.name)
+        node._network = self
 
     def remove_host(self, host: Host) -> Host:
         """
         Removes a Host from the Network
         """
         try:
-            self.graph.remove_node(host.name)
+            connectivity = self._connectivity
+            neighbors = list(connectivity.neighbors(host.name)) if connectivity is not None else []
+            self._graph.remove_node(host.name)
+            if connectivity is not None:
+                connectivity.remove_node(host.name, neighbors)
             self.decoys.pop(host.name, None)
-            return self.hosts.pop(host.name, None)
+            self.host_state.unbind(host)
+            host._network = None
+            self._traffic_cache.clear()
+            removed = self.hosts.pop(host.name, None)
+            if removed is not None and self._host_subscribers:
+                self._publish_host_event(host.name, added=False)
+            return removed
         except nx.NetworkXError as e:
             raise e
 
@@ -118,7 +346,9 @@ class Network:
         """
         Connects two Nodes together in the Network.
         """
-        self.graph.add_edge(node1, node2)
+        self._graph.add_edge(node1, node2)
+        if self._connectivity is not None:
+            self._connectivity.add_edge(node1, node2)
 
     def isolate_host(self, host: Host, subnet: Subnet):
         """
@@ -128,11 +358,18 @@ class Network:
         self.disconnect_nodes(host.name, subnet.name)
 
     def disconnect_nodes(self, node1, node2):
-        self.graph.remove_edge(node1, node2)
+        self._graph.remove_edge(node1, node2)
+        if self._connectivity is not None:
+            self._connectivity.remove_edge(node1, node2)
         self.disconnected_nodes.append((node1, node2))
+        self._journal.append(("disconnect", node1, node2))
 
     def is_subnet_reachable(self, subnet1, subnet2):
-        return nx.has_path(self.graph, subnet1.name, subnet2.name)
+        """
+        Returns True if the subnets are linked through the Network, in O(1) using the
+        connectivity index.
+        """
+        return self.connectivity.is_connected(subnet1.name, subnet2.name)
 
     def get_random_host(self): # Does not support determinism yet
         return self.hosts[random.choice(list(self.hosts.keys()))]
@@ -151,13 +388,10 @@ class Network:
             return None  # return None if host not found
 
     def get_num_compromised_decoys(self): # SULI
-        num_compromised_decoys = 0
+        return self.host_state.count("decoy", "is_compromised")
 
-        for hn in self.decoys.keys():
-            if self.check_compromised_status(hn):
-                num_compromised_decoys += 1
-        
-        return num_compromised_decoys
+    def get_num_compromised_hosts(self) -> int:
+        return self.host_state.count("is_compromised")
 
     def check_compromised_status(self, host_name: str) -> bool | None:
         try:
@@ -213,7 +447,16 @@ class Network:
             plt.show()
 
     @classmethod
-    def create_network_from_yaml(cls, network_config=None, host_config="host_defs_services.yaml"):  # type: ignore
+    def create_network_from_yaml(cls, network_config=None, host_config="host_defs_services.yaml", cache: bool = False):  # type: ignore
+        """
+        Builds a Network from a network config file.
+
+        :param PathLike network_config: network YAML file (defaults to example_config.yaml)
+        :param str host_config: host definitions filename in configs/host_definitions
+        :param bool cache: load a previously compiled Network from cyberwheel/data/network_cache
+            if the network, host definition and services files are unchanged, building
+            and storing it otherwise
+        """
         if network_config is None:
             config_dir = files("cyberwheel.data.configs.network")
             network_config: PosixPath = config_dir.joinpath(
@@ -225,6 +468,9 @@ class Network:
                 )
             )
 
+        if cache:
+            return cls._create_network_from_cache(network_config, host_config)
+
         # Load the YAML config file
         with open(network_config, "r") as yaml_file:
             config = yaml.safe_load(yaml_file)
@@ -237,6 +483,8 @@ class Network:
         with open(conf_file) as f:
             type_config = yaml.safe_load(f)
         types = type_config["host_types"]
+        with open(SERVICES_CONFIG_FILE, "r") as f:
+            services_config = yaml.safe_load(f)
 
         ## parse topology
         # parse routers
@@ -292,21 +540,18 @@ class Network:
             if rules := val.get("firewall_rules"):
                 for rule in rules:
                     fw_rules.append(
-                        FirewallRule(
-                            rule("name"),  # type: ignore
-                            rule.get("src"),
-                            rule.get("port"),
-                            rule.get("proto"),
-                            rule.get("desc"),
-                        )
+                        FirewallRule(**{k: v for k, v in rule.items() if v is not None})
                     )
             else:
                 # if not fw_rules defined insert 'allow all' rule
-                fw_rules.append(FirewallRule())
+                fw_rules.append(FirewallRule(proto="all"))
 
             # instantiate HostType if defined
             if type_str := val.get("type"):
-                type = network.create_host_type_from_yaml(type_str, conf_file, types)  # type: ignore
+                type = network.host_types.get_host_type(
+                    type_str,
+                    lambda: network.create_host_type_from_yaml(type_str, conf_file, types, services_config),  # type: ignore
+                )
             else:
                 type = None
 
@@ -342,6 +587,26 @@ class Network:
             if routes := val.get("routes"):
                 host.add_routes_from_dict(routes)
         network.initialize_interfacing()
+        network.compile_firewalls()
+        return network
+
+    @classmethod
+    def _create_network_from_cache(cls, network_config, host_config: str) -> 'Network':
+        host_config_file = files("cyberwheel.data.configs.host_definitions").joinpath(host_config)
+        key = get_network_cache_key(network_config, host_config_file, SERVICES_CONFIG_FILE)
+        network = load_cached_network(key)
+        if network is not None:
+            return network
+
+        # Build with a seed derived from the inputs and leave the global random state
+        # untouched, so a cache hit returns the same Network as a cache miss
+        state = random.getstate()
+        random.seed(key)
+        try:
+            network = cls.create_network_from_yaml(network_config, host_config)
+        finally:
+            random.setstate(state)
+        save_cached_network(key, network)
         return network
 
     def get_node_from_name(self, node: str) -> NetworkObject | Host | Subnet | Router:
@@ -352,7 +617,7 @@ class Network:
         :returns NetworkObject:
         """
         try:
-            return self.graph.nodes[node]["data"]
+            return self._graph.nodes[node]["data"]
         except KeyError as e:
             print(f"{node} not found in {self.name}")
             raise e
@@ -369,6 +634,13 @@ class Network:
             return False
         return True
 
+    def compile_firewalls(self) -> None:
+        """
+        Compiles the firewall rules of every node so the first traffic check doesn't pay for it.
+        """
+        for _, data in self.graph.nodes(data="data"):
+            data.get_compiled_firewall()
+
     def is_traffic_allowed(
         self,
         src: NetworkObject,
@@ -379,117 +651,125 @@ class Network:
         """
         Checks firewall to see if network traffic should be allowed
 
+        Traffic to a host must be allowed by its router, subnet and host firewalls,
+        traffic to a subnet by its router and subnet firewalls. A firewall allows
+        traffic if any of its rules match, or if it has no rules. Decisions are
+        memoized until a firewall rule changes or a host is removed.
+
         :param str NetworkObject: source subnet or host of traffic
         :param str NetworkObject: destination subnet or host of traffic
         :param int port: destination port
         :param str proto: protocol (i.e. tcp/udp/icmp, default = tcp)
         """
-        # ICMP doesn't use ports (it's considered layer 3)
-        if proto.lower() == "icmp":
-            pass
-        elif not self._is_valid_port_number(port):
-            raise ValueError(f"{port} is not a valid port number")
-
-        def _does_src_match(src, rule: dict, type) -> bool:
-            if src.name == rule["src"] or rule["src"] == "all":
-                return True
-            if type == "host":
-                if (
-                    src.subnet.router.name == rule["src"]
-                    or src.subnet.name == rule["src"]
-                ):
-                    return True
-            elif type == "subnet":
-                if src.router.name == rule["src"]:
-                    return True
-            return False
-
-        def _does_dest_match(dest, rule: dict, type) -> bool:
-            if dest.name == rule["dest"] or rule["dest"] == "all":
-                return True
-            if type == "host":
-                if (
-                    dest.subnet.router.name == rule["dest"]
-                    or dest.subnet.name == rule["dest"]
-                ):
-                    return True
-            elif type == "subnet":
-                if dest.router.name == rule["dest"]:
-                    return True
-            return False
-
-        def _does_port_match(port: str, rule: dict) -> bool:
-            if str(rule["port"]) == port or str(rule["port"]) == "all":
-                return True
-            return False
-
-        def _does_proto_match(proto: str, rule: dict) -> bool:
-            if rule["proto"] == proto or rule["proto"] == "all":
-                return True
-            return False
-
-        def _check_rules(src, dest, port, proto, type):
-
-            # default to 'allow all' if no rules defined
-            ### this is antithetical to how firewalls work in the real world,
-            ### but seemed pragmatic in our case
-            # try:
-            #    if not dest.firewall_rules:
-            #        return True
-            # except NameError:
-            #    return True
-
-            # loop over each rule/element in firewall_rules
-            for rule in dest.firewall_rules:
-                # break if src doesn't match
-                if not _does_src_match(src, rule, type):
-                    break
-
-                # break if dest doesn't match
-                if not _does_dest_match(dest, rule, type):
-                    break
+        self._check_traffic_cache()
+
+        proto = proto.lower()
+        key = (src.name, dest.name, port, proto)
+        allowed = self._traffic_cache.get(key)
+        if allowed is not None:
+            return allowed
+
+        norm_port = self._normalize_traffic_port(port, proto)
+        chain = self._firewall_chain(dest)
+        src_scopes = get_scopes(src)
+        dest_scopes = get_scopes(dest)
+        allowed = len(chain) > 0 and all(
+            node.get_compiled_firewall().allows(src_scopes, dest_scopes, norm_port, proto)
+            for node in chain
+        )
+        self._traffic_cache[key] = allowed
+        return allowed
 
-                # break if port doesn't match
-                if not _does_port_match(str(port), rule):
-                    break
+    def is_traffic_allowed_many(
+        self,
+        flows: Iterable[tuple[NetworkObject, NetworkObject, Union[str, int, None], str]],
+    ) -> np.ndarray:
+        """
+        Checks a batch of flows against the firewalls, with the same rules and memoization
+        as `is_traffic_allowed()`.
+
+        Flows that aren't memoized are grouped by (src, port, proto). Each firewall on the
+        way is looked up once per group, so checking many destinations from one source
+        costs one set intersection per firewall and flow.
+
+        :param Iterable[tuple] flows: (src, dest, port, proto) tuples
+        :returns np.ndarray: boolean array with one decision per flow, in order
+        """
+        self._check_traffic_cache()
+        flows = list(flows)
+        allowed = np.zeros(len(flows), dtype=np.bool_)
+
+        groups: dict[tuple, tuple[NetworkObject, list]] = {}
+        for i, (src, dest, port, proto) in enumerate(flows):
+            proto = proto.lower()
+            key = (src.name, dest.name, port, proto)
+            cached = self._traffic_cache.get(key)
+            if cached is not None:
+                allowed[i] = cached
+                continue
+            norm_port = self._normalize_traffic_port(port, proto)
+            group = groups.setdefault((src.name, norm_port, proto), (src, []))
+            group[1].append((i, key, dest))
+
+        for (_, norm_port, proto), (src, group) in groups.items():
+            src_scopes = get_scopes(src)
+            # dest names each router and subnet firewall allows from this source, by node name
+            matched: dict[str, set[str] | None] = {}
+            for i, key, dest in group:
+                chain = self._firewall_chain(dest)
+                dest_scopes = get_scopes(dest)
+                decision = len(chain) > 0
+                # the firewall of the destination itself is only checked by this flow
+                for node in chain[:-1] if len(group) > 1 else ():
+                    if node.name not in matched:
+                        matched[node.name] = node.get_compiled_firewall().matching_dests(
+                            src_scopes, norm_port, proto
+                        )
+                    dests = matched[node.name]
+                    if dests is not None and dests.isdisjoint(dest_scopes):
+                        decision = False
+                        break
+                if decision:
+                    shared = len(chain) - 1 if len(group) > 1 else 0
+                    decision = all(
+                        node.get_compiled_firewall().allows(src_scopes, dest_scopes, norm_port, proto)
+                        for node in chain[shared:]
+                    )
+                self._traffic_cache[key] = decision
+                allowed[i] = decision
+        return allowed
 
-                # break if proto doesn't match
-                if not _does_proto_match(proto, rule):
-                    break
+    def _check_traffic_cache(self) -> None:
+        """
+        Drops the memoized traffic decisions if a firewall rule changed since they were made.
+        """
+        if self._traffic_cache_generation != self.firewall_generation:
+            self._traffic_cache.clear()
+            self._traffic_cache_generation = self.firewall_generation
 
-                # matching rule found
-                return True
-            return False
+    def _normalize_traffic_port(self, port: Union[str, int, None], proto: str) -> Union[str, int]:
+        """
+        Validates and normalizes the port of a flow. Raises ValueError if it's invalid.
+        """
+        # ICMP doesn't use ports (it's considered layer 3)
+        if proto == "icmp":
+            return "all" if port is None else normalize_port(port)
+        if not self._is_valid_port_number(port):
+            raise ValueError(f"{port} is not a valid port number")
+        return normalize_port(port)
 
+    @staticmethod
+    def _firewall_chain(dest: NetworkObject) -> tuple[NetworkObject, ...]:
+        """
+        Returns the nodes whose firewalls traffic to `dest` has to pass, outermost first.
+        """
         if isinstance(dest, Host):
-            subnet = dest.subnet
-            router = subnet.router
-            # check router fw
-            if not _check_rules(src, router, port, proto, "host"):
-                return False
-            # check subnet fw
-            if not _check_rules(src, subnet, port, proto, "host"):
-                return False
-            # check host fw
-            if not _check_rules(src, dest, port, proto, "host"):
-                return False
-            return True
-        elif isinstance(dest, Subnet):
-            router = dest.router
-            # check router fw
-            if not _check_rules(src, router, port, proto, "subnet"):
-                return False
-            # check subnet fw
-            if not _check_rules(src, dest, port, proto, "subnet"):
-                return False
-            return True
-        elif isinstance(dest, Router):
-            # check router fw
-            if not _check_rules(src, dest, port, proto, "router"):
-                return False
-            return True
-
-        return False
+            return (dest.subnet.router, dest.subnet, dest)
+        if isinstance(dest, Subnet):
+            return (dest.router, dest)
+        if isinstance(dest, Router):
+            return (dest,)
+        return ()
 
     def add_host_to_subnet(
         self, name: str, subnet: Subnet, host_type: HostType | None, **kwargs
@@ -514,6 +794,7 @@ class Network:
             host_type,
             firewall_rules=kwargs.get("firewall_rules", []),
             services=kwargs.get("services"),
+            state_table=self.host_state,
         )
         # add host to graph
         self.add_host(host)
@@ -558,6 +839,7 @@ class Network:
         """
         host = self.add_host_to_subnet(*args, decoy=True, **kwargs)
         self.decoys[host.name] = host
+        self._journal.append(("decoy", host))
         return host
 
     def remove_decoy_host(self, host: Host) -> None:
@@ -575,21 +857,39 @@ class Network:
         #self.decoys.remove(i)
 
     def reset(self):
+        """
+        Restores the Network to its initial state by undoing the journaled changes in
+        reverse order, so the cost depends on what happened during the episode rather
+        than on the size of the Network. Any decoys left in `decoys` after that are
+        removed as well.
+        """
+        for entry in reversed(self._journal):
+            if entry[0] == "decoy":
+                decoy = entry[1]
+                # skip decoys that were already removed during the episode
+                if self.decoys.get(decoy.name) is decoy:
+                    self.remove_host_from_subnet(decoy)
+            elif entry[0] == "disconnect":
+                _, node1, node2 = entry
+                # don't recreate nodes that were removed after being disconnected
+                if node1 in self._graph and node2 in self._graph:
+                    self.connect_nodes(node1, node2)
+        self._journal = []
+        # decoys tracked without going through create_decoy_host() aren't journaled
         for decoy in list(self.decoys.values()):
-            self.remove_host_from_subnet(decoy)
+            if decoy.name in self._graph:
+                self.remove_host_from_subnet(decoy)
         self.decoys = {}
-
-        for edge in self.disconnected_nodes:
-            self.connect_nodes(edge[0], edge[1])
         self.disconnected_nodes = []
 
         self.isolated_hosts = []
 
-        for _, host in self.hosts.items():
-            host.command_history = []
-            host.is_compromised = False
-            host.isolated = False  # For isolate action
-            host.restored = False
+        # clears is_compromised, isolated, restored and command_history for every host
+        self.host_state.reset()
+
+        # random host choices restart from the global RNG, so they follow the reset seed
+        self.user_hosts.reseed()
+        self.server_hosts.reseed()
 
     @staticmethod
     def create_host_type_from_json(name: str, config_file: PathLike) -> HostType:
@@ -631,12 +931,13 @@ class Network:
         return HostType(name=name, services=service_objects, decoy=decoy, os=os)
 
     @staticmethod
-    def create_host_type_from_yaml(name: str, config_file: PathLike, types) -> HostType:
+    def create_host_type_from_yaml(name: str, config_file: PathLike, types, services_config: dict | None = None) -> HostType:
         """
         Return a matching HostType object from yaml file
 
         :param str name: host type name to match against
         :param str config_file: YAML config file path
+        :param dict services_config: parsed services YAML (read from disk if not given)
         :raises HostTypeNotFoundError:
         :returns HostType:
         """
@@ -654,13 +955,10 @@ class Network:
 
         services_list = host_type.get("services", [])
 
-        windows_services = {}
-        config_dir = files("cyberwheel.data.configs.services")
-        config_file_path: PosixPath = config_dir.joinpath(
-            "windows_exploitable_services.yaml"
-        )  # type:ignore
-        with open(config_file_path, "r") as f:
-            windows_services = yaml.safe_load(f)
+        windows_services = services_config
+        if windows_services is None:
+            with open(SERVICES_CONFIG_FILE, "r") as f:
+                windows_services = yaml.safe_load(f)
 
         cve_list = set()
         running_services = []
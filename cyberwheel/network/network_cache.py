@@ -0,0 +1,94 @@
+import functools
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+
+import networkx as nx
+import numpy as np
+
+from importlib.resources import files
+from os import PathLike
+from pathlib import Path
+
+# Source files of the classes a pickled Network contains. They are part of the cache key,
+# so changing any of them invalidates the cached networks.
+PICKLED_SOURCES = (
+    Path(__file__).parent,  # cyberwheel.network
+    Path(__file__).parent.parent / "utils" / "hybrid_set_list.py",
+)
+
+
+def get_default_cache_dir() -> PathLike:
+    return files("cyberwheel.data").joinpath("network_cache")
+
+
+@functools.cache
+def get_source_fingerprint() -> str:
+    """
+    Returns a hash of the source of every module whose classes are pickled into a
+    cached Network, and of the versions of the libraries it pickles objects of.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{sys.version_info[:2]}:{nx.__version__}:{np.__version__}".encode())
+    for source in PICKLED_SOURCES:
+        paths = sorted(source.glob("*.py")) if source.is_dir() else [source]
+        for path in paths:
+            digest.update(path.name.encode())
+            digest.update(hashlib.sha256(path.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def get_network_cache_key(*config_files: PathLike) -> str:
+    """
+    Returns a hash of the contents of the given config files and of the source of the
+    pickled classes (see `get_source_fingerprint()`).
+
+    :param PathLike *config_files: network, host definition, and services YAML files
+    """
+    digest = hashlib.sha256()
+    digest.update(get_source_fingerprint().encode())
+    for config_file in config_files:
+        with open(config_file, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def load_cached_network(key: str, cache_dir: PathLike | None = None):
+    """
+    Returns the Network stored under `key`, or None if it isn't cached or can't be loaded.
+    """
+    cache_dir = cache_dir if cache_dir is not None else get_default_cache_dir()
+    path = os.path.join(cache_dir, f"{key}.pickle")
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        # stale or partially written artifact, it will be rebuilt and overwritten
+        print(f"Ignoring unreadable network cache {path}: {e}")
+        return None
+
+
+def save_cached_network(key: str, network, cache_dir: PathLike | None = None) -> None:
+    """
+    Stores a Network under `key`. The file is written atomically so parallel
+    environments can build and save the same network safely. If the cache directory
+    can't be written to, the network is not stored.
+    """
+    cache_dir = cache_dir if cache_dir is not None else get_default_cache_dir()
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    except OSError as e:
+        print(f"Not caching the network, {cache_dir} is not writable: {e}")
+        return
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(network, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, os.path.join(cache_dir, f"{key}.pickle"))
+    except BaseException:
+        os.remove(tmp_path)
+        raise
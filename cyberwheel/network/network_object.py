@@ -3,6 +3,9 @@ import ipaddress as ipa
 from pydantic import BaseModel
 from typing import Generator
 
+from cyberwheel.network.firewall import CompiledFirewall
+from cyberwheel.network.routing import RoutingIndex
+
 
 class Route(BaseModel):
     dest: ipa.IPv4Network | ipa.IPv6Network
@@ -30,6 +33,7 @@ class RoutingTable(BaseModel):
 class FirewallRule(BaseModel):
     name: str = 'allow all'
     src: str = 'all'
+    dest: str = 'all'
     port: int | str = 'all'
     proto: str = 'tcp'
     desc: str | None = None
@@ -38,9 +42,10 @@ class FirewallRule(BaseModel):
     def __eq__(self, other) -> bool:
         if isinstance(other, FirewallRule):
             src_matched = self.src == other.src
+            dest_matched = self.dest == other.dest
             port_matched = self.port == other.port
             proto_matched = self.proto == other.proto
-            return src_matched and port_matched and proto_matched
+            return src_matched and dest_matched and port_matched and proto_matched
         return False
 
 
@@ -50,11 +55,15 @@ class NetworkObject:
     """
     def __init__(self, name, firewall_rules: list[FirewallRule | None] = []):
         self.name = name
+        # the Network this object is a node of. Its firewall decisions are
+        # invalidated when this object's rules change, see _invalidate_firewall()
+        self._network = None
         # default to 'allow all' if no rules defined
         ### this is antithetical to how firewalls work in the real world,
         ### but seemed pragmatic in our case
         #self.firewall_rules = self._generate_implied_allow_rules(firewall_rules)
         self.firewall_rules = firewall_rules
+        self._compiled_firewall = None
         self.is_compromised = False
         self.default_route = None
         self.routes = set()
@@ -66,13 +75,92 @@ class NetworkObject:
         return False
 
 
+    def __getattr__(self, name: str):
+        # objects of a Network attached to a NetworkTopology load their attributes on first use
+        source = self.__dict__.get("_source")
+        if source is not None and source.load_attribute(self, name):
+            return self.__dict__[name]
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+
+    def __getstate__(self) -> dict:
+        source = self.__dict__.get("_source")
+        if source is not None:
+            source.detach(self)
+        return self.__dict__
+
+
+    def fork(self, memo: dict) -> 'NetworkObject':
+        """
+        Returns a shallow copy that owns its mutable containers (routes and
+        firewall rules) but shares their immutable contents with this object.
+        Used by `Network.fork()`.
+
+        :param dict memo: maps id() of original objects to their forks
+        """
+        new_obj = self.__class__.__new__(self.__class__)
+        new_obj.__dict__.update(self.__dict__)
+        new_obj._firewall_rules = list(self._firewall_rules)
+        new_obj._routes = set(self._routes)
+        # share the routing index until either object adds a route
+        if self._route_index is not None:
+            self._route_index.frozen = True
+        memo[id(self)] = new_obj
+        return new_obj
+
+
+    @property
+    def routes(self) -> set[Route]:
+        return self._routes
+
+
+    @routes.setter
+    def routes(self, routes: set[Route]) -> None:
+        # routes must be added with add_route() so the routing index stays current
+        self._routes = set(routes)
+        # most objects only have a default route, so only build an index when needed
+        self._route_index = RoutingIndex(self._routes) if self._routes else None
+
+
+    @property
+    def firewall_rules(self) -> list:
+        return self._firewall_rules
+
+
+    @firewall_rules.setter
+    def firewall_rules(self, rules: list | None) -> None:
+        # copy so objects never share a rule list (i.e. the mutable default)
+        self._firewall_rules = list(rules) if rules else []
+        self._invalidate_firewall()
+
+
+    def _invalidate_firewall(self) -> None:
+        self._compiled_firewall = None
+        if self._network is not None:
+            self._network.firewall_generation += 1
+
+
+    def get_compiled_firewall(self) -> CompiledFirewall:
+        '''
+        Returns this object's firewall rules compiled into an index. Rules are
+        recompiled only after they change.
+
+        Rules must be changed through `firewall_rules` assignment or the
+        add/remove methods, not by mutating the list in place.
+        '''
+        if self._compiled_firewall is None:
+            self._compiled_firewall = CompiledFirewall(self._firewall_rules)
+        return self._compiled_firewall
+
+
     def add_firewall_rule(self, rule: FirewallRule) -> None:
         '''
         Adds new firewall rule
 
         :param FirewallRule rule: firewall rule
         '''
-        self.firewall_rules.append(rule)
+        self._firewall_rules.append(rule)
+        self._invalidate_firewall()
 
 
     def add_firewall_rules(self, rules: list[FirewallRule]) -> None:
@@ -81,7 +169,8 @@ class NetworkObject:
 
         :param list[FirewallRule] rules: list of firewall rule(s)
         '''
-        self.firewall_rules.extend(rules)
+        self._firewall_rules.extend(rules)
+        self._invalidate_firewall()
 
 
     def remove_firewall_rule(self, rule_name: str):
@@ -91,7 +180,7 @@ class NetworkObject:
         :param str rule_name: name of existing fw rule
         """
         updated_rules = [rule for rule in self.firewall_rules if
-                rule.name != rule_name]
+                (rule.get('name') if isinstance(rule, dict) else rule.name) != rule_name]
 
         # update firewall rules
         self.firewall_rules = updated_rules
@@ -141,14 +230,18 @@ class NetworkObject:
 
 
     def add_route(self, route: Route) -> None:
-        self.routes.add(route)
+        self._routes.add(route)
+        if self._route_index is None:
+            self._route_index = RoutingIndex()
+        elif self._route_index.frozen:
+            self._route_index = self._route_index.copy()
+        self._route_index.add(route)
 
 
     def get_routes(self):
         # should the default route be preppended to this list?
-        routes = self.routes
-        routes.add(self.default_route)
-        return routes
+        self.add_route(self.default_route)
+        return self.routes
 
 
     def get_default_route(self):
@@ -184,18 +277,27 @@ class NetworkObject:
         :param (IPv4Address | IPv6Address) dest_ip: destination IP object
         :returns (IPv4Address | IPv6Address):
         '''
-        # sort routes
-        routes = sorted(list(self.routes))
-
-        # reverse list because ipaddress' logical operators are weird
-        # and sort by subnet mask bits instead of number of ips in subnet
-        # i.e. this should give us a list with smallest subnets first
-        routes.reverse()
-
         # find most specific match in routes
-        for route in routes:
-            if dest_ip in route.dest.hosts():
-                return route.via
+        if self._route_index is not None:
+            via = self._route_index.lookup(dest_ip)
+            if via is not None:
+                return via
 
         # return default_route if no matche
         return self.default_route.via #type: ignore
+
+
+    def get_nexthops_from_routes(self,
+                                 dest_ips: list[ipa.IPv4Address | ipa.IPv6Address]) -> list:
+        '''
+        Return the next hop for each IP in dest_ips (see get_nexthop_from_routes())
+
+        :param list[IPv4Address | IPv6Address] dest_ips: destination IP objects
+        :returns list[IPv4Address | IPv6Address]:
+        '''
+        if self._route_index is None:
+            return [self.default_route.via for _ in dest_ips] #type: ignore
+        return [
+            via if via is not None else self.default_route.via #type: ignore
+            for via in self._route_index.lookup_many(dest_ips)
+        ]
@@ -43,6 +43,11 @@ class Router(NetworkObject):
         str += f'routes={self.routes!r}, firewall_rules={self.firewall_rules!r}'
         return str
 
+    def fork(self, memo: dict) -> 'Router':
+        new_router = super().fork(memo)
+        new_router.interfaces = dict(self.interfaces)
+        return new_router
+
     def get_default_route(self):
         return self.default_route
     
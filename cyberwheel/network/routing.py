@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import ipaddress as ipa
+
+from typing import Any, Iterable
+
+
+class RoutingIndex:
+    """
+    Longest-prefix-match index over a set of Routes.
+
+    Routes are stored in one dict per (IP version, prefix length), keyed by the
+    integer network address. A lookup masks the destination for each prefix length in
+    use, from longest to shortest, so it costs at most one dict lookup per distinct
+    prefix length instead of a scan over every route.
+
+    An index can be shared between forked objects by marking it `frozen`; the owner
+    then copies it before adding a route (see `NetworkObject.add_route()`).
+
+    :param Iterable[Route] routes: initial routes
+    """
+
+    def __init__(self, routes: Iterable[Any] = ()) -> None:
+        # version -> prefix length -> network address -> next hop
+        self._tables: dict[int, dict[int, dict[int, Any]]] = {4: {}, 6: {}}
+        # version -> prefix lengths in use, longest first
+        self._prefix_lengths: dict[int, list[int]] = {4: [], 6: []}
+        self.frozen = False
+        for route in routes:
+            self.add(route)
+
+    def __len__(self) -> int:
+        return sum(len(t) for tables in self._tables.values() for t in tables.values())
+
+    def copy(self) -> RoutingIndex:
+        """
+        Returns a mutable copy of the index.
+        """
+        new_index = RoutingIndex()
+        for version, tables in self._tables.items():
+            new_index._tables[version] = {p: dict(t) for p, t in tables.items()}
+            new_index._prefix_lengths[version] = list(self._prefix_lengths[version])
+        return new_index
+
+    def add(self, route: Any) -> None:
+        """
+        Adds a Route. A route to an already indexed network replaces its next hop.
+        """
+        if route is None:
+            return
+        dest = route.dest
+        tables = self._tables[dest.version]
+        prefixlen = dest.prefixlen
+        if prefixlen not in tables:
+            tables[prefixlen] = {}
+            lengths = self._prefix_lengths[dest.version]
+            lengths.append(prefixlen)
+            lengths.sort(reverse=True)
+        tables[prefixlen][int(dest.network_address)] = route.via
+
+    def lookup(self, ip: ipa.IPv4Address | ipa.IPv6Address) -> ipa.IPv4Address | ipa.IPv6Address | None:
+        """
+        Returns the next hop of the most specific route containing `ip`, or None.
+        """
+        version = ip.version
+        tables = self._tables[version]
+        max_prefixlen = 32 if version == 4 else 128
+        ip_int = int(ip)
+        for prefixlen in self._prefix_lengths[version]:
+            host_bits = max_prefixlen - prefixlen
+            via = tables[prefixlen].get(ip_int >> host_bits << host_bits)
+            if via is not None:
+                return via
+        return None
+
+    def lookup_many(
+        self, ips: Iterable[ipa.IPv4Address | ipa.IPv6Address]
+    ) -> list[ipa.IPv4Address | ipa.IPv6Address | None]:
+        """
+        Returns the result of `lookup()` for each IP, in order.
+        """
+        return [self.lookup(ip) for ip in ips]
@@ -1,8 +1,8 @@
 import ipaddress as ipa
-import random
 
 from copy import deepcopy
 
+from cyberwheel.network.ip_allocator import IPAllocator
 from cyberwheel.network.network_object import NetworkObject, Route
 from cyberwheel.network.router import Router
 
@@ -43,7 +43,7 @@ class Subnet(NetworkObject):
             print("ip_range does not represent a valid IPv4 or IPv6 address")
             raise e
         self.ip_range = ip_range
-        self.available_ips = [ip for ip in self.ip_network.hosts()]
+        self.available_ips = IPAllocator(self.ip_network)
         self.connected_hosts = []
         self.router = router
 
@@ -77,6 +77,17 @@ class Subnet(NetworkObject):
         new_subnet.connected_hosts = [deepcopy(host, memo) for host in self.connected_hosts]
         return new_subnet
     
+    def fork(self, memo: dict) -> 'Subnet':
+        """
+        Forks the subnet onto the already forked router. `connected_hosts` is
+        remapped by `Network.fork()` once the hosts are forked.
+        """
+        new_subnet = super().fork(memo)
+        new_subnet.router = memo[id(self.router)]
+        new_subnet.available_ips = self.available_ips.copy()
+        new_subnet.connected_hosts = list(self.connected_hosts)
+        return new_subnet
+
     def set_default_route(self):
         default_route_via = self.router.get_interface_ip(self.name)
         ip_version = default_route_via.version #type:ignore
@@ -108,10 +119,10 @@ class Subnet(NetworkObject):
         return self.ip_network.num_addresses - 2
 
     def get_unassigned_ips(self) -> list:
-        return self.available_ips
+        return list(self.available_ips)
 
     def get_num_unassigned_ips(self) -> int:
-        return len(self.available_ips)
+        return self.available_ips.num_free
 
     def assign_dhcp_lease(self, host_obj) -> None:
         '''
@@ -120,8 +131,7 @@ class Subnet(NetworkObject):
         :param Host host_obj: host requesting lease
         '''
         # get random IP from self.available_ips
-        ip_lease = random.choice(self.available_ips)
-        self.available_ips.remove(ip_lease)
+        ip_lease = self.available_ips.lease()
 
         # update connected hosts
         self.connected_hosts.append(host_obj)
@@ -0,0 +1,843 @@
+from __future__ import annotations
+
+import ipaddress as ipa
+import networkx as nx
+import numpy as np
+import pickle
+
+from collections.abc import KeysView, MutableMapping
+from copy import copy
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+from cyberwheel.network.firewall import CompiledFirewall
+from cyberwheel.network.host import Host
+from cyberwheel.network.ip_allocator import SharedIntMap
+from cyberwheel.network.network_object import NetworkObject, Route
+from cyberwheel.network.router import Router
+from cyberwheel.network.routing import RoutingIndex
+from cyberwheel.network.subnet import Subnet
+from cyberwheel.utils.hybrid_set_list import HybridSetList
+
+# node kinds
+ROUTER, SUBNET, HOST = 0, 1, 2
+
+# host attributes read from ids into NetworkTopology.objects
+OBJECT_COLUMNS = (
+    "host_type",
+    "os",
+    "services",
+    "firewall_rules",
+    "dns_server",
+    "default_route",
+    "vulnerabilities",
+    "processes",
+)
+# object columns that hold lists, which every host gets its own copy of
+LIST_COLUMNS = ("services", "firewall_rules", "vulnerabilities", "processes")
+
+# host attributes loaded from the topology on first use, besides the routes
+HOST_ATTRIBUTES = frozenset({
+    "subnet",
+    "host_type",
+    "os",
+    "services",
+    "_firewall_rules",
+    "_compiled_firewall",
+    "dns_server",
+    "default_route",
+    "vulnerabilities",
+    "processes",
+    "mac_address",
+    "ip_address",
+    "interfaces",
+})
+ROUTE_ATTRIBUTES = frozenset({"_routes", "_route_index"})
+# host attributes that aren't stored in the topology columns
+INSTANCE_ATTRIBUTES = frozenset({"_state", "_sid", "name", "_network"})
+
+
+def _pack_ip(ip: ipa.IPv4Address | ipa.IPv6Address | None) -> tuple[bytes, int]:
+    if ip is None:
+        return b"", 0
+    return ip.packed, ip.version
+
+
+class _Interner:
+    """
+    Numbers the values stored in NetworkTopology.objects, storing each one once.
+
+    Values are matched by identity, or by their pickled contents when `by_value` is
+    set, so that i.e. the equal firewall rule lists of different hosts share one list.
+    """
+
+    def __init__(self) -> None:
+        self.objects: list[Any] = []
+        self._by_id: dict[int, int] = {}
+        self._by_value: dict[bytes, int] = {}
+
+    def add(self, value: Any, by_value: bool = False) -> int:
+        if (i := self._by_id.get(id(value))) is not None:
+            return i
+        if by_value:
+            key = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            if (i := self._by_value.get(key)) is not None:
+                return i
+            self._by_value[key] = len(self.objects)
+        i = self._by_id[id(value)] = len(self.objects)
+        self.objects.append(value)
+        return i
+
+
+def _csr(rows: list[list[int]], dtype=np.int32) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the row pointers and the concatenated values of `rows`.
+    """
+    ptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    ptr[1:] = np.cumsum([len(row) for row in rows])
+    values = np.fromiter((v for row in rows for v in row), dtype=dtype, count=int(ptr[-1]))
+    return ptr, values
+
+
+class NetworkTopology:
+    """
+    The parts of a Network that don't change during an episode, stored as flat NumPy
+    arrays that several processes can read from one copy (see NetworkSnapshot).
+
+    Nodes are numbered in graph order. The arrays are:
+    *   names, sorted_names, name_order - node names, and a sorted copy to look them up
+    *   kind - ROUTER, SUBNET or HOST
+    *   succ_ptr/succ and pred_ptr/pred - the edges, in CSR form
+    *   host_order - host nodes in the order of `Network.hosts`
+    *   sid, subnet, mac, ip/ip_version - host state row, subnet node, MAC and IP address
+    *   the OBJECT_COLUMNS and techniques - ids into `objects`
+    *   route_ptr/route_dest/route_via/route_via_version - host routes
+    *   interface_ptr/interface - interfaced hosts of each host
+    *   member_ptr/member - connected hosts of each subnet
+    *   value_ptr/value_keys/value_values, position_ptr/... - IP allocator leases of each subnet
+    *   user_hosts, server_hosts - nodes in the network's user and server host lists
+    *   objects_pickle - the distinct host types, services, firewall rules, routes, DNS
+        servers and technique maps, with the HostTypeRegistry. Unpickled once per process
+        (see `objects`).
+    *   state_pickle - the routers, subnets and per-network state (host state table,
+        decoys, RNG seeds). Unpickled by every network that attaches (see `load_state()`).
+
+    Networks attached with `Network.from_topology()` keep their own copy of the state
+    and of the hosts they look up; everything else is read from the arrays.
+
+    :param dict arrays: arrays by name, as built by `from_network()`
+    """
+
+    def __init__(self, arrays: dict[str, np.ndarray]) -> None:
+        self.arrays = arrays
+        for name, array in arrays.items():
+            setattr(self, name, array)
+        self.num_nodes = len(self.kind)
+        self._objects: list[Any] | None = None
+        self._host_types = None
+        self._firewalls: dict[int, CompiledFirewall] = {}
+
+    @classmethod
+    def from_network(cls, network, service_mapping: dict | None = None) -> NetworkTopology:
+        """
+        Builds the topology of a Network. Take it between episodes: the episode journal
+        (decoys to remove, links to restore) isn't kept.
+
+        :param Network network: network to store
+        :param dict service_mapping: valid techniques of each host (see `get_service_map()`)
+        """
+        nodes = [data for _, data in network.graph.nodes(data="data")]
+        n = len(nodes)
+        index = {node.name: i for i, node in enumerate(nodes)}
+        interner = _Interner()
+
+        kind = np.full(n, -1, dtype=np.int8)
+        sid = np.full(n, -1, dtype=np.int32)
+        subnet = np.full(n, -1, dtype=np.int32)
+        columns = {column: np.full(n, -1, dtype=np.int32) for column in OBJECT_COLUMNS + ("techniques",)}
+        ips = np.zeros((n, 16), dtype=np.uint8)
+        ip_version = np.zeros(n, dtype=np.int8)
+        macs: list[bytes] = [b""] * n
+        routes: list[list[int]] = [[] for _ in range(n)]
+        route_dest: list[int] = []
+        route_via: list[bytes] = []
+        route_via_version: list[int] = []
+        interfaces: list[list[int]] = [[] for _ in range(n)]
+        members: list[list[int]] = [[] for _ in range(n)]
+        values: list[list[tuple[int, int]]] = [[] for _ in range(n)]
+        positions: list[list[tuple[int, int]]] = [[] for _ in range(n)]
+        # per-host attributes that don't fit the columns, and attributes a host doesn't have
+        extras: dict[int, dict[str, Any]] = {}
+        absent: dict[int, tuple[str, ...]] = {}
+        routers, subnets = [], []
+        # routers are stored first so the stored subnets can point to them
+        stored_routers = {}
+        for node in nodes:
+            if isinstance(node, Router):
+                stored = stored_routers[id(node)] = copy(node)
+                stored._network = None
+
+        for i, node in enumerate(nodes):
+            if isinstance(node, Host):
+                kind[i] = HOST
+                host_dict = node.__dict__
+                sid[i] = node._sid
+                subnet[i] = index[node.subnet.name]
+                missing = tuple(
+                    a for a in HOST_ATTRIBUTES | ROUTE_ATTRIBUTES if a not in host_dict and a != "_compiled_firewall"
+                )
+                if missing:
+                    absent[i] = missing
+                for column in OBJECT_COLUMNS:
+                    attribute = "_firewall_rules" if column == "firewall_rules" else column
+                    if attribute in host_dict:
+                        value = host_dict[attribute]
+                        if column in LIST_COLUMNS:
+                            columns[column][i] = interner.add(tuple(value), by_value=True)
+                        else:
+                            columns[column][i] = interner.add(value)
+                if service_mapping is not None and node.name in service_mapping:
+                    columns["techniques"][i] = interner.add(service_mapping[node.name])
+                if "ip_address" in host_dict:
+                    packed, version = _pack_ip(node.ip_address)
+                    ips[i, : len(packed)] = np.frombuffer(packed, dtype=np.uint8)
+                    ip_version[i] = version
+                macs[i] = host_dict.get("mac_address", "").encode()
+                for route in host_dict.get("_routes", ()):
+                    routes[i].append(len(route_dest))
+                    route_dest.append(interner.add(route.dest))
+                    packed, version = _pack_ip(route.via)
+                    route_via.append(packed.ljust(16, b"\0"))
+                    route_via_version.append(version)
+                host_interfaces = host_dict.get("interfaces", [])
+                if all(isinstance(h, Host) and index.get(h.name) is not None and nodes[index[h.name]] is h for h in host_interfaces):
+                    interfaces[i] = [index[h.name] for h in host_interfaces]
+                else:
+                    extras.setdefault(i, {})["interfaces"] = host_interfaces
+                other = {
+                    a: v for a, v in host_dict.items()
+                    if a not in HOST_ATTRIBUTES | ROUTE_ATTRIBUTES | INSTANCE_ATTRIBUTES
+                }
+                if other:
+                    extras.setdefault(i, {}).update(other)
+            elif isinstance(node, Subnet):
+                kind[i] = SUBNET
+                members[i] = [index[h.name] for h in node.connected_hosts]
+                stored = copy(node)
+                del stored.__dict__["connected_hosts"]
+                stored._network = None
+                stored.router = stored_routers[id(node.router)]
+                allocator = stored.available_ips = copy(node.available_ips)
+                if allocator.num_hosts <= np.iinfo(np.int64).max:
+                    values[i] = sorted(node.available_ips._value_at.items())
+                    positions[i] = sorted(node.available_ips._position_of.items())
+                    allocator._value_at = {}
+                    allocator._position_of = {}
+                subnets.append((i, stored))
+            elif isinstance(node, Router):
+                kind[i] = ROUTER
+                routers.append((i, stored_routers[id(node)]))
+            else:
+                raise TypeError(f"{node.name} is not a Host, Subnet or Router")
+
+        succ = [[index[v] for v in network.graph.successors(node.name)] for node in nodes]
+        pred = [[index[u] for u in network.graph.predecessors(node.name)] for node in nodes]
+
+        names = np.array([node.name.encode() for node in nodes], dtype=bytes)
+        name_order = np.argsort(names, kind="stable").astype(np.int32)
+        arrays = {
+            "names": names,
+            "sorted_names": names[name_order],
+            "name_order": name_order,
+            "kind": kind,
+            "host_order": np.array([index[name] for name in network.hosts], dtype=np.int32),
+            "sid": sid,
+            "subnet": subnet,
+            "mac": np.array(macs, dtype=bytes),
+            "ip": ips,
+            "ip_version": ip_version,
+            "route_dest": np.array(route_dest, dtype=np.int32),
+            "route_via": np.frombuffer(b"".join(route_via), dtype=np.uint8).reshape(-1, 16),
+            "route_via_version": np.array(route_via_version, dtype=np.int8),
+            "user_hosts": np.array([index[name] for name in network.user_hosts], dtype=np.int32),
+            "server_hosts": np.array([index[name] for name in network.server_hosts], dtype=np.int32),
+        }
+        arrays.update(columns)
+        for key, rows in (("succ", succ), ("pred", pred), ("interface", interfaces), ("member", members)):
+            arrays[f"{key}_ptr"], arrays[key] = _csr(rows)
+        arrays["route_ptr"], _ = _csr(routes)
+        for key, rows in (("value", values), ("position", positions)):
+            arrays[f"{key}_ptr"], arrays[f"{key}_keys"] = _csr([[k for k, _ in row] for row in rows], np.int64)
+            _, arrays[f"{key}_values"] = _csr([[v for _, v in row] for row in rows], np.int64)
+
+        objects = pickle.dumps((interner.objects, network.host_types), protocol=pickle.HIGHEST_PROTOCOL)
+        state = {
+            "name": network.name,
+            "routers": routers,
+            "subnets": subnets,
+            "host_state": network.host_state,
+            "decoys": [index[name] for name in network.decoys],
+            "user_hosts": (network.user_hosts.seed, network.user_hosts.rng),
+            "server_hosts": (network.server_hosts.seed, network.server_hosts.rng),
+            "extras": extras,
+            "absent": absent,
+        }
+        # the state table only pickles its own rows, the hosts aren't pickled with it
+        state = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        arrays["objects_pickle"] = np.frombuffer(objects, dtype=np.uint8)
+        arrays["state_pickle"] = np.frombuffer(state, dtype=np.uint8)
+        return cls(arrays)
+
+    @property
+    def objects(self) -> list[Any]:
+        """
+        The distinct host attribute values the object columns refer to. Shared by every
+        network attached to this topology in this process, and must not be modified.
+        """
+        if self._objects is None:
+            self._objects, self._host_types = pickle.loads(self.arrays["objects_pickle"])
+        return self._objects
+
+    @property
+    def host_types(self):
+        """
+        The HostTypeRegistry of the network, shared like the host types of forked networks.
+        """
+        self.objects
+        return self._host_types
+
+    def load_state(self) -> dict[str, Any]:
+        """
+        Returns a new copy of the routers, subnets and per-network state.
+        """
+        return pickle.loads(self.arrays["state_pickle"])
+
+    def name(self, i: int) -> str:
+        return self.names[i].decode()
+
+    def index(self, name: str) -> int:
+        """
+        Returns the node number of `name`, or -1 if the topology has no such node.
+        """
+        key = name.encode()
+        sorted_names = self.sorted_names
+        if len(key) > sorted_names.itemsize or not sorted_names.size:
+            return -1
+        i = int(np.searchsorted(sorted_names, key))
+        if i < sorted_names.size and sorted_names[i] == key:
+            return int(self.name_order[i])
+        return -1
+
+    def host_index(self, name: str) -> int:
+        """
+        Returns the node number of host `name`, or -1 if it isn't a host of the topology.
+        """
+        i = self.index(name)
+        return i if i >= 0 and self.kind[i] == HOST else -1
+
+    def ip_address(self, i: int) -> ipa.IPv4Address | ipa.IPv6Address | None:
+        version = self.ip_version[i]
+        if version == 0:
+            return None
+        return ipa.ip_address(self.ip[i, : 4 if version == 4 else 16].tobytes())
+
+    def compiled_firewall(self, rules_id: int) -> CompiledFirewall:
+        """
+        Returns the compiled firewall of a firewall rules id, shared by every host with those rules.
+        """
+        if (firewall := self._firewalls.get(rules_id)) is None:
+            firewall = self._firewalls[rules_id] = CompiledFirewall(self.objects[rules_id])
+        return firewall
+
+    def routes(self, i: int) -> list[Route]:
+        routes = []
+        for r in range(self.route_ptr[i], self.route_ptr[i + 1]):
+            version = self.route_via_version[r]
+            via = ipa.ip_address(self.route_via[r, : 4 if version == 4 else 16].tobytes())
+            routes.append(Route(dest=self.objects[self.route_dest[r]], via=via))
+        return routes
+
+    def neighbors(self, key: str, i: int) -> np.ndarray:
+        """
+        Returns the nodes in row `i` of CSR array `key`, i.e. neighbors("succ", i).
+        """
+        ptr = self.arrays[f"{key}_ptr"]
+        return self.arrays[key][ptr[i] : ptr[i + 1]]
+
+    def shared_int_map(self, key: str, i: int) -> SharedIntMap:
+        ptr = self.arrays[f"{key}_ptr"]
+        start, end = ptr[i], ptr[i + 1]
+        return SharedIntMap(self.arrays[f"{key}_keys"][start:end], self.arrays[f"{key}_values"][start:end])
+
+    def layout(self) -> tuple[list[tuple[str, str, tuple[int, ...], int]], int]:
+        """
+        Returns where `write()` puts each array in a buffer, and the buffer size.
+        """
+        layout, offset = [], 0
+        for name, array in self.arrays.items():
+            layout.append((name, array.dtype.str, array.shape, offset))
+            # keep every array 64-byte aligned
+            offset += -(-array.nbytes // 64) * 64
+        return layout, offset
+
+    def write(self, buffer) -> None:
+        """
+        Copies the arrays into `buffer` (at least `layout()[1]` bytes) as laid out by `layout()`.
+        """
+        for name, _, _, offset in self.layout()[0]:
+            array = np.ascontiguousarray(self.arrays[name])
+            buffer[offset : offset + array.nbytes] = array.tobytes()
+
+    @classmethod
+    def from_buffer(cls, buffer, layout: list[tuple[str, str, tuple[int, ...], int]]) -> NetworkTopology:
+        """
+        Returns a topology that reads its arrays from `buffer`, without copying them.
+        """
+        arrays = {}
+        for name, dtype, shape, offset in layout:
+            array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=buffer, offset=offset)
+            array.flags.writeable = False
+            arrays[name] = array
+        return cls(arrays)
+
+
+class TopologyHosts(MutableMapping):
+    """
+    The hosts of a Network attached to a NetworkTopology, by name, in the same order
+    as the hosts of the Network the topology was built from.
+
+    Hosts are created the first time they're looked up, holding only their name and
+    state table row. Their other attributes are read from the topology when they're
+    first used (see `NetworkObject.__getattr__()` and `load_attribute()`), so a network
+    only builds the hosts its agents touch. Hosts added to the network are stored as is.
+
+    :param Network network: attached network
+    :param NetworkTopology topology: its topology
+    :param dict nodes: the network's routers and subnets by node number
+    :param dict state: the network's copy of the topology state
+    """
+
+    def __init__(self, network, topology: NetworkTopology, nodes: dict[int, NetworkObject], state: dict) -> None:
+        self.network = network
+        self.topology = topology
+        self.nodes = nodes
+        self._extras = state["extras"]
+        self._absent = state["absent"]
+        # hosts that were looked up or added, by name
+        self._hosts: dict[str, Host] = {}
+        # topology hosts removed from the network, and the Host objects they had
+        self._removed: dict[int, Host] = {}
+        # names of the hosts added to the network, in order
+        self._added: dict[str, None] = {}
+
+    def __reduce__(self):
+        return dict, (dict(self.items()),)
+
+    def node(self, i: int) -> NetworkObject:
+        """
+        Returns the object of topology node `i`, creating it if it's a host.
+        """
+        if self.topology.kind[i] != HOST:
+            return self.nodes[i]
+        if i in self._removed:
+            return self._removed[i]
+        name = self.topology.name(i)
+        host = self._hosts.get(name)
+        if host is None:
+            host = self._hosts[name] = self._create_host(i)
+        return host
+
+    def _create_host(self, i: int) -> Host:
+        host = Host.__new__(Host)
+        host.__dict__.update(
+            _state=self.network.host_state,
+            _sid=int(self.topology.sid[i]),
+            name=self.topology.name(i),
+            _network=self.network,
+            _source=self,
+            _tid=i,
+        )
+        return host
+
+    def load_attribute(self, obj: NetworkObject, attribute: str) -> bool:
+        """
+        Loads the group of attributes that `attribute` belongs to into a host or subnet
+        created from the topology. Returns False if the object doesn't have the attribute.
+        """
+        obj_dict = obj.__dict__
+        i = obj_dict["_tid"]
+        topology = self.topology
+        if isinstance(obj, Host):
+            if attribute in ROUTE_ATTRIBUTES:
+                routes = topology.routes(i)
+                values = {"_routes": set(routes), "_route_index": RoutingIndex(routes) if routes else None}
+            elif attribute in HOST_ATTRIBUTES:
+                values = self._host_attributes(i)
+            else:
+                return False
+            absent = self._absent.get(i, ())
+            for name, value in values.items():
+                if name not in absent:
+                    obj_dict.setdefault(name, value)
+        elif isinstance(obj, Subnet) and attribute == "connected_hosts":
+            obj_dict.setdefault("connected_hosts", [self.node(j) for j in topology.neighbors("member", i).tolist()])
+        else:
+            return False
+        return attribute in obj_dict
+
+    def _host_attributes(self, i: int) -> dict[str, Any]:
+        topology = self.topology
+        objects = topology.objects
+        values = {
+            column: objects[topology.arrays[column][i]]
+            for column in OBJECT_COLUMNS
+            if column not in LIST_COLUMNS and topology.arrays[column][i] >= 0
+        }
+        for column in LIST_COLUMNS:
+            if (object_id := topology.arrays[column][i]) >= 0:
+                values[column] = list(objects[object_id])
+        if "firewall_rules" in values:
+            values["_firewall_rules"] = values.pop("firewall_rules")
+            values["_compiled_firewall"] = topology.compiled_firewall(topology.firewall_rules[i])
+        values["subnet"] = self.node(int(topology.subnet[i]))
+        values["mac_address"] = topology.mac[i].decode()
+        values["ip_address"] = topology.ip_address(i)
+        values["interfaces"] = [self.node(j) for j in topology.neighbors("interface", i).tolist()]
+        values.update(self._extras.get(i, ()))
+        return values
+
+    def detach(self, obj: NetworkObject) -> None:
+        """
+        Loads every attribute of a host or subnet created from the topology, so it no
+        longer reads from it.
+        """
+        obj_dict = obj.__dict__
+        if "_source" not in obj_dict:
+            return
+        if isinstance(obj, Host):
+            self.load_attribute(obj, "subnet")
+            self.load_attribute(obj, "_routes")
+        else:
+            self.load_attribute(obj, "connected_hosts")
+        del obj_dict["_source"], obj_dict["_tid"]
+
+    def __getitem__(self, name: str) -> Host:
+        host = self._hosts.get(name)
+        if host is not None:
+            return host
+        i = self.topology.host_index(name)
+        if i < 0 or i in self._removed:
+            raise KeyError(name)
+        return self.node(i)
+
+    def get(self, name: str, default=None):
+        host = self._hosts.get(name)
+        if host is not None:
+            return host
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def __setitem__(self, name: str, host: Host) -> None:
+        i = self.topology.host_index(name)
+        if name not in self._hosts and (i < 0 or i in self._removed):
+            self._added[name] = None
+        self._hosts[name] = host
+
+    def __delitem__(self, name: str) -> None:
+        if name in self._added:
+            del self._added[name]
+            del self._hosts[name]
+            return
+        host = self[name]
+        # other hosts' interfaces and subnet members keep referring to the removed Host
+        self._removed[self.topology.host_index(name)] = host
+        del self._hosts[name]
+
+    def __contains__(self, name: object) -> bool:
+        if name in self._hosts:
+            return True
+        if not isinstance(name, str):
+            return False
+        i = self.topology.host_index(name)
+        return i >= 0 and i not in self._removed
+
+    def __iter__(self) -> Iterator[str]:
+        removed = self._removed
+        for i in self.topology.host_order.tolist():
+            if i not in removed:
+                yield self.topology.name(i)
+        yield from list(self._added)
+
+    def __len__(self) -> int:
+        return len(self.topology.host_order) - len(self._removed) + len(self._added)
+
+    def keys(self) -> _HostNames:
+        return _HostNames(self)
+
+    def copy(self) -> dict[str, Host]:
+        return dict(self.items())
+
+
+class _HostNames(KeysView):
+    # set operations build their result like dict.keys() does (a presized set filled from
+    # the dict), so it iterates in the same order
+    def __sub__(self, other: Iterable) -> set:
+        result = set(dict.fromkeys(self))
+        result.difference_update(other)
+        return result
+
+
+class TopologyGraph:
+    """
+    The graph of a Network attached to a NetworkTopology.
+
+    It supports the part of the networkx.DiGraph API that Network and ConnectivityIndex
+    use to change and walk the graph. Edges and nodes come from the topology; the
+    changes made since (decoys, isolated hosts) are kept here. `to_networkx()` builds
+    the full graph.
+
+    :param NetworkTopology topology: topology to read from
+    :param Callable node: returns the object of a topology node
+    """
+
+    def __init__(self, topology: NetworkTopology, node: Callable[[int], NetworkObject], name: str) -> None:
+        self.topology = topology
+        self._node = node
+        self.name = name
+        self._removed: set[int] = set()
+        self._added: dict[str, NetworkObject] = {}
+        self._removed_edges: set[tuple[str, str]] = set()
+        self._succ: dict[str, dict[str, None]] = {}
+        self._pred: dict[str, dict[str, None]] = {}
+        self.nodes = _TopologyNodes(self)
+
+    def _index(self, node: str) -> int:
+        """
+        Returns the topology number of `node` if it's a topology node still in the graph, else -1.
+        """
+        if node in self._added:
+            return -1
+        i = self.topology.index(node)
+        return -1 if i in self._removed else i
+
+    def __contains__(self, node: object) -> bool:
+        return node in self._added or (isinstance(node, str) and self._index(node) >= 0)
+
+    def __len__(self) -> int:
+        return self.topology.num_nodes - len(self._removed) + len(self._added)
+
+    def __iter__(self) -> Iterator[str]:
+        removed = self._removed
+        for i in range(self.topology.num_nodes):
+            if i not in removed:
+                yield self.topology.name(i)
+        yield from list(self._added)
+
+    def is_directed(self) -> bool:
+        return True
+
+    def data(self, node: str) -> NetworkObject:
+        if (obj := self._added.get(node)) is not None:
+            return obj
+        i = self._index(node)
+        if i < 0:
+            raise KeyError(node)
+        return self._node(i)
+
+    def add_node(self, node: str, data: NetworkObject | None = None) -> None:
+        if node in self:
+            if data is not None and node in self._added:
+                self._added[node] = data
+            return
+        self._added[node] = data
+
+    def remove_node(self, node: str) -> None:
+        if node in self._added:
+            del self._added[node]
+        else:
+            i = self._index(node)
+            if i < 0:
+                raise nx.NetworkXError(f"The node {node} is not in the digraph.")
+            self._removed.add(i)
+        for neighbor in self._succ.pop(node, ()):
+            self._pred[neighbor].pop(node, None)
+        for neighbor in self._pred.pop(node, ()):
+            self._succ[neighbor].pop(node, None)
+        self._removed_edges = {edge for edge in self._removed_edges if node not in edge}
+
+    def _has_topology_edge(self, u: str, v: str) -> bool:
+        i, j = self._index(u), self._index(v)
+        return i >= 0 and j >= 0 and j in self.topology.neighbors("succ", i)
+
+    def has_edge(self, u: str, v: str) -> bool:
+        if v in self._succ.get(u, ()):
+            return True
+        return (u, v) not in self._removed_edges and self._has_topology_edge(u, v)
+
+    def add_edge(self, u: str, v: str) -> None:
+        for node in (u, v):
+            if node not in self:
+                self._added[node] = None
+        if (u, v) in self._removed_edges:
+            self._removed_edges.discard((u, v))
+        elif not self.has_edge(u, v):
+            self._succ.setdefault(u, {})[v] = None
+            self._pred.setdefault(v, {})[u] = None
+
+    def remove_edge(self, u: str, v: str) -> None:
+        if v in self._succ.get(u, ()):
+            del self._succ[u][v]
+            del self._pred[v][u]
+        elif (u, v) not in self._removed_edges and self._has_topology_edge(u, v):
+            self._removed_edges.add((u, v))
+        else:
+            raise nx.NetworkXError(f"The edge {u}-{v} not in graph.")
+
+    def _neighbors(self, key: str, node: str, added: dict[str, dict[str, None]]) -> list[str]:
+        if node not in self:
+            raise nx.NetworkXError(f"The node {node} is not in the digraph.")
+        result = []
+        i = self._index(node)
+        if i >= 0:
+            removed = self._removed
+            for j in self.topology.neighbors(key, i).tolist():
+                if j in removed:
+                    continue
+                neighbor = self.topology.name(j)
+                edge = (node, neighbor) if key == "succ" else (neighbor, node)
+                if edge not in self._removed_edges:
+                    result.append(neighbor)
+        result.extend(added.get(node, ()))
+        return result
+
+    def successors(self, node: str) -> Iterator[str]:
+        return iter(self._neighbors("succ", node, self._succ))
+
+    def predecessors(self, node: str) -> Iterator[str]:
+        return iter(self._neighbors("pred", node, self._pred))
+
+    def to_networkx(self) -> nx.DiGraph:
+        """
+        Returns the graph as a networkx.DiGraph, creating every node.
+        """
+        graph = nx.DiGraph(name=self.name)
+        names = list(self)
+        for name in names:
+            graph.add_node(name, data=self.data(name))
+        for name in names:
+            for neighbor in self.successors(name):
+                graph.add_edge(name, neighbor)
+        return graph
+
+
+class _TopologyNodes:
+    # the parts of networkx's NodeView that Network uses
+    def __init__(self, graph: TopologyGraph) -> None:
+        self._graph = graph
+
+    def __getitem__(self, node: str) -> dict[str, NetworkObject]:
+        return {"data": self._graph.data(node)}
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._graph)
+
+    def __len__(self) -> int:
+        return len(self._graph)
+
+    def __contains__(self, node: object) -> bool:
+        return node in self._graph
+
+    def __call__(self, data: str | bool = False) -> Iterator:
+        for node in self._graph:
+            if data is False:
+                yield node
+            elif data is True:
+                yield node, self[node]
+            else:
+                yield node, self._graph.data(node) if data == "data" else None
+
+    def items(self) -> Iterator[tuple[str, dict[str, NetworkObject]]]:
+        return self(data=True)
+
+
+class _NodeNames(Sequence):
+    # names of a topology node array, decoded when they're read
+    def __init__(self, topology: NetworkTopology, nodes: np.ndarray) -> None:
+        self.topology = topology
+        self.nodes = nodes
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.topology.name(j) for j in self.nodes[i]]
+        return self.topology.name(self.nodes[i])
+
+
+class TopologyHostList(HybridSetList):
+    """
+    A HybridSetList of the host names in a NetworkTopology array (i.e. the user hosts).
+
+    It reads from the array until it's first changed, then copies it into its own
+    list and index like any HybridSetList. Random choices are the same as those of
+    the list it was built from. Pickling it produces a HybridSetList.
+
+    :param NetworkTopology topology: topology to read from
+    :param np.ndarray nodes: host nodes in list order
+    :param int seed: seed of the list it was built from
+    :param random.Random rng: random stream of the list it was built from
+    """
+
+    def __init__(self, topology: NetworkTopology, nodes: np.ndarray, seed: int | None, rng) -> None:
+        super().__init__(seed=seed)
+        self.rng = rng
+        self.topology = topology
+        self.data_list = _NodeNames(topology, nodes)
+        self.index = None
+        # position of each node in the list, or -1
+        self._positions = np.full(topology.num_nodes, -1, dtype=np.int32)
+        self._positions[nodes] = np.arange(len(nodes), dtype=np.int32)
+
+    def __reduce__(self):
+        self._copy_list()
+        state = {k: v for k, v in self.__dict__.items() if k not in ("topology", "_positions")}
+        return HybridSetList.__new__, (HybridSetList,), state
+
+    def _copy_list(self) -> None:
+        if self.index is None:
+            self.data_list = list(self.data_list)
+            self.index = {name: i for i, name in enumerate(self.data_list)}
+
+    @property
+    def data_set(self):
+        self._copy_list()
+        return self.index.keys()
+
+    def __contains__(self, item: Any) -> bool:
+        if self.index is not None:
+            return item in self.index
+        if not isinstance(item, str):
+            return False
+        i = self.topology.index(item)
+        return i >= 0 and self._positions[i] >= 0
+
+    def detach(self) -> None:
+        """
+        Copies the list so it no longer reads from the topology.
+        """
+        self._copy_list()
+        del self.topology, self._positions
+
+    def copy(self) -> HybridSetList:
+        self._copy_list()
+        return super().copy()
+
+    def add(self, value: Any):
+        self._copy_list()
+        super().add(value)
+
+    def remove(self, value: Any):
+        self._copy_list()
+        super().remove(value)
@@ -9,19 +9,22 @@ from cyberwheel.observation.observation import Observation
 from cyberwheel.detectors.handler import DetectorHandler
 
 class BlueObservation(Observation):
+    # Every entry is a 0/1 alert flag apart from the decoy count at the end,
+    # which is bounded by `decoy_limit`
+    dtype = np.int8
+
     def __init__(self, shape: int, mapping: Dict[Host, int], detector_config: str) -> None:
         self.offset = 2
         self.shape = shape + self.offset
         self.mapping = mapping
-        self.obs_vec = np.zeros(self.shape)
+        self.obs_vec = np.zeros(self.shape, dtype=self.dtype)
         self.len_obs = shape
         self.detector = DetectorHandler(files("cyberwheel.data.configs.detector").joinpath(detector_config))
 
     def create_obs_vector(self, alerts: Iterable[Alert], num_decoys: int) -> Iterable:
         # Refresh the non-history portion of the obs_vec
         barrier = self.len_obs // 2
-        for i in range(barrier):
-            self.obs_vec[i] = 0
+        self.obs_vec[:barrier] = 0
         for alert in alerts:
             alerted_host = alert.src_host
             if not alerted_host or alerted_host.name not in self.mapping:
@@ -34,6 +37,6 @@ class BlueObservation(Observation):
         return self.obs_vec
 
     def reset(self) -> Iterable:
-        self.obs_vec = np.zeros(self.shape, dtype=np.int64)
+        self.obs_vec[:] = 0
         self.detector.reset()
-        return self.obs_vec
\ No newline at end of file
+        return self.obs_vec
@@ -26,16 +26,14 @@ class BlueObservationProactive(BlueObservation):
         # Refresh the non-history portion of the obs_vec
 
         if headstart:
-            for i in range(self.len_obs):
-                self.obs_vec[i] = 0
+            self.obs_vec[:self.len_obs] = 0
             self.obs_vec[-self.offset] = 1
             self.obs_vec[-self.offset + 1] = num_decoys
             return self.obs_vec
 
         barrier = self.len_obs // 2
 
-        for i in range(barrier):
-            self.obs_vec[i] = 0
+        self.obs_vec[:barrier] = 0
         for alert in alerts:
             alerted_host = alert.src_host
             if not alerted_host or alerted_host.name not in self.mapping:
@@ -31,22 +31,10 @@ class ARTPortScan(ARTKillChainPhase):
         host_os = host.os
         art_technique = art_techniques.technique_mapping["T1046"]
         mitre_id = art_technique.mitre_id
-        processes = []
-        valid_tests = [
-            at
-            for at in art_technique.get_atomic_tests()
-            if host_os in at.supported_platforms
-        ]
-        chosen_test = random.choice(valid_tests)
-        # Get prereq command, prereq command (if dependency). then run executor command(s) and cleanup command.
-        for dep in chosen_test.dependencies:
-            processes.extend(dep.get_prerequisite_command)
-            processes.extend(dep.prerequisite_command)
-        if chosen_test.executor != None:
-            processes.extend(chosen_test.executor.command)
-            processes.extend(chosen_test.executor.cleanup_command)
-        for p in processes:
-            host.run_command(chosen_test.executor, p, "user")
+        # Tests valid on this OS, with their commands already interned
+        chosen_test = random.choice(art_technique.get_atomic_test_plan(host_os))
+        processes = chosen_test.processes
+        host.run_commands(chosen_test.command_ids["user"])
         self.action_results.add_successful_action()
         self.action_results.add_metadata(
             host.name,
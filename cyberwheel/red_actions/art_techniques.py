@@ -0,0 +1,28 @@
+"""
+Atomic Red Team technique catalogue, loaded lazily from its indexed on-disk form
+(see `technique_catalogue`). Importing this module reads nothing; each Technique
+class is built the first time it is accessed, either by MITRE id through
+`technique_mapping[mitre_id]` or by class name through `getattr(art_techniques, name)`.
+
+The generated module the catalogue is built from goes in `art_techniques_source.py`
+next to this file, not here.
+"""
+from cyberwheel.red_actions.technique_catalogue import TechniqueCatalogue, TechniqueMapping
+
+catalogue = TechniqueCatalogue()
+technique_mapping = TechniqueMapping(catalogue)
+
+
+def __getattr__(name: str):
+    if name.startswith("__"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    technique = catalogue.get(name)
+    if technique is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # later lookups find the class without going through __getattr__
+    globals()[name] = technique
+    return technique
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(catalogue.class_names()))
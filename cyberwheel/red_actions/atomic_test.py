@@ -1,5 +1,7 @@
 from typing import List
 
+from cyberwheel.network.command import COMMANDS
+
 class Dependency:
     """
     The Dependency class defines a dependency in an Atomic Test. This is a given prerequisite
@@ -196,6 +198,20 @@ class AtomicTest:
         else:
             self.dependencies = []
 
+        # Commands in the order they run: prerequisites of each dependency, then the
+        # executor's command and cleanup. Interned for both privileges they run with.
+        self.processes: list[str] = []
+        for dep in self.dependencies:
+            self.processes.extend(dep.get_prerequisite_command)
+            self.processes.extend(dep.prerequisite_command)
+        if self.executor != None:
+            self.processes.extend(self.executor.command)
+            self.processes.extend(self.executor.cleanup_command)
+        self.command_ids: dict[str, tuple[int, ...]] = {
+            privilege: tuple(COMMANDS.intern(self.executor, p, privilege) for p in self.processes)
+            for privilege in ("user", "root")
+        }
+
     def __str__(self):
         return f"""
         -------------------------------------------------------------
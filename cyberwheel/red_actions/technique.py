@@ -3,6 +3,7 @@ import json
 
 from typing import List
 
+from cyberwheel.network.cve_bits import CVE_BITS
 from cyberwheel.red_actions.atomic_test import AtomicTest
 
 
@@ -15,6 +16,17 @@ class Technique:
     def get_vulnerabilities(cls):
         return cls.cve_list
 
+    @classmethod
+    def get_cve_mask(cls) -> int:
+        """
+        Returns the technique's CVEs as a `CVE_BITS` mask, computed on first use.
+        """
+        mask = cls.__dict__.get("_cve_mask")
+        if mask is None:
+            mask = CVE_BITS.mask(cls.cve_list)
+            cls._cve_mask = mask
+        return mask
+
     @classmethod
     def get_weaknesses(cls):
         return cls.cwe_list
@@ -27,6 +39,23 @@ class Technique:
     def get_atomic_tests(cls) -> list[AtomicTest]:
         return list(cls.atomic_tests.values())
 
+    @classmethod
+    def get_atomic_test_plan(cls, os: str) -> tuple[AtomicTest, ...]:
+        """
+        Returns the atomic tests supported on `os`, in catalogue order. Computed on first
+        use per OS; each test carries its interned `command_ids`, so running one only
+        draws a test and appends ids.
+        """
+        plans = cls.__dict__.get("_test_plans")
+        if plans is None:
+            plans = cls._test_plans = {}
+        plan = plans.get(os)
+        if plan is None:
+            plan = plans[os] = tuple(
+                at for at in cls.atomic_tests.values() if os in at.supported_platforms
+            )
+        return plan
+
     @classmethod
     def get_name(cls) -> str:
         return cls.name
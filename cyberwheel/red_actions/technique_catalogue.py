@@ -0,0 +1,336 @@
+"""
+Indexed on-disk form of the Atomic Red Team technique catalogue.
+
+The catalogue directory holds two files:
+
+*   techniques.jsonl - one JSON record per Technique class: its class attributes and
+    the dicts its AtomicTests are built from
+*   index.json - byte offset and length of every record by class name, and the class
+    name of every MITRE id
+
+`art_techniques` reads the index when it is first used and builds each Technique
+class from its record the first time it is accessed, so processes only pay for the
+techniques they actually use.
+
+The catalogue is built from the generated `art_techniques` source module, which goes
+in `cyberwheel/red_actions/art_techniques_source.py`. If the catalogue is missing, or
+was built from that file before it last changed, it is rebuilt the first time it is
+used. It can also be built explicitly, optionally from another source file:
+
+    python -m cyberwheel art-catalogue [path/to/art_techniques.py]
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import importlib.util
+import inspect
+import json
+import os
+import tempfile
+
+from collections.abc import Mapping
+from importlib.resources import files
+from typing import Iterator, Optional
+
+from cyberwheel.red_actions.atomic_test import AtomicTest
+from cyberwheel.red_actions.technique import Technique
+
+CATALOGUE_VERSION = 1
+RECORDS_FILE = "techniques.jsonl"
+INDEX_FILE = "index.json"
+SOURCE_FILE = "art_techniques_source.py"
+
+
+def default_catalogue_dir() -> str:
+    """
+    Returns the catalogue directory: `CYBERWHEEL_ART_CATALOGUE` if set, otherwise
+    `cyberwheel/data/art_techniques`.
+    """
+    directory = os.environ.get("CYBERWHEEL_ART_CATALOGUE")
+    if directory:
+        return directory
+    return str(files("cyberwheel.data").joinpath("art_techniques"))
+
+
+def default_source_path() -> str:
+    """
+    Returns where the generated `art_techniques` source module goes:
+    `cyberwheel/red_actions/art_techniques_source.py`.
+    """
+    return str(files("cyberwheel.red_actions").joinpath(SOURCE_FILE))
+
+
+def source_stamp(path: str) -> dict:
+    """
+    Returns the path, size and modification time of a source module, which the index
+    records to tell whether the catalogue is older than its source.
+    """
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def atomic_test_to_dict(atomic_test: AtomicTest) -> dict:
+    """
+    Returns the dict that `AtomicTest(...)` builds an equivalent test from.
+    """
+    test = {
+        "name": atomic_test.name,
+        "auto_generated_guid": atomic_test.auto_generated_guid,
+        "description": atomic_test.description,
+        "supported_platforms": list(atomic_test.supported_platforms),
+        "dependency_executor_name": atomic_test.dependency_executor_name,
+    }
+    if atomic_test.executor is not None:
+        test["executor"] = {
+            "name": atomic_test.executor.name,
+            "command": "\n".join(atomic_test.executor.command),
+            "cleanup_command": "\n".join(atomic_test.executor.cleanup_command),
+            "elevation_required": atomic_test.executor.elevation_required,
+        }
+    if atomic_test.input_arguments:
+        test["input_arguments"] = {
+            arg.name: {"description": arg.description, "type": arg.type, "default": arg.default}
+            for arg in atomic_test.input_arguments
+        }
+    if atomic_test.dependencies:
+        test["dependencies"] = [
+            {
+                "description": dep.description,
+                "prereq_command": "\n".join(dep.prerequisite_command),
+                "get_prereq_command": "\n".join(dep.get_prerequisite_command),
+            }
+            for dep in atomic_test.dependencies
+        ]
+    return test
+
+
+def technique_to_record(name: str, technique: type[Technique]) -> dict:
+    """
+    Returns the catalogue record of a Technique class. Set-valued attributes (i.e.
+    `cve_list`) are stored as sorted lists and listed under "sets".
+    """
+    # attributes inherited from intermediate base classes are flattened into the record
+    merged = {}
+    for cls in reversed(technique.__mro__):
+        if issubclass(cls, Technique) and cls is not Technique:
+            merged.update(vars(cls))
+    attributes = {}
+    sets = []
+    for attr, value in merged.items():
+        if attr.startswith("_") or attr == "atomic_tests" or callable(value) or isinstance(value, (classmethod, staticmethod)):
+            continue
+        if isinstance(value, (set, frozenset)):
+            value = sorted(value)
+            sets.append(attr)
+        attributes[attr] = value
+    return {
+        "class_name": name,
+        "attributes": attributes,
+        "sets": sets,
+        "atomic_tests": [[guid, atomic_test_to_dict(test)] for guid, test in technique.atomic_tests.items()],
+    }
+
+
+def record_to_technique(record: dict) -> type[Technique]:
+    """
+    Builds the Technique class of a catalogue record.
+    """
+    attributes = dict(record["attributes"])
+    for attr in record["sets"]:
+        attributes[attr] = set(attributes[attr])
+    attributes["atomic_tests"] = {guid: AtomicTest(test) for guid, test in record["atomic_tests"]}
+    return type(record["class_name"], (Technique,), attributes)
+
+
+def write_catalogue(
+    techniques: dict[str, type[Technique]],
+    technique_mapping: dict[str, type[Technique]],
+    directory: str,
+    source: Optional[dict] = None,
+) -> None:
+    """
+    Writes the catalogue of `techniques` (class name -> Technique class) to `directory`.
+    Each file is written to a temporary file and moved into place, records first, so
+    processes building the same catalogue at once don't read partial files.
+
+    :param dict technique_mapping: MITRE id -> Technique class. Every class must be in `techniques`.
+    :param dict source: `source_stamp()` of the module the catalogue is built from
+    """
+    class_names = {technique: name for name, technique in techniques.items()}
+    os.makedirs(directory, exist_ok=True)
+    offsets = {}
+    with _atomic_write(os.path.join(directory, RECORDS_FILE)) as f:
+        for name, technique in techniques.items():
+            line = json.dumps(technique_to_record(name, technique), separators=(",", ":")).encode() + b"\n"
+            offsets[name] = [f.tell(), len(line)]
+            f.write(line)
+    index = {
+        "version": CATALOGUE_VERSION,
+        "source": source,
+        "classes": offsets,
+        "mitre_ids": {mid: class_names[technique] for mid, technique in technique_mapping.items()},
+    }
+    with _atomic_write(os.path.join(directory, INDEX_FILE)) as f:
+        f.write(json.dumps(index).encode())
+
+
+@contextlib.contextmanager
+def _atomic_write(path: str):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def build_catalogue(source: str, directory: str) -> int:
+    """
+    Builds the catalogue in `directory` from the generated `art_techniques` source
+    module at `source`. Returns the number of techniques.
+    """
+    stamp = source_stamp(source)
+    module = load_source_module(source)
+    techniques = {
+        name: member
+        for name, member in inspect.getmembers(module, inspect.isclass)
+        if issubclass(member, Technique) and member is not Technique
+    }
+    write_catalogue(techniques, module.technique_mapping, directory, stamp)
+    return len(techniques)
+
+
+class TechniqueCatalogue:
+    """
+    Loads Technique classes from a catalogue directory on demand. The index is read
+    on first use, and each class is built once and then shared.
+
+    If the generated source module exists and the catalogue is missing or was built
+    from an older version of it, the catalogue is rebuilt from it first.
+
+    :param str directory: catalogue directory. Default: `default_catalogue_dir()`
+    :param str source: generated source module. Default: `default_source_path()`
+    """
+
+    def __init__(self, directory: Optional[str] = None, source: Optional[str] = None) -> None:
+        self.directory = directory
+        self.source = source
+        self._index: Optional[dict] = None
+        self._techniques: dict[str, type[Technique]] = {}
+
+    @property
+    def index(self) -> dict:
+        if self._index is None:
+            if self.directory is None:
+                self.directory = default_catalogue_dir()
+            if self.source is None:
+                self.source = default_source_path()
+            index = self._read_index()
+            if self._is_stale(index):
+                print(f"Building the ART technique catalogue in '{self.directory}' from '{self.source}'...")
+                build_catalogue(self.source, self.directory)
+                index = self._read_index()
+            if index is None:
+                raise FileNotFoundError(
+                    f"ART technique catalogue not found in '{self.directory}'. Put the generated "
+                    f"art_techniques module at '{self.source}', or build the catalogue with "
+                    "`python -m cyberwheel art-catalogue <art_techniques source>`."
+                )
+            if index["version"] != CATALOGUE_VERSION:
+                raise ValueError(f"ART technique catalogue version {index['version']} is not {CATALOGUE_VERSION}, rebuild it")
+            self._index = index
+        return self._index
+
+    def _read_index(self) -> Optional[dict]:
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _is_stale(self, index: Optional[dict]) -> bool:
+        """
+        Returns True if the catalogue should be rebuilt from the source module: it exists
+        and the catalogue is missing, or was built from that file before it last changed.
+        A catalogue built from another file is left alone.
+        """
+        if not os.path.exists(self.source):
+            return False
+        if index is None:
+            return True
+        built_from = index.get("source")
+        stamp = source_stamp(self.source)
+        return built_from is not None and built_from["path"] == stamp["path"] and built_from != stamp
+
+    def class_names(self) -> list[str]:
+        return list(self.index["classes"])
+
+    def mitre_ids(self) -> list[str]:
+        return list(self.index["mitre_ids"])
+
+    def get(self, name: str) -> Optional[type[Technique]]:
+        """
+        Returns the Technique class named `name`, or None if there isn't one.
+        """
+        technique = self._techniques.get(name)
+        if technique is not None:
+            return technique
+        entry = self.index["classes"].get(name)
+        if entry is None:
+            return None
+        offset, length = entry
+        with open(os.path.join(self.directory, RECORDS_FILE), "rb") as f:
+            f.seek(offset)
+            record = json.loads(f.read(length))
+        technique = self._techniques[name] = record_to_technique(record)
+        return technique
+
+    def get_by_mitre_id(self, mitre_id: str) -> type[Technique]:
+        return self.get(self.index["mitre_ids"][mitre_id])
+
+
+class TechniqueMapping(Mapping):
+    """
+    Read-only MITRE id -> Technique class mapping that loads each technique from the
+    catalogue on first access.
+    """
+
+    def __init__(self, catalogue: TechniqueCatalogue) -> None:
+        self.catalogue = catalogue
+
+    def __getitem__(self, mitre_id: str) -> type[Technique]:
+        return self.catalogue.get_by_mitre_id(mitre_id)
+
+    def __contains__(self, mitre_id) -> bool:
+        return mitre_id in self.catalogue.index["mitre_ids"]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.catalogue.index["mitre_ids"])
+
+    def __len__(self) -> int:
+        return len(self.catalogue.index["mitre_ids"])
+
+
+def load_source_module(path: str):
+    """
+    Imports the generated `art_techniques` source module from a file.
+    """
+    spec = importlib.util.spec_from_file_location("art_techniques_source", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m cyberwheel art-catalogue", description="Build the indexed ART technique catalogue from the generated art_techniques module")
+    parser.add_argument("source", type=str, nargs="?", help="path to the generated art_techniques.py. Default: cyberwheel/red_actions/art_techniques_source.py")
+    parser.add_argument("--output", type=str, help="catalogue directory. Default: cyberwheel/data/art_techniques")
+    args = parser.parse_args(argv)
+
+    source = args.source if args.source else default_source_path()
+    output = args.output if args.output else default_catalogue_dir()
+    count = build_catalogue(source, output)
+    print(f"Wrote {count} techniques to {output}")
@@ -1,13 +1,13 @@
 import importlib
 import yaml
 
+from collections import ChainMap
 from typing import Type, Any, Dict, Tuple
 from importlib.resources import files
 
 from cyberwheel.reward import RewardMap
 from cyberwheel.red_agents import strategies
 from cyberwheel.network.network_base import Network, Host
-from cyberwheel.red_actions import art_techniques
 from cyberwheel.red_actions.actions import (
     ARTDiscovery,
     ARTImpact,
@@ -27,6 +27,7 @@ from cyberwheel.red_agents.red_agent_base import (
     RedAgentResult,
 )
 from cyberwheel.utils import HybridSetList
+from cyberwheel.utils.get_service_map import get_valid_techniques
 
 
 class ARTAgent(RedAgent):
@@ -86,6 +87,14 @@ class ARTAgent(RedAgent):
             - A mapping that is initialized with a network, dictating with a bool, whether a given Technique will be valid on a given Host.
             - This is generated and passed before initialization to avoid checking for CVEs for every environment if running parallel.
             - Default: {} (if empty, will generate during __init__())
+
+        * `agent_history_limit`: optional
+            - Number of recent steps kept in the agent's history. Ignored if `full_history` is set.
+            - Default: 256
+
+        * `full_history`: optional
+            - Keep every step of the episode in the agent's history.
+            - Default: False
         """
         self.name: str = name
         self.network = network
@@ -95,28 +104,29 @@ class ARTAgent(RedAgent):
 
         self.from_yaml()
 
-        self.history: AgentHistory = AgentHistory(initial_host=self.current_host)
+        full_history = args.full_history if hasattr(args, 'full_history') else False
+        self.history_limit = None if full_history else (args.agent_history_limit if hasattr(args, 'agent_history_limit') else 256)
+        self.history: AgentHistory = AgentHistory(initial_host=self.current_host, limit=self.history_limit)
         self.unimpacted_servers = HybridSetList()
         self.unimpacted_hosts = HybridSetList()
         self.unknowns = HybridSetList()
         self.campaign = args.campaign if hasattr(args, 'campaign') else False
         service_mapping = args.service_mapping if hasattr(args, 'service_mapping') else {}
+        # hosts added to and removed from the network, applied by handle_network_change()
+        self.host_events = self.network.subscribe_host_events()
+        # hosts tracked since the last reset, forgotten by the next one
+        self.added_hosts: list[str] = []
 
-        if service_mapping == {} and not self.campaign and map_services:
+        if not service_mapping and not self.campaign and map_services:
             self.services_map = {}
             self.tracked_hosts = HybridSetList()
             for _, host in self.network.hosts.items():
                 self.tracked_hosts.add(host.name)
-                self.services_map[host.name] = {}
-                for kcp in self.all_kcps:
-                    self.services_map[host.name][kcp] = []
-                    kcp_valid_techniques = kcp.validity_mapping[host.os][kcp.get_name()]
-                    for mid in kcp_valid_techniques:
-                        technique = art_techniques.technique_mapping[mid]
-                        if len(host.host_type.cve_list & technique.cve_list) > 0:
-                            self.services_map[host.name][kcp].append(mid)
+                self.services_map[host.name] = get_valid_techniques(host, self.all_kcps)
         else:
-            self.services_map = service_mapping
+            # copied, since the mapping may be shared with other environments' agents.
+            # A SharedServiceMap stays shared, with this agent's changes layered on top.
+            self.services_map = dict(service_mapping) if isinstance(service_mapping, dict) else ChainMap({}, service_mapping)
             self.tracked_hosts = HybridSetList(service_mapping.keys())
     
     def from_yaml(self) -> None:
@@ -150,36 +160,31 @@ class ARTAgent(RedAgent):
         """
         Returns service mapping for a given host and killchain phases.
         """
-        valid_techniques = {}
-        for kcp in all_kcps:
-            valid_techniques[kcp] = []
-            kcp_valid_techniques = kcp.validity_mapping[host.os][kcp.get_name()]
-            for mid in kcp_valid_techniques:
-                technique = art_techniques.technique_mapping[mid]
-                if len(host.host_type.cve_list & technique.cve_list) > 0:
-                    valid_techniques[kcp].append(mid)
-        return valid_techniques
+        return get_valid_techniques(host, all_kcps)
 
     def handle_network_change(self):
         """
-        Does a 'check' at every step to initialize any newly added decoys to view or remove any removed decoys
+        Initializes any decoys added to the network since the last step and forgets any removed ones.
+        Does nothing if the network hasn't changed.
         """
-        current_hosts = self.network.hosts.keys()
-
-        new_hosts = current_hosts - self.tracked_hosts.data_set
-
-        removed_hosts = (self.unknowns.data_set | self.unimpacted_hosts.data_set | self.unimpacted_servers.data_set) - self.network.hosts.keys()
-        
-        for _ in range(len(removed_hosts)):
-            removed_host = removed_hosts.pop()
+        if not self.host_events:
+            return
+        added, removed = self.host_events.drain()
+        hosts = self.network.hosts
+
+        for removed_host in removed:
+            if removed_host in hosts:  # added back since it was removed
+                continue
             self.unknowns.remove(removed_host)
             self.unimpacted_hosts.remove(removed_host)
             self.unimpacted_servers.remove(removed_host)
 
         new_host = None
         network_change = False
-        for host_name in new_hosts:
-            h: Host = self.network.hosts[host_name]
+        for host_name in added:
+            if host_name not in hosts or host_name in self.tracked_hosts:
+                continue
+            h: Host = hosts[host_name]
             if not self.campaign:
                 self.services_map[host_name] = self.get_valid_techniques_by_host(
                     h, self.all_kcps
@@ -193,12 +198,22 @@ class ARTAgent(RedAgent):
                 network_change = True
                 new_host = h
             self.tracked_hosts.add(host_name)
+            self.added_hosts.append(host_name)
         if (
             network_change and new_host != None
         ):  # Add the new host to self.history if the subnet is scanned. Else do nothing.
             self.history.hosts[new_host.name] = KnownHostInfo()
             self.unknowns.add(new_host.name)
-        
+
+    def forget_added_hosts(self) -> None:
+        """
+        Stops tracking the hosts added to the network since the last reset, so each
+        episode starts from the same view of the network.
+        """
+        for host_name in self.added_hosts:
+            self.tracked_hosts.remove(host_name)
+            self.services_map.pop(host_name, None)
+        self.added_hosts = []
 
     def select_next_target(self) -> Host:
         """
@@ -276,11 +291,20 @@ class ARTAgent(RedAgent):
             *   Run an action on the target
             *   Handle any additional metadata and update history
         """
+        timer = self.timer
+        if timer.enabled:
+            start = timer.now()
         self.handle_network_change()
+        if timer.enabled:
+            start = timer.lap("red_act/handle_network_change", start)
 
         target_host = self.select_next_target()
+        if timer.enabled:
+            start = timer.lap("red_act/select_next_target", start)
         source_host = self.current_host
         action_results, action = self.run_action(target_host)
+        if timer.enabled:
+            timer.lap("red_act/run_action", start)
         success = action_results.attack_success
         no_update = [ARTLateralMovement, ARTPingSweep, ARTPortScan, Nothing]
         if success:
@@ -368,8 +392,11 @@ class ARTAgent(RedAgent):
         Resets the red agent back to blank slate.
         """
         self.current_host : Host = self.network.hosts[self.entry_host] if self.entry_host.lower() != "random" else self.network.get_random_user_host()
-        self.history: AgentHistory = AgentHistory(initial_host=self.current_host)
+        self.history: AgentHistory = AgentHistory(initial_host=self.current_host, limit=self.history_limit)
         self.unimpacted_servers.reset()
         self.unimpacted_hosts.reset()
         self.unknowns.reset()
+        # the hosts the network removed while resetting were forgotten along with the lists above
+        self.host_events.clear()
+        self.forget_added_hosts()
         self.leader_host: Host = self.network.hosts[self.leader] if self.leader.lower() != "random" else self.network.get_random_server_host()
@@ -91,16 +91,9 @@ class ARTCampaign(ARTAgent):
 
         action_results.add_successful_action()
 
-        processes = []
-        for dep in atomic_test.dependencies:
-            processes.extend(dep.get_prerequisite_command)
-            processes.extend(dep.prerequisite_command)
-        if atomic_test.executor != None:
-            processes.extend(atomic_test.executor.command)
-            processes.extend(atomic_test.executor.cleanup_command)
-
-        for p in processes:
-            target_host.run_command(atomic_test.executor, p, "root")
+        # Prereq commands, then the executor command(s) and cleanup command, interned when the technique was loaded
+        processes = atomic_test.processes
+        target_host.run_commands(atomic_test.command_ids["root"])
         action_results.add_metadata(
             target_host.name,
             {
@@ -120,11 +113,20 @@ class ARTCampaign(ARTAgent):
             *   Run an action on the target
             *   Handle any additional metadata and update history
         """
+        timer = self.timer
+        if timer.enabled:
+            start = timer.now()
         self.handle_network_change()
+        if timer.enabled:
+            start = timer.lap("red_act/handle_network_change", start)
 
         target_host = self.select_next_target()
+        if timer.enabled:
+            start = timer.lap("red_act/select_next_target", start)
         source_host = self.current_host
         action_results, action = self.run_action(target_host)
+        if timer.enabled:
+            timer.lap("red_act/run_action", start)
         action_obj = action()
         success = action_results.attack_success
         if success:
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
+from collections import deque
 from ipaddress import IPv4Address, IPv6Address
-from typing import Type, List, Any, Iterable
+from typing import Type, List, Any, Iterable, Optional
 
 from cyberwheel.red_actions.red_base import ARTAction
 from cyberwheel.network.network_base import Host
@@ -9,12 +10,16 @@ from cyberwheel.red_actions.red_base import RedActionResults
 from cyberwheel.red_actions.actions import ARTKillChainPhase, Nothing
 from cyberwheel.red_actions.technique import Technique
 from cyberwheel.reward import RewardMap
+from cyberwheel.utils.step_timer import DISABLED_TIMER
 
 
 class RedAgent(ABC):
     """
     Base class for Red Agent. Defines structure for any additional red agents to be added.
     """
+    # Replaced by the environment's StepTimer
+    timer = DISABLED_TIMER
+
     def __init__(self):
         pass
 
@@ -142,19 +147,20 @@ class AgentHistory:
     """
     Defines history of red agent throughout the game.
     *   initial_host (required) - sets the initial entry host for the red agent to have a foothold on the network.
-    *   history - List of metadata detailing red agent actions. Grows with each step.
-    *   red_action_history - List of action results for every given step.
+    *   history - Metadata detailing red agent actions, one entry per step.
+    *   red_action_history - Action results for every given step.
+    *   limit (optional) - number of recent steps `history` and `red_action_history` keep. Default: None (all of them)
     *   mapping - preserves a mapping from host/subnet name to Host/Subnet object to allow information gathering
     *   hosts - dict of hostnames mapped to KnownHostInfo.
     *   subnets - dict of subnets mapped to KnownSubnetInfo.
     *   step - the last step of the simulation
     """
 
-    def __init__(self, initial_host: Host = None):
-        self.history: List[dict[str, Any]] = (
-            []
-        )  # List of StepInfo objects detailing step information by step
-        self.red_action_history: List[RedActionResults] = []
+    def __init__(self, initial_host: Host = None, limit: Optional[int] = None):
+        self.history: deque[dict[str, Any]] = deque(
+            maxlen=limit
+        )  # StepInfo objects detailing step information by step
+        self.red_action_history: deque[RedActionResults] = deque(maxlen=limit)
         self.hosts = (
             {}
         )  # Hosts discovered, and whether or not they've been scanned successfully yet
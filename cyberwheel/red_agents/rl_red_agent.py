@@ -31,7 +31,6 @@ class RLRedAgent(ARTAgent):
 
     def __init__(self, network: Network, args) -> None:
         super().__init__(network, args, service_mapping=args.service_mapping)
-        self.tracked_hosts = self.network.hosts.keys()
         self.observation = RedObservation(len(self.network.hosts) * 7 * 2)
         self.observation.add_host(self.current_host.name, on_host=True)
     
@@ -126,16 +125,20 @@ class RLRedAgent(ARTAgent):
             self.observation.update_host(target_host, impacted=True)
 
     def handle_network_change(self):
-        current_hosts = self.network.hosts.keys()
-        new_hosts = current_hosts - self.tracked_hosts
-        for h in new_hosts:
+        if not self.host_events:
+            return
+        added, _ = self.host_events.drain()
+        for h in added:
+            if h not in self.network.hosts or h in self.tracked_hosts:
+                continue
             host = self.network.hosts[h]
             self.services_map[h] = self.get_valid_techniques_by_host(
                 host, self.all_kcps
             )
             self.observation.add_host(h, sweeped=True)
             self.action_space.add_host(h)
-        self.tracked_hosts = current_hosts
+            self.tracked_hosts.add(h)
+            self.added_hosts.append(h)
 
     def validate_action(self, action: ARTKillChainPhase, target_host: str) -> bool:
         host_view = self.observation.obs[target_host]
@@ -197,5 +200,7 @@ class RLRedAgent(ARTAgent):
     def reset(self) -> Iterable:
         self.current_host : Host = self.network.hosts[self.entry_host] if self.entry_host.lower() != "random" else self.network.get_random_user_host()
 
+        self.host_events.clear()
+        self.forget_added_hosts()
         self.action_space.reset(self.current_host.name)
         return self.observation.reset(self.current_host.name)
@@ -46,13 +46,13 @@ class RLRewardProactive(RLReward):
         elif self.valid_targets == "users":
             valid_targets = self.network.user_hosts
         elif self.valid_targets == "all":
-            valid_targets = valid_targets = HybridSetList(self.network.hosts.keys())
+            valid_targets = self.network.hosts
         elif type(self.valid_targets) is list:
             valid_targets = HybridSetList(self.valid_targets)
         elif type(self.valid_targets) is str:
             valid_targets = HybridSetList(self.valid_targets)
         else:
-            valid_targets = HybridSetList(self.network.hosts.keys())
+            valid_targets = self.network.hosts
 
         target_host_name = target_host.name
         decoy = target_host.decoy
@@ -26,18 +26,7 @@ class RLReward(Reward):
         blue_recurring: int = 0,
     ) -> int | float:
         
-        if self.valid_targets == "servers":
-            valid_targets = self.network.server_hosts
-        elif self.valid_targets == "users":
-            valid_targets = self.network.user_hosts
-        elif self.valid_targets == "all":
-            valid_targets = valid_targets = HybridSetList(self.network.hosts.keys())
-        elif type(self.valid_targets) is list:
-            valid_targets = HybridSetList(self.valid_targets)
-        elif type(self.valid_targets) is str:
-            valid_targets = HybridSetList(self.valid_targets)
-        else:
-            valid_targets = HybridSetList(self.network.hosts.keys())
+        valid_targets = self.get_valid_targets()
 
         target_host_name = target_host.name
         decoy = target_host.decoy
@@ -72,6 +61,23 @@ class RLReward(Reward):
 
         return r + b + self.sum_recurring()
     
+    def get_valid_targets(self):
+        """
+        Returns the names of the hosts that red actions are rewarded for targeting.
+        """
+        if self.valid_targets == "servers":
+            return self.network.server_hosts
+        elif self.valid_targets == "users":
+            return self.network.user_hosts
+        elif self.valid_targets == "all":
+            return self.network.hosts
+        elif type(self.valid_targets) is list:
+            return HybridSetList(self.valid_targets)
+        elif type(self.valid_targets) is str:
+            return HybridSetList(self.valid_targets)
+        else:
+            return self.network.hosts
+
     def sum_recurring(self) -> int | float:
         sum = 0
         for ra in self.blue_recurring_actions:
@@ -2,6 +2,7 @@ from cyberwheel.utils.rl_agent import layer_init, RLAgent
 from cyberwheel.utils.yaml_config import YAMLConfig
 from cyberwheel.utils.get_service_map import get_service_map
 from cyberwheel.utils.hybrid_set_list import HybridSetList
+from cyberwheel.utils.step_timer import StepTimer
 from cyberwheel.utils.parse_override_args import parse_override_args, parse_eval_override_args, parse_default_override_args, parse
 from cyberwheel.utils.trainer import Trainer
 from cyberwheel.utils.evaluator import Evaluator
@@ -11,4 +12,5 @@ from cyberwheel.utils.train_cyberwheel import train_cyberwheel
 from cyberwheel.utils.run_cyberwheel import run_cyberwheel
 from cyberwheel.utils.run_visualization_server import run_visualization_server
 from cyberwheel.utils.set_seed import set_seed
-from cyberwheel.utils.async_call import async_call, make_env
\ No newline at end of file
+from cyberwheel.utils.async_call import async_call, make_env
+from cyberwheel.utils.network_snapshot import NetworkSnapshot
\ No newline at end of file
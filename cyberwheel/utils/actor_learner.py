@@ -0,0 +1,251 @@
+import importlib
+import os
+import queue
+import gymnasium as gym
+import torch
+import torch.multiprocessing as mp
+
+from cyberwheel.utils.async_call import make_env
+from cyberwheel.utils.rl_agent import RLAgent
+from cyberwheel.utils.set_seed import set_seed
+from cyberwheel.utils.network_snapshot import NetworkSnapshot
+
+
+class RolloutRing:
+    """
+    A fixed set of rollout slots in shared memory. Actors take a free slot, fill it
+    with `num_steps` transitions from each of their environments and hand it to the
+    learner, which copies it out and frees it again. Slot indices are passed through
+    the `free_slots` and `full_slots` queues, so the rollouts themselves are never pickled.
+
+    :param num_slots: number of rollouts that can be in flight at once
+    :param num_steps: steps per rollout
+    :param num_envs: environments per actor
+    """
+
+    def __init__(
+        self,
+        ctx,
+        num_slots: int,
+        num_steps: int,
+        num_envs: int,
+        obs_shape: tuple,
+        action_shape: tuple,
+        max_action_space_size: int,
+    ) -> None:
+        def shared(shape: tuple, dtype=torch.float32) -> torch.Tensor:
+            return torch.zeros((num_slots,) + shape, dtype=dtype).share_memory_()
+
+        self.obs = shared((num_steps, num_envs) + obs_shape)
+        self.actions = shared((num_steps, num_envs) + action_shape)
+        self.logprobs = shared((num_steps, num_envs))
+        self.rewards = shared((num_steps, num_envs))
+        self.dones = shared((num_steps, num_envs))
+        self.values = shared((num_steps, num_envs))
+        self.action_masks = shared((num_steps, num_envs, max_action_space_size), torch.bool)
+        self.next_obs = shared((num_envs,) + obs_shape)
+        self.next_done = shared((num_envs,))
+
+        self.free_slots = ctx.Queue()
+        self.full_slots = ctx.Queue()
+        for slot in range(num_slots):
+            self.free_slots.put(slot)
+
+
+class PolicyStore:
+    """
+    The latest policy weights in shared memory, with a version number that the
+    learner increments on every push.
+    """
+
+    def __init__(self, ctx, agent: RLAgent) -> None:
+        self.state = {k: v.detach().cpu().clone().share_memory_() for k, v in agent.state_dict().items()}
+        self.version = ctx.Value("q", 0)
+
+    def push(self, agent: RLAgent) -> int:
+        with self.version.get_lock():
+            for k, v in agent.state_dict().items():
+                self.state[k].copy_(v)
+            self.version.value += 1
+            return self.version.value
+
+    def pull(self, agent: RLAgent, version: int) -> int:
+        """
+        Loads the latest weights into `agent` if they are newer than `version`.
+        Returns the version `agent` now holds.
+        """
+        with self.version.get_lock():
+            latest = self.version.value
+            if latest != version:
+                agent.load_state_dict(self.state)
+        return latest
+
+
+def run_actor(rank, args, network_snapshot, ring, policy, stop, seed):
+    """
+    Actor process. Steps `args.num_envs // args.num_actors` environments with the
+    latest policy snapshot and writes rollouts into `ring` until `stop` is set. The
+    environments run in a SyncVectorEnv built like the one of `Trainer` with
+    `async_env` off, and like `Trainer.train()`, every rollout starts with a reset.
+    """
+    # actors share the CPU with each other and the learner
+    torch.set_num_threads(1)
+    set_seed(seed)
+    num_envs = args.num_envs // args.num_actors
+    env_class = getattr(importlib.import_module("cyberwheel.cyberwheel_envs"), args.environment)
+    # every environment attaches to the shared topology instead of forking a private network
+    networks = [network_snapshot.load() for _ in range(num_envs)]
+    env_funcs = [make_env(env_class, args, networks, i, False) for i in range(num_envs)]
+    envs = gym.vector.SyncVectorEnv(env_funcs, copy=False)
+    agent = RLAgent(envs)
+    version = -1
+    action_ids = torch.arange(env_funcs[0].max_action_space_size)
+
+    # the first rollout's reset seeds the environments
+    seeds = [seed + i for i in range(num_envs)]
+    while not stop.is_set():
+        try:
+            slot = ring.free_slots.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        version = policy.pull(agent, version)
+
+        obs, info = envs.reset(seed=seeds)
+        seeds = None
+        next_obs = torch.as_tensor(obs, dtype=torch.float32)
+        next_done = torch.zeros(num_envs)
+        for step in range(args.num_steps):
+            action_mask = action_ids < torch.as_tensor(info["action_space_size"])[:, None]
+            ring.obs[slot, step] = next_obs
+            ring.dones[slot, step] = next_done
+            ring.action_masks[slot, step] = action_mask
+            with torch.no_grad():
+                action, logprob, _, value = agent.get_action_and_value(next_obs, action_mask=action_mask)
+            ring.values[slot, step] = value.flatten()
+            ring.actions[slot, step] = action
+            ring.logprobs[slot, step] = logprob
+
+            obs, reward, done, _, info = envs.step(action.numpy())
+            ring.rewards[slot, step] = torch.as_tensor(reward)
+            next_obs = torch.as_tensor(obs, dtype=torch.float32)
+            next_done = torch.as_tensor(done, dtype=torch.float32)
+        ring.next_obs[slot] = next_obs
+        ring.next_done[slot] = next_done
+        ring.full_slots.put((slot, rank, version))
+    envs.close()
+
+
+class ActorPool:
+    """
+    Runs `args.num_actors` actor processes that keep generating rollouts while the
+    learner optimizes the policy.
+
+    The actors and the learner only run at the same time if each has a CPU core of its
+    own. With fewer cores they take turns, and splitting the environments across actors
+    adds a policy forward pass per actor and step, so training is slower than the
+    sequential loop.
+
+    Staleness is bounded in two ways:
+
+    *   Actors can only run ahead of the learner by the number of free slots in the ring.
+    *   Rollouts collected with a policy more than `max_policy_lag` pushes behind the
+        latest one are dropped by `receive()`.
+
+    :param YAMLConfig args: training config. `num_envs` must be a multiple of `num_actors`.
+    :param NetworkSnapshot network_snapshot: network each actor forks its environments from
+    :param RLAgent agent: learner's agent, used for the initial policy snapshot
+    :param tuple observation_shape: shape of a single observation
+    :param int max_action_space_size: size of the action masks
+    :param int seed: base seed. Actor `rank` uses `seed + rank * envs per actor`.
+    """
+
+    def __init__(
+        self,
+        args,
+        network_snapshot: NetworkSnapshot,
+        agent: RLAgent,
+        observation_shape: tuple,
+        max_action_space_size: int,
+        seed: int = 0,
+    ) -> None:
+        self.num_actors = args.num_actors
+        if args.num_envs % self.num_actors != 0:
+            raise ValueError(f"num_envs ({args.num_envs}) must be a multiple of num_actors ({self.num_actors})")
+        self.envs_per_actor = args.num_envs // self.num_actors
+        cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+        if cores < self.num_actors + 1:
+            print(
+                f"Warning: actor-learner mode runs {self.num_actors} actor(s) and the learner on {cores} CPU core(s). "
+                "They take turns on the cores, so training will be slower than with actor_learner off. "
+                "Use at most one actor fewer than the number of cores."
+            )
+        self.max_policy_lag = args.max_policy_lag if hasattr(args, "max_policy_lag") else 1
+        rollout_slots = args.rollout_slots if hasattr(args, "rollout_slots") else self.num_actors
+
+        if "forkserver" in mp.get_all_start_methods():
+            # Actors are forked from a server process that imports this module once,
+            # instead of each importing cyberwheel from scratch like a spawned process
+            ctx = mp.get_context("forkserver")
+            ctx.set_forkserver_preload([__name__])
+        else:
+            ctx = mp.get_context("spawn")
+        self.ring = RolloutRing(
+            ctx,
+            rollout_slots,
+            args.num_steps,
+            self.envs_per_actor,
+            observation_shape,
+            (),
+            max_action_space_size,
+        )
+        self.policy = PolicyStore(ctx, agent)
+        self.stop = ctx.Event()
+        self.dropped = 0
+        self.actors = [
+            ctx.Process(
+                target=run_actor,
+                args=(rank, args, network_snapshot, self.ring, self.policy, self.stop, seed + rank * self.envs_per_actor),
+                daemon=True,
+            )
+            for rank in range(self.num_actors)
+        ]
+        for actor in self.actors:
+            actor.start()
+
+    def push(self, agent: RLAgent) -> int:
+        """
+        Publishes the learner's weights to the actors. Returns the new policy version.
+        """
+        return self.policy.push(agent)
+
+    def receive(self, count: int) -> list[tuple[int, int, int]]:
+        """
+        Blocks until `count` rollouts within the staleness bound are ready and returns
+        them as (slot, actor rank, policy version). The slots must be handed back with
+        `release()` once they have been copied.
+        """
+        rollouts = []
+        while len(rollouts) < count:
+            try:
+                slot, rank, version = self.ring.full_slots.get(timeout=1)
+            except queue.Empty:
+                for actor in self.actors:
+                    if not actor.is_alive():
+                        raise RuntimeError(f"actor process exited with code {actor.exitcode}")
+                continue
+            if self.policy.version.value - version > self.max_policy_lag:
+                self.dropped += 1
+                self.release(slot)
+                continue
+            rollouts.append((slot, rank, version))
+        return rollouts
+
+    def release(self, slot: int) -> None:
+        self.ring.free_slots.put(slot)
+
+    def close(self) -> None:
+        self.stop.set()
+        for actor in self.actors:
+            actor.join(timeout=10)
+            if actor.is_alive():
+                actor.terminate()
@@ -1,18 +1,25 @@
 from importlib.resources import files
 import gymnasium as gym
 from cyberwheel.network.network_base import Network
+from cyberwheel.utils.network_snapshot import NetworkSnapshot
 
 def make_env(env_func, args, networks, rank, evaluation: bool = False):
     """
     This function was isolated from trainer.py due to issues pertaining to pickling the asynchronous environments.
 
     Specifically, the parameters passed in cannot be tied to an object.
+
+    `networks` is either a list with one Network per rank, or a NetworkSnapshot that
+    each environment loads an attached network from (used for asynchronous environments).
     """
 
     def _init():
         if evaluation:
             config_path = files("cyberwheel.data.configs.network").joinpath(args.network_config)
-            env = env_func(args, network=Network.create_network_from_yaml(config_path), evaluation=True)
+            cache = args.network_cache if hasattr(args, "network_cache") else True
+            env = env_func(args, network=Network.create_network_from_yaml(config_path, cache=cache), evaluation=True)
+        elif isinstance(networks, NetworkSnapshot):
+            env = env_func(args, network=networks.load(), evaluation=False)
         else:
             env = env_func(args, network=networks[rank], evaluation=False)
         _init.max_action_space_size = env.max_action_space_size
@@ -21,5 +28,9 @@ def make_env(env_func, args, networks, rank, evaluation: bool = False):
         return result 
     return _init
 
-def async_call(env_funcs):
-    return gym.vector.AsyncVectorEnv(env_funcs)
\ No newline at end of file
+def async_call(env_funcs, copy: bool = True):
+    """
+    Observations are passed back from the workers through shared memory. With
+    `copy=False`, `reset()` and `step()` return views of it that the next call overwrites.
+    """
+    return gym.vector.AsyncVectorEnv(env_funcs, shared_memory=True, copy=copy)
\ No newline at end of file
@@ -0,0 +1,187 @@
+import importlib
+import queue
+import time
+import gymnasium as gym
+import torch
+import torch.multiprocessing as mp
+
+from cyberwheel.utils.rl_agent import RLAgent
+from cyberwheel.utils.network_snapshot import NetworkSnapshot
+
+
+def play_eval_episodes(args, agent: RLAgent, env, episodes: int) -> dict:
+    """
+    Plays `episodes` episodes of `env`, a vector env holding one evaluation
+    environment, with `agent` on the CPU. Returns the metric totals, which
+    `summarize_eval()` turns into averages.
+    """
+    eval_device = torch.device("cpu")
+    action_ids = torch.arange(env.envs[0].unwrapped.max_action_space_size, device=eval_device)
+    eval_env = env.envs[0].unwrapped
+    impact = None
+
+    totals = {
+        "episodes": episodes,
+        "return": 0.0,
+        "impact_timestep": 0,
+        "first_step_of_decoy_contact": 0,
+        "impacted_decoys": 0,
+        "steps_delayed": 0,
+    }
+    for episode in range(episodes):
+        obs, info = env.reset()
+        for step in range(args.num_steps):
+            obs = torch.Tensor(obs).to(eval_device)
+
+            # Valid actions are a prefix of the action space
+            action_masks = action_ids < torch.as_tensor(info["action_space_size"])[:, None]
+
+            with torch.no_grad():
+                action, _, _, _ = agent.get_action_and_value(obs, action_mask=action_masks)
+            obs, rew, done, _, info = env.step(action)
+            totals["return"] += float(rew[0])
+
+            # Metrics for SULI
+            record = info["step"][0]
+            if impact is None:
+                impact = eval_env.step_values.lookup("impact")
+            if record["red_action_dst_is_decoy"]:
+                totals["steps_delayed"] += 1
+            if record["red_action"] == impact:
+                totals["impact_timestep"] += step
+            if (not totals["first_step_of_decoy_contact"]) and (record["pingsweeped_decoy"]):
+                totals["first_step_of_decoy_contact"] += step
+
+            if done:
+                break
+
+        totals["impacted_decoys"] += int(record["impacted_decoys"])  # metric for SULI
+    return totals
+
+
+def summarize_eval(totals: list[dict]) -> tuple[float, dict]:
+    """
+    Combines the totals of one or more `play_eval_episodes()` calls, in episode
+    order, into the mean episodic return and the averaged SULI metrics.
+    """
+    episodes = sum(t["episodes"] for t in totals)
+    # Only the first episode with decoy contact counts, as when playing them in one go
+    first_contact = next((t["first_step_of_decoy_contact"] for t in totals if t["first_step_of_decoy_contact"]), 0)
+    info = {
+        "impact_timestep_avg": sum(t["impact_timestep"] for t in totals) / episodes,
+        "first_step_of_decoy_contact_avg": first_contact / episodes,
+        "impacted_decoys_avg": sum(t["impacted_decoys"] for t in totals) / episodes,
+        "delay_avg": sum(t["steps_delayed"] for t in totals) / episodes,
+    }
+    return sum(t["return"] for t in totals) / episodes, info
+
+
+def run_eval_worker(args, network_snapshot, tasks, results):
+    """
+    Evaluation process. Builds one evaluation environment from `network_snapshot`
+    and plays the episodes of each (global step, chunk, weights, episodes) task
+    from `tasks` until it receives None.
+    """
+    # evaluation shares the CPU with the learner
+    torch.set_num_threads(1)
+    env_class = getattr(importlib.import_module("cyberwheel.cyberwheel_envs"), args.environment)
+
+    def _init():
+        env = env_class(args, network=network_snapshot.load(), evaluation=True)
+        return gym.wrappers.RecordEpisodeStatistics(env)
+
+    env = gym.vector.SyncVectorEnv([_init])
+    agent = RLAgent(env)
+    agent.eval()
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        global_step, chunk, state_dict, episodes = task
+        start = time.time()
+        agent.load_state_dict(state_dict)
+        totals = play_eval_episodes(args, agent, env, episodes)
+        totals["time"] = time.time() - start
+        results.put((global_step, chunk, totals))
+    env.close()
+
+
+class EvalPool:
+    """
+    Evaluates training checkpoints in `args.eval_workers` background processes.
+
+    Each checkpoint's `eval_episodes` are split into one chunk per worker, so its
+    episodes are played in parallel. `submit()` only blocks when `eval_queue_size`
+    checkpoints are already waiting; finished evaluations are collected with `poll()`.
+
+    :param YAMLConfig args: training config
+    :param NetworkSnapshot network_snapshot: network each worker builds its environment from
+    """
+
+    def __init__(self, args, network_snapshot: NetworkSnapshot) -> None:
+        self.args = args
+        self.num_workers = args.eval_workers
+        queue_size = args.eval_queue_size if hasattr(args, "eval_queue_size") else 2
+
+        ctx = mp.get_context("spawn")
+        self.tasks = ctx.Queue(maxsize=queue_size * self.num_workers)
+        self.results = ctx.Queue()
+        # global step -> list of chunk totals, filled in as workers finish
+        self.pending: dict[int, list] = {}
+        self.workers = [
+            ctx.Process(
+                target=run_eval_worker,
+                args=(args, network_snapshot, self.tasks, self.results),
+                daemon=True,
+            )
+            for _ in range(self.num_workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, agent: RLAgent, global_step: int) -> None:
+        """
+        Queues an evaluation of `agent`'s current weights, tagged with `global_step`.
+        """
+        state_dict = {k: v.detach().cpu().clone() for k, v in agent.state_dict().items()}
+        episodes = self.args.eval_episodes
+        chunks = [
+            episodes // self.num_workers + (1 if i < episodes % self.num_workers else 0)
+            for i in range(self.num_workers)
+        ]
+        chunks = [n for n in chunks if n > 0]
+        self.pending[global_step] = [None] * len(chunks)
+        for chunk, n in enumerate(chunks):
+            self.tasks.put((global_step, chunk, state_dict, n))
+
+    def poll(self, block: bool = False) -> list[tuple[int, tuple[float, dict], float]]:
+        """
+        Returns the finished evaluations as (global step, (episodic return, metrics),
+        seconds spent evaluating). With `block`, waits until none are pending.
+        """
+        finished = []
+        while self.pending:
+            try:
+                global_step, chunk, totals = self.results.get(block=block, timeout=1 if block else None)
+            except queue.Empty:
+                if not block:
+                    break
+                for worker in self.workers:
+                    if not worker.is_alive():
+                        raise RuntimeError(f"evaluation process exited with code {worker.exitcode}")
+                continue
+            chunks = self.pending[global_step]
+            chunks[chunk] = totals
+            if all(c is not None for c in chunks):
+                del self.pending[global_step]
+                finished.append((global_step, summarize_eval(chunks), max(c["time"] for c in chunks)))
+        return finished
+
+    def close(self) -> None:
+        for _ in self.workers:
+            self.tasks.put(None)
+        for worker in self.workers:
+            worker.join(timeout=10)
+            if worker.is_alive():
+                worker.terminate()
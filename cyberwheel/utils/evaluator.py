@@ -1,29 +1,115 @@
-
 import gymnasium as gym
 import time
 import importlib
+import numpy as np
 import pandas as pd
 import torch
-import wandb
+import torch.multiprocessing as mp
 import os
 import random
 
 from importlib.resources import files
 from tqdm import tqdm
 
+from cyberwheel.cyberwheel_envs.step_record import STEP_RECORD_DTYPE, decode_step_records
 from cyberwheel.network.network_base import Network
 from cyberwheel.utils import RLAgent, get_service_map
+from cyberwheel.utils.network_snapshot import NetworkSnapshot
 from cyberwheel.utils.visualize import visualize
 from cyberwheel.utils.set_seed import set_seed
 
 
-def get_action_mask(action_space_size, action_masks):
-    for i in range(len(action_masks)):
-        if i < action_space_size:
-            action_masks[i] = True
-        else:
-            action_masks[i] = False
-    return action_masks
+# Environment and agent of this evaluation worker, set up by init_eval_worker()
+_worker = {}
+
+
+def init_eval_worker(args, network: Network | NetworkSnapshot, state_dict: dict | None = None) -> None:
+    """
+    Builds the evaluation environment and agent that `play_eval_episode()` uses in
+    this process. A NetworkSnapshot is loaded first.
+    """
+    if isinstance(network, NetworkSnapshot):
+        network = network.load()
+    env_class = getattr(importlib.import_module("cyberwheel.cyberwheel_envs"), args.environment)
+
+    def _init():
+        env = env_class(args, network=network, evaluation=True)
+        return gym.wrappers.RecordEpisodeStatistics(env)  # This tracks the rewards of the environment that it wraps. Used for logging
+
+    envs = gym.vector.SyncVectorEnv([_init])
+    agent = RLAgent(envs)
+    if state_dict is not None:
+        agent.load_state_dict(state_dict)
+    agent.eval()
+    # the blue agent advances args.seed as it acts in deterministic mode, so episodes are
+    # seeded from its value before any were played
+    _worker.update(args=args, envs=envs, agent=agent, seed=args.seed)
+
+
+def _init_eval_process(args, network: NetworkSnapshot, state_dict: dict) -> None:
+    # workers share the CPU cores between them
+    torch.set_num_threads(1)
+    init_eval_worker(args, network, state_dict)
+
+
+def play_eval_episode(episode: int) -> pd.DataFrame:
+    """
+    Plays evaluation episode `episode` in this worker's environment and returns its
+    action log. The episode is seeded with `args.seed + episode`, and resetting the
+    environment restores all of its per-episode state, so it plays out the same
+    whichever worker runs it and whatever episodes that worker played before.
+    """
+    args = _worker["args"]
+    envs = _worker["envs"]
+    agent = _worker["agent"]
+    env = envs.envs[0].unwrapped
+    action_ids = torch.arange(env.max_action_space_size)
+
+    records = np.zeros(args.num_steps, dtype=STEP_RECORD_DTYPE)
+    rewards = np.zeros(args.num_steps)
+    steps = 0
+    obs, info = envs.reset(seed=_worker["seed"] + episode)
+    for step in range(args.num_steps):
+        obs = torch.as_tensor(obs, dtype=torch.float32)
+
+        # Valid actions are a prefix of the action space
+        action_mask = action_ids < torch.as_tensor(info["action_space_size"])[:, None]
+
+        with torch.no_grad():
+            action, _, _, _ = agent.get_action_and_value(obs, action_mask=action_mask)
+
+        obs, rew, done, _, info = envs.step(action.numpy())
+        records[step] = info["step"][0]
+        rewards[step] = rew[0]
+        steps += 1
+
+        # If generating graphs for dash server view
+        if args.visualize:
+            step_info = env.decode_step_record(records[step])
+            payload = env.get_step_payload()
+            commands = payload["commands"]
+            host_info = env.red_agent.observation.obs if args.train_red else payload["history"].hosts
+            step_info = {"source_host": step_info["red_action_src"], "target_host": step_info["red_action_dst"], "red_action": step_info["red_action"], "commands": commands, "network": payload["network"], "host_info": host_info}
+            visualize(episode, step, args.graph_name, step_info)
+
+        if done[0]:
+            break
+
+    columns = decode_step_records(records[:steps], env.step_values)
+    return pd.DataFrame(
+        {
+            "episode": episode,
+            "step": np.arange(steps),
+            "red_action_success": columns["red_action_success"],
+            "red_action_type": columns["red_action"],
+            "red_action_src": columns["red_action_src"],
+            "red_action_dest": columns["red_action_dst"],
+            "blue_action": columns["blue_action"],
+            "blue_action_id": columns["blue_action_id"],
+            "blue_action_target": columns["blue_action_target"],
+            "reward": rewards[:steps],
+        }
+    )
 
 
 class Evaluator:
@@ -35,31 +121,6 @@ class Evaluator:
         self.args.deterministic = self.deterministic
         self.seed = 0
 
-    def make_env(self, rank, network: Network):
-        """
-        Utility function for multiprocessed env.
-
-        :param env_id: the environment ID
-        :param num_env: the number of environments you wish to have in subprocesses
-        :param seed: the inital seed for RNG
-        :param rank: index of the subprocess
-        """
-
-        def _init():
-            env = self.env(self.args, network=network)
-            env.evaluation = True
-
-            self.max_action_space_size = env.max_action_space_size
-            env.reset(
-                seed=self.args.seed + rank
-            )  # Reset the environment with a specific seed
-            env = gym.wrappers.RecordEpisodeStatistics(
-                env
-            )  # This tracks the rewards of the environment that it wraps. Used for logging
-            return env
-
-        return _init
-
     def configure_evaluation(self):
         if self.deterministic:
             set_seed(self.seed)
@@ -76,13 +137,19 @@ class Evaluator:
         network_config = files("cyberwheel.data.configs.network").joinpath(
             self.args.network_config
         )
-        network = Network.create_network_from_yaml(network_config)
+        network = Network.create_network_from_yaml(
+            network_config, cache=self.args.network_cache if hasattr(self.args, "network_cache") else True
+        )
 
         self.args.service_mapping = get_service_map(network)
-        env_funcs = [self.make_env(i, network=network) for i in range(1)]
-        self.envs = gym.vector.SyncVectorEnv(env_funcs)
+        self.network = network
+        self.eval_workers = self.args.eval_workers if hasattr(self.args, "eval_workers") else 1
 
-        self.agent = RLAgent(self.envs).to(self.device)
+        # This process plays the episodes itself unless they're sharded across workers,
+        # which load the network as it was built
+        init_eval_worker(self.args, network.fork() if self.eval_workers > 1 else network)
+        self.envs = _worker["envs"]
+        self.agent = _worker["agent"].to(self.device)
 
         experiment_name = self.args.experiment_name
 
@@ -90,6 +157,8 @@ class Evaluator:
 
         # If download from W&B, use API to get run data.
         if self.args.download_model:
+            import wandb
+
             api = wandb.Api()
             run = api.run(
                 f"{self.args.wandb_entity}/{self.args.wandb_project_name}/runs/{self.args.run}"
@@ -108,15 +177,6 @@ class Evaluator:
         )
         self.agent.eval()
 
-        print("Resetting the environment...")
-
-        self.episode_rewards = []
-        self.total_reward = 0
-        self.steps = 0
-        self.obs = self.envs.reset()
-
-        print("Playing environment...")
-
         # Set up dirpath to store action logs CSV
         if self.args.graph_name != None:
             self.now_str = self.args.graph_name
@@ -125,119 +185,44 @@ class Evaluator:
         self.log_file = files("cyberwheel.data.action_logs").joinpath(f"{self.now_str}.csv")
 
         self.actions_df = pd.DataFrame()
-        self.full_episodes = []
-        self.full_steps = []
-        self.full_red_action_type = []
-        self.full_red_action_src = []
-        self.full_red_action_dest = []
-        self.full_red_action_success = []
-        self.full_blue_actions = []
-        self.full_blue_action_ids = []
-        self.full_blue_action_targets = []
-        self.full_rewards = []
-
-        self.max_action_space_size = self.envs.envs[0].unwrapped.max_action_space_size
-        self.action_mask = [False] * self.max_action_space_size
+        self.episode_rewards = []
 
     def evaluate(self):
+        """
+        Plays `num_episodes` episodes, sharded across `eval_workers` processes if
+        there are more than one, and saves their action logs in episode order.
+        """
+        print("Playing environment...")
         self.start_time = time.time()
-        for episode in tqdm(range(self.args.num_episodes)):
-            for step in range(self.args.num_steps):
-                if self.deterministic:
-                    set_seed(self.seed)
-                self.seed += 1
-                if step == 0:
-                    self.obs = self.obs[0]
-
-                self.obs = torch.Tensor(self.obs).to(self.device)
-                action_space_size = self.envs.envs[
-                    0
-                ].unwrapped.rl_agent.action_space._action_space_size
-
-                self.action_mask = get_action_mask(action_space_size, self.action_mask)
-
-                self.action_mask = torch.asarray(self.action_mask)
-
-                action, _, _, _ = self.agent.get_action_and_value(
-                    self.obs, action_mask=self.action_mask
-                )
-
-                self.obs, rew, done, _, info = self.envs.step(action.cpu().numpy())
-
-                rew = rew[0]
-                done = done[0]
-                if "final_observation" in list(info.keys()):
-                    blue_action = info["final_info"][0]["blue_action"]
-                    blue_action_id = info["final_info"][0]["blue_action_id"]
-                    blue_action_target = info["final_info"][0]["blue_action_target"]
-                    red_action_type = info["final_info"][0]["red_action"]
-                    red_action_src = info["final_info"][0]["red_action_src"]
-                    red_action_dest = info["final_info"][0]["red_action_dst"]
-                    red_action_success = info["final_info"][0]["red_action_success"]
-                    net = info["final_info"][0]["network"]
-                    commands = info["final_info"][0]["commands"]
-                    history = info["final_info"][0]["history"]
-                else:
-                    blue_action = info["blue_action"][0]
-                    blue_action_id = info["blue_action_id"][0]
-                    blue_action_target = info["blue_action_target"][0]
-                    red_action_type = info["red_action"][0]
-                    red_action_src = info["red_action_src"][0]
-                    red_action_dest = info["red_action_dst"][0]
-                    red_action_success = info["red_action_success"][0]
-                    net = info["network"][0]
-                    commands = info["commands"][0]
-                    history = info["history"][0]
-
-                self.full_episodes.append(episode)
-                self.full_steps.append(step)
-                self.full_red_action_type.append(red_action_type)
-                self.full_red_action_src.append(red_action_src)
-                self.full_red_action_dest.append(red_action_dest)
-                self.full_red_action_success.append(red_action_success)
-                self.full_blue_actions.append(blue_action)
-                self.full_blue_action_ids.append(blue_action_id)
-                self.full_blue_action_targets.append(blue_action_target)
-                self.full_rewards.append(rew)
-
-                # If generating graphs for dash server view
-                #print(self.args.visualize)
-                if self.args.visualize:
-                    host_info = self.envs.envs[0].unwrapped.red_agent.observation.obs if self.args.train_red else history.hosts
-                    step_info = {"source_host": red_action_src, "target_host": red_action_dest, "red_action": red_action_type, "commands": commands, "network": net, "host_info": host_info, "commands": commands}
-                    visualize(episode, step, self.args.graph_name, step_info)
-                    pass
-
-                self.total_reward += rew
-                self.steps += 1
-
-                if done:
-                    break
-            self.steps = 0
-            self.obs = self.envs.reset()
-            self.episode_rewards.append(self.total_reward)
-            self.total_reward = 0
-
-        self.actions_df = pd.DataFrame(
-            {
-                "episode": self.full_episodes,
-                "step": self.full_steps,
-                "red_action_success": self.full_red_action_success,
-                "red_action_type": self.full_red_action_type,
-                "red_action_src": self.full_red_action_src,
-                "red_action_dest": self.full_red_action_dest,
-                "blue_action": self.full_blue_actions,
-                "blue_action_id": self.full_blue_action_ids,
-                "blue_action_target": self.full_blue_action_targets,
-                "reward": self.full_rewards,
-            }
-        )
+        episodes = range(self.args.num_episodes)
+        if self.eval_workers > 1:
+            if self.args.visualize:
+                # Created up front so the workers don't race to create it
+                os.makedirs(files("cyberwheel.data.graphs").joinpath(self.args.graph_name), exist_ok=True)
+            state_dict = {k: v.detach().cpu() for k, v in self.agent.state_dict().items()}
+            network_snapshot = NetworkSnapshot(self.network)
+            try:
+                ctx = mp.get_context("spawn")
+                with ctx.Pool(
+                    self.eval_workers,
+                    initializer=_init_eval_process,
+                    initargs=(self.args, network_snapshot, state_dict),
+                ) as pool:
+                    # imap returns the logs in episode order, whichever worker played them
+                    episode_logs = list(tqdm(pool.imap(play_eval_episode, episodes), total=len(episodes)))
+            finally:
+                network_snapshot.unlink()
+        else:
+            episode_logs = [play_eval_episode(episode) for episode in tqdm(episodes)]
+
+        self.actions_df = pd.concat(episode_logs, ignore_index=True)
+        self.episode_rewards = [log["reward"].sum() for log in episode_logs]
 
         # Save action metadata to CSV in action_logs
         self.actions_df.to_csv(self.log_file)
 
         self.total_time = time.time() - self.start_time
-        print("charts/SPS", int(2000 / self.total_time))
+        print("charts/SPS", int(len(self.actions_df) / self.total_time))
         self.total_reward = sum(self.episode_rewards)
         self.episodes = len(self.episode_rewards)
         if self.episodes == 0:
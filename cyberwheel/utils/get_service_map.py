@@ -1,6 +1,58 @@
+from cyberwheel.network.cve_bits import CVE_BITS
 from cyberwheel.network.network_base import Network
 from cyberwheel.red_actions import art_techniques
-from cyberwheel.red_actions.actions import ARTDiscovery, ARTLateralMovement, ARTPrivilegeEscalation, ARTImpact
+from cyberwheel.red_actions.actions import ARTKillChainPhase, ARTDiscovery, ARTLateralMovement, ARTPrivilegeEscalation, ARTImpact
+
+# Valid techniques of every killchain phase, keyed by CVE signature: (os, CVE mask).
+# Computed once per signature and shared by every host with it.
+_validity_tables: dict[tuple[str, int], dict[str, list[str]]] = {}
+
+# valid techniques keyed by (os, CVE mask, killchain phases)
+_valid_techniques_cache: dict[tuple, dict] = {}
+
+
+def clear_service_map_caches() -> None:
+    """
+    Empties the validity tables and valid technique caches, so the next service map
+    is computed from scratch.
+    """
+    _validity_tables.clear()
+    _valid_techniques_cache.clear()
+
+
+def get_validity_table(os: str, cve_mask: int) -> dict[str, list[str]]:
+    """
+    Returns the MITRE ids of each killchain phase (by name) that are valid on hosts
+    running `os` with the CVEs in `cve_mask`. The result is shared and must not be modified.
+    """
+    key = (os, cve_mask)
+    if (table := _validity_tables.get(key)) is not None:
+        return table
+
+    table = {}
+    for phase, mids in ARTKillChainPhase.validity_mapping[os].items():
+        table[phase] = [
+            mid for mid in mids if art_techniques.technique_mapping[mid].get_cve_mask() & cve_mask
+        ]
+    _validity_tables[key] = table
+    return table
+
+
+def get_valid_techniques(host, killchain) -> dict:
+    """
+    Returns the techniques of each killchain phase that are valid on the host,
+    based on its OS and CVEs. The result is shared between hosts with the same
+    OS and CVEs and must not be modified.
+    """
+    cve_mask = CVE_BITS.mask(host.host_type.cve_list)
+    key = (host.os, cve_mask, tuple(killchain))
+    if (valid_techniques := _valid_techniques_cache.get(key)) is not None:
+        return valid_techniques
+
+    table = get_validity_table(host.os, cve_mask)
+    valid_techniques = {kcp: table[kcp.get_name()] for kcp in killchain}
+    _valid_techniques_cache[key] = valid_techniques
+    return valid_techniques
 
 
 def get_service_map(network: Network):
@@ -14,13 +66,12 @@ def get_service_map(network: Network):
         ARTLateralMovement,
     ]
     service_mapping = {}
+    # hosts share interned HostTypes, so the signature lookup only runs once per type
+    by_type = {}
     for host in network.hosts.values():
-        service_mapping[host.name] = {}
-        for kcp in killchain:
-            service_mapping[host.name][kcp] = []
-            kcp_valid_techniques = kcp.validity_mapping[host.os][kcp.get_name()]
-            for mid in kcp_valid_techniques:
-                technique = art_techniques.technique_mapping[mid]
-                if len(host.host_type.cve_list & technique.cve_list) > 0:
-                    service_mapping[host.name][kcp].append(mid)
-    return service_mapping
\ No newline at end of file
+        key = (id(host.host_type), host.os)
+        valid_techniques = by_type.get(key)
+        if valid_techniques is None:
+            valid_techniques = by_type[key] = get_valid_techniques(host, killchain)
+        service_mapping[host.name] = valid_techniques
+    return service_mapping
@@ -8,49 +8,93 @@ class HybridSetList:
     Defines a Hybrid Set/List object. This allows us to take advantage of the O(1) time complexity for
     membership checking of sets, while taking advantage of the O(1) time complexity of random.choice()
     of lists.
+
+    Items are kept in a list, with a dict mapping each item to its position in it, so add, remove,
+    membership and random choice are all O(1). `remove()` moves the last item into the removed
+    item's slot (swap-pop), so the list is not in insertion order once items have been removed.
+
+    In deterministic mode (CYBERWHEEL_DETERMINISTIC), each instance draws from its own
+    `random.Random` stream instead of reseeding the global RNG. The stream is seeded with `seed`,
+    or, if that's None, with a seed drawn from the global RNG on the first draw after creation,
+    `reseed()` or `reset()`. So every instance gets a distinct stream that follows `set_seed()`,
+    and instances that are never drawn from leave the global RNG alone. Otherwise draws use the
+    global `random` module.
     """
 
-    def __init__(self, data: Iterable = None):
+    def __init__(self, data: Iterable = None, seed: int = None):
+        self.data_list = []
+        self.index = {}
         if data:
-            self.data_set = set(data)
-            self.data_list = list(data)
-        else:
-            self.data_set = set()
-            self.data_list = []
-        self.seed = 0
+            for value in data:
+                self.add(value)
         self.deterministic = os.getenv("CYBERWHEEL_DETERMINISTIC", "False").lower() in ('true', '1', 't')
-    
+        self.seed = seed
+        self.rng = None
+        self.reseed(seed)
+
+    @property
+    def data_set(self):
+        # set-like view of the items
+        return self.index.keys()
+
     def __iter__(self):
         return iter(self.data_list)
-    
+
     def __getitem__(self, i: int):
         return self.data_list[i]
-    
+
     def __contains__(self, item: Any):
-        return item in self.data_set
-    
+        return item in self.index
+
     def __len__(self):
-        return len(self.data_set)
+        return len(self.data_list)
+
+    def copy(self) -> "HybridSetList":
+        new_hsl = HybridSetList()
+        new_hsl.data_list = list(self.data_list)
+        new_hsl.index = dict(self.index)
+        new_hsl.seed = self.seed
+        new_hsl.deterministic = self.deterministic
+        if self.rng is not None:
+            new_hsl.rng = random.Random()
+            new_hsl.rng.setstate(self.rng.getstate())
+        else:
+            new_hsl.rng = None
+        return new_hsl
 
     def add(self, value: Any):
-        if value not in self.data_set:
-            self.data_set.add(value)
+        if value not in self.index:
+            self.index[value] = len(self.data_list)
             self.data_list.append(value)
 
     def remove(self, value: Any):
-        if value in self.data_set:
-            self.data_set.remove(value)
-            self.data_list.remove(value)
+        i = self.index.pop(value, None)
+        if i is None:
+            return
+        last = self.data_list.pop()
+        if i < len(self.data_list):
+            self.data_list[i] = last
+            self.index[last] = i
 
     def get_random(self):
         if self.deterministic:
-            #print(self.seed)
-            random.seed(self.seed)
-            self.seed += 1
-            return random.choice(self.data_list)
-        else:
-            return random.choice(self.data_list)
-    
+            if self.rng is None:
+                self.seed = random.getrandbits(64)
+                self.rng = random.Random(self.seed)
+            return self.rng.choice(self.data_list)
+        return random.choice(self.data_list)
+
+    def reseed(self, seed: int = None):
+        """
+        Restarts the deterministic stream from `seed`, or, if it's None, from a seed drawn
+        from the global RNG on the next draw. Does nothing outside of deterministic mode.
+        """
+        if not self.deterministic:
+            return
+        self.seed = seed
+        self.rng = random.Random(seed) if seed is not None else None
+
     def reset(self):
-        self.data_set = set()
-        self.data_list = []
\ No newline at end of file
+        self.data_list = []
+        self.index = {}
+        self.reseed()
@@ -0,0 +1,122 @@
+from collections.abc import Mapping
+from multiprocessing import shared_memory
+from typing import Iterator
+
+from cyberwheel.network.network_base import Network
+from cyberwheel.network.topology import NetworkTopology
+
+# topologies this process attached to, by segment name. The arrays of an attached
+# topology point into the segment, so it stays mapped for the life of the process.
+_attached: dict[str, tuple[shared_memory.SharedMemory, NetworkTopology]] = {}
+
+
+class NetworkSnapshot:
+    """
+    The topology of a Network (see NetworkTopology) written once into a shared memory
+    segment, for building the networks of worker processes.
+
+    Pickling a NetworkSnapshot only sends the segment name and array layout, so
+    environment factories that capture it stay small when AsyncVectorEnv sends them
+    to worker processes. Workers map the segment and read the hosts, edges, services,
+    routes, firewall rules and technique maps from it in place, so every worker
+    shares one copy of them. Each network loaded with `load()` only keeps its own
+    routers, subnets, host state table and the hosts its agents look up. The process
+    that created the segment owns it and must call `unlink()` when the workers are done.
+
+    :param Network network: network to snapshot
+    :param dict service_mapping: valid techniques of each host (see `get_service_map()`),
+        shared through `service_mapping`
+    """
+
+    def __init__(self, network: Network, service_mapping: dict | None = None) -> None:
+        topology = NetworkTopology.from_network(network, service_mapping)
+        self.layout, size = topology.layout()
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, size))
+        topology.write(self._shm.buf)
+        self.name = self._shm.name
+        self.has_techniques = service_mapping is not None
+        self._owner = True
+        # the owner reads from its own copy, so the segment can be unlinked while networks use it
+        self._topology = topology
+
+    def __getstate__(self) -> dict:
+        return {"name": self.name, "layout": self.layout, "has_techniques": self.has_techniques}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._shm = None
+        self._owner = False
+        self._topology = None
+
+    @property
+    def topology(self) -> NetworkTopology:
+        """
+        The topology, read from the shared segment outside of the process that created it.
+        """
+        if self._topology is None:
+            attached = _attached.get(self.name)
+            if attached is None:
+                # workers started by multiprocessing share the owner's resource tracker,
+                # so attaching here doesn't make the segment outlive or die with the worker
+                shm = shared_memory.SharedMemory(name=self.name)
+                attached = _attached[self.name] = (shm, NetworkTopology.from_buffer(shm.buf, self.layout))
+            self._topology = attached[1]
+        return self._topology
+
+    @property
+    def service_mapping(self) -> "SharedServiceMap":
+        """
+        The service mapping the snapshot was created with, read from the shared segment.
+        """
+        if not self.has_techniques:
+            raise ValueError("the snapshot was created without a service mapping")
+        return SharedServiceMap(self)
+
+    def load(self) -> Network:
+        """
+        Returns a new Network attached to the snapshot's topology (see `Network.from_topology()`).
+        """
+        return Network.from_topology(self.topology)
+
+    def unlink(self) -> None:
+        """
+        Frees the shared segment. Only has an effect in the process that created it.
+        """
+        if self._owner and self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+
+class SharedServiceMap(Mapping):
+    """
+    The service mapping of a NetworkSnapshot: the valid techniques of each host by
+    name, read from the snapshot's topology. Pickling it only sends the snapshot, so
+    it can replace `args.service_mapping` for worker processes. The technique maps
+    are shared by every host with the same ones and must not be modified.
+
+    :param NetworkSnapshot snapshot: snapshot created with a service mapping
+    """
+
+    def __init__(self, snapshot: NetworkSnapshot) -> None:
+        self.snapshot = snapshot
+
+    def __reduce__(self):
+        return SharedServiceMap, (self.snapshot,)
+
+    def __getitem__(self, name: str) -> dict:
+        topology = self.snapshot.topology
+        i = topology.host_index(name) if isinstance(name, str) else -1
+        if i < 0 or topology.techniques[i] < 0:
+            raise KeyError(name)
+        return topology.objects[topology.techniques[i]]
+
+    def __iter__(self) -> Iterator[str]:
+        topology = self.snapshot.topology
+        for i in topology.host_order.tolist():
+            if topology.techniques[i] >= 0:
+                yield topology.name(i)
+
+    def __len__(self) -> int:
+        topology = self.snapshot.topology
+        return int((topology.techniques[topology.host_order] >= 0).sum())
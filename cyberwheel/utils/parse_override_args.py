@@ -39,6 +39,12 @@ def parse_override_args(print_help: bool = False):
     training_group.add_argument("--deterministic", type=lambda x: bool(strtobool(x)), nargs="?", const=True, help="if toggled, `torch.backends.cudnn.deterministic=True`")
     training_group.add_argument("--device", type=str, help="Choose the device used for optimization. Choose 'cuda', 'cpu', or specify a gpu with 'cuda:0'")
     training_group.add_argument("--async-env", type=lambda x: bool(strtobool(x)), nargs="?", const=True, help="if toggled, uses AsyncVectorEnv instead of SyncVectorEnv")
+    training_group.add_argument("--batched-env", type=lambda x: bool(strtobool(x)), nargs="?", const=True, help="if toggled, steps all environments in one CyberwheelVecEnv. Overrides --async-env")
+    training_group.add_argument("--actor-learner", type=lambda x: bool(strtobool(x)), nargs="?", const=True, help="if toggled, actor processes collect rollouts while the learner updates the policy")
+    training_group.add_argument("--num-actors", type=int, help="the number of actor processes in actor-learner mode")
+    training_group.add_argument("--max-policy-lag", type=int, help="the maximum number of policy pushes a rollout can be behind before it is dropped")
+    training_group.add_argument("--policy-push-interval", type=int, help="the number of policy updates between pushing weights to the actors")
+    training_group.add_argument("--step-timing", type=lambda x: bool(strtobool(x)), nargs="?", const=True, help="if toggled, writes histograms of how long each phase of a step takes to TensorBoard")
     training_group.add_argument("--track", type=lambda x: bool(strtobool(x)), nargs="?", const=True, help="if toggled, this experiment will be tracked with Weights and Biases")
     training_group.add_argument("--wandb-project-name", type=str, help="the wandb's project name")
     training_group.add_argument("--wandb-entity", type=str, help="the entity (team) of wandb's project")
@@ -47,6 +53,8 @@ def parse_override_args(print_help: bool = False):
     training_group.add_argument("--num-envs", type=int, help="the number of parallel game environments")
     training_group.add_argument("--num-steps", type=int, help="the number of steps to run in each environment per policy rollout")
     training_group.add_argument('--eval-episodes', type=int, help='Number of evaluation episodes to run')
+    training_group.add_argument('--eval-workers', type=int, help='Number of background processes evaluating checkpoints. 0 evaluates in the training loop')
+    training_group.add_argument('--eval-queue-size', type=int, help='Number of checkpoints that can wait for evaluation before training blocks')
     
     # Cyberwheel Environment Parameters
     env_group.add_argument("--environment", type=str, help="the environment class to use. Current options: CyberwheelRL | Cyberwheel")
@@ -59,8 +67,12 @@ def parse_override_args(print_help: bool = False):
     env_group.add_argument("--network-config", help="Input the network config filename", type=str)
     env_group.add_argument("--decoy-config", help="Input the decoy config filename", type=str)
     env_group.add_argument("--host-config", help="Input the host config filename", type=str)
+    env_group.add_argument("--network-cache", type=lambda x: bool(strtobool(x)), nargs="?", const=True, help="if toggled, loads the compiled network from cyberwheel/data/network_cache, building and storing it if the network, host or services configs changed")
     env_group.add_argument("--reward-function", help="Which reward function to use. Current option: 'RLReward'", type=str)
     env_group.add_argument("--detector-config", help="Location of detector config file.", type=str)
+    env_group.add_argument("--command-history-limit", help="Number of recent commands kept in each host's command history", type=int)
+    env_group.add_argument("--agent-history-limit", help="Number of recent steps kept in the red agent's history", type=int)
+    env_group.add_argument("--full-history", type=lambda x: bool(strtobool(x)), nargs="?", const=True, help="if toggled, keeps complete command and agent histories, ignoring the limits")
 
     # RL Algorithm Parameters
     rl_group.add_argument("--env-id", type=str, help="the id of the environment")
@@ -110,10 +122,12 @@ def parse_eval_override_args(print_help: bool = False):
     parser.add_argument("--network-config", help="Input the network config filename", type=str)
     parser.add_argument("--decoy-config", help="Input the decoy config filename", type=str)
     parser.add_argument("--host-config", help="Input the host config filename", type=str)
+    parser.add_argument("--network-cache", type=lambda x: bool(strtobool(x)), nargs="?", const=True, help="if toggled, loads the compiled network from cyberwheel/data/network_cache, building and storing it if the network, host or services configs changed")
     parser.add_argument("--detector-config", help="Path to detector config file", type=str)
     parser.add_argument("--reward-function", help="Which reward function to use. Current option: 'RLReward' (default)", type=str)
     parser.add_argument("--num-steps", help="Number of steps per episode for evaluation", type=int)
     parser.add_argument("--num-episodes", help="Number of episodes to evaluate", type=int)
+    parser.add_argument("--eval-workers", help="Number of processes to shard the evaluation episodes across", type=int)
     parser.add_argument("--wandb-entity", help="Username where W&B model is stored. Required when downloading model from W&B", type=str)
     parser.add_argument("--wandb-project-name", help="Project name where W&B model is stored. Required when downloading model from W&B", type=str)
 
@@ -134,6 +148,7 @@ def parse_default_override_args(print_help: bool = False):
     parser.add_argument("--network-config", help="Input the network config filename", type=str)
     parser.add_argument("--decoy-config", help="Input the decoy config filename", type=str)
     parser.add_argument("--host-config", help="Input the host config filename", type=str)
+    parser.add_argument("--network-cache", type=lambda x: bool(strtobool(x)), nargs="?", const=True, help="if toggled, loads the compiled network from cyberwheel/data/network_cache, building and storing it if the network, host or services configs changed")
     parser.add_argument("--num-steps", help="Number of steps per episode for evaluation", type=int)
     parser.add_argument( "--num-episodes", help="Number of episodes to evaluate", type=int)
     parser.add_argument("--deterministic", type=lambda x: bool(strtobool(x)), nargs="?", const=True, help="if toggled, `torch.backends.cudnn.deterministic=True`")
@@ -18,7 +18,9 @@ class Runner:
         network_config = files("cyberwheel.data.configs.network").joinpath(
             self.args.network_config
         )
-        network = Network.create_network_from_yaml(network_config)
+        network = Network.create_network_from_yaml(
+            network_config, cache=self.args.network_cache if hasattr(self.args, "network_cache") else True
+        )
 
         self.args.service_mapping = get_service_map(network)
 
@@ -0,0 +1,55 @@
+import numpy as np
+
+from time import perf_counter
+
+
+class StepTimer:
+    """
+    Collects how long each phase of a step takes, for the timing histograms the
+    trainer writes to TensorBoard. Callers guard every measurement with the
+    `enabled` flag, so a disabled timer costs one attribute check per phase:
+
+        if timer.enabled:
+            start = timer.now()
+        blue_agent_result = self.blue_agent.act(action)
+        if timer.enabled:
+            start = timer.lap("blue_act", start)
+
+    :param bool enabled: whether to record anything. Default: False
+    """
+
+    now = staticmethod(perf_counter)
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self.durations: dict[str, list[float]] = {}
+
+    def lap(self, phase: str, start: float) -> float:
+        """
+        Records the time since `start` under `phase` and returns the current time,
+        which starts the next phase.
+        """
+        end = perf_counter()
+        self.record(phase, end - start)
+        return end
+
+    def record(self, phase: str, duration: float) -> None:
+        """
+        Records `duration` seconds under `phase`.
+        """
+        durations = self.durations.get(phase)
+        if durations is None:
+            durations = self.durations[phase] = []
+        durations.append(duration)
+
+    def drain(self) -> dict[str, np.ndarray]:
+        """
+        Returns the durations recorded since the last call, in seconds, and clears them.
+        """
+        durations = {phase: np.asarray(d) for phase, d in self.durations.items()}
+        self.durations = {}
+        return durations
+
+
+# Shared by agents that haven't been given a timer. It is never enabled.
+DISABLED_TIMER = StepTimer()
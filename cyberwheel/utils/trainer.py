@@ -6,7 +6,6 @@ import os
 import importlib
 import numpy as np
 
-from copy import deepcopy
 from torch.utils.tensorboard import SummaryWriter
 from torch import optim, nn
 from importlib.resources import files
@@ -15,6 +14,10 @@ from cyberwheel.utils import RLAgent, get_service_map
 from cyberwheel.utils.set_seed import set_seed
 from cyberwheel.network.network_base import Network
 from cyberwheel.utils.async_call import async_call, make_env
+from cyberwheel.utils.network_snapshot import NetworkSnapshot
+from cyberwheel.utils.actor_learner import ActorPool
+from cyberwheel.utils.eval_pool import EvalPool, play_eval_episodes, summarize_eval
+from cyberwheel.utils.step_timer import StepTimer
 
 class Trainer:
     def __init__(self, args):
@@ -24,70 +27,76 @@ class Trainer:
         self.deterministic = os.getenv("CYBERWHEEL_DETERMINISTIC", "False").lower() in ('true', '1', 't')
         self.args.deterministic = self.deterministic
         self.seed = 0
-    def get_action_mask(self, action_space_size, action_masks):
-        action_masks[:action_space_size] = True # Valid actions
-        action_masks[action_space_size:] = False # Invalid actions
-        return action_masks
-    
+
     def evaluate(self, agent, env):
         """Evaluate 'agent'"""
         # We evaluate on CPU because learning is already happening on GPUs.
         # You can evaluate small architectures on CPU, but if you increase the neural network size,
         # you may need to do fewer evaluations at a time on GPU.
-        eval_device = torch.device("cpu")
-        #env = self.env(self.args, )
-        episode_rewards = []
-        action_masks = torch.zeros(self.max_action_space_size, dtype=torch.bool).to(eval_device)
-        total_reward = 0
+        return summarize_eval([play_eval_episodes(self.args, agent, env, self.args.eval_episodes)])
 
-        # Metrics for SULI
-        total_impact_timestep = 0
-        total_first_step_of_decoy_contact = 0
-        total_impacted_decoys = 0
-        total_steps_delayed = 0
-
-        # Standard evaluation loop to estimate mean episodic return
-        for episode in range(self.args.eval_episodes):
-            #episode_start_time = time.time()
-            obs, _ = env.reset()
-            for step in range(self.args.num_steps):
-                obs = torch.Tensor(obs).to(eval_device)
-
-                action_masks = self.get_action_mask(env.envs[0].unwrapped.rl_agent.action_space._action_space_size, action_masks)
-
-                action, _, _, _ = agent.get_action_and_value(
-                    obs, action_mask=action_masks
-                )
-                eval_step_start_time = time.time()
-                obs, rew, done, _, info = env.step(action)
-                #print(f"Evaluation step took: \t\t{time.time() - eval_step_start_time}")
-                total_reward += rew
-
-                # Metrics for SULI
-                if info["decoy_attacked"]:
-                    total_steps_delayed += 1
-                if (info["red_action"] == "impact"):
-                    total_impact_timestep += step
-                if (not total_first_step_of_decoy_contact) and (info["pingsweeped_decoy"]):
-                    total_first_step_of_decoy_contact += step
-
-                if done:
-                    break
+    def eval_results(self, result, globalstep):
+        """Tags an evaluation result with the evaluation parameters"""
+        return (
+            self.args.network_config,
+            self.args.decoy_config,
+            self.args.reward_function,
+            self.args.red_agent,
+            result,
+            globalstep,
+        )
+
+    def log_eval_results(self, eval_results, eval_time):
+        """Logs the results of evaluating the checkpoint from step 'eval_step'"""
+        (
+            eval_network_config,
+            eval_decoy_config,
+            eval_reward_function,
+            eval_red_agent,
+            eval_return,
+            eval_step,
+        ) = eval_results
 
-            total_impacted_decoys += info["impacted_decoys"] # metric for SULI
-            episode_rewards.append(total_reward)
-            total_reward = 0
+        self.writer.add_scalar(
+            f"evaluation/{eval_network_config.split('.')[0]}_{eval_decoy_config}|{eval_reward_function}reward__{eval_red_agent}_episodic_return",
+            eval_return[0],
+            eval_step
+        )
+
+        self.writer.add_scalar(
+            "charts/eval_time", int(eval_time), eval_step
+        )
 
-        episodic_return = float(sum(episode_rewards)) / self.args.eval_episodes
-        
         # Metrics for SULI
-        info['impact_timestep_avg'] = total_impact_timestep / self.args.eval_episodes
-        info['first_step_of_decoy_contact_avg'] = total_first_step_of_decoy_contact / self.args.eval_episodes
-        info['impacted_decoys_avg'] = total_impacted_decoys / self.args.eval_episodes
-        info['delay_avg'] = total_steps_delayed / self.args.eval_episodes
 
-        return (episodic_return, info)
-    
+        # Average Steps Till Impact
+        self.writer.add_scalar(
+            f"evaluation/time_step_till_impact_avg",
+            eval_return[1]["impact_timestep_avg"],
+            eval_step
+        )
+
+        # Total Number of Decoys Impacted (Server Downtime)
+        self.writer.add_scalar(
+            f"evaluation/impacted_decoys_avg",
+            (eval_return[1]["impacted_decoys_avg"]),
+            eval_step
+        )
+
+        # First Step that Decoy is Detected (Decoy Detector)
+        self.writer.add_scalar(
+            f"evaluation/first_step_of_decoy_contact_avg",
+            eval_return[1]["first_step_of_decoy_contact_avg"],
+            eval_step
+        )
+
+        # Average steps delayed (when attacker targets a decoy)
+        self.writer.add_scalar(
+            f"evaluation/steps_delayed_avg",
+            eval_return[1]["delay_avg"],
+            eval_step
+        )
+
     def run_evals(self, model, globalstep):
         """Evaluate 'model' on tasks listed in 'eval_queue' in a separate process"""
         eval_device = torch.device("cpu")
@@ -103,14 +112,7 @@ class Trainer:
         # Evaluate the agent
         result = self.evaluate(eval_agent, sample_env)
         # Store evaluation parameters and results
-        return (
-            self.args.network_config,
-            self.args.decoy_config,
-            self.args.reward_function,
-            self.args.red_agent,
-            result,
-            globalstep,
-        )
+        return self.eval_results(result, globalstep)
     
     def wandb_setup(self):
         # Initialize Weights and Biases tracking
@@ -157,24 +159,54 @@ class Trainer:
 
         print(f"Building network: {self.args.network_config} ...")
 
-        network = Network.create_network_from_yaml(network_config)
-        self.networks = [deepcopy(network) for i in range(self.args.num_envs)]
+        network = Network.create_network_from_yaml(
+            network_config, cache=self.args.network_cache if hasattr(self.args, "network_cache") else True
+        )
+        self.actor_learner = self.args.actor_learner if hasattr(self.args, "actor_learner") else False
+        # actor-learner mode runs its own environments, so it ignores batched_env
+        self.batched_env = not self.actor_learner and (self.args.batched_env if hasattr(self.args, "batched_env") else False)
 
         print("Mapping attack validity to hosts...", end=" ")
-        self.args.service_mapping = get_service_map(network)
+        service_mapping = get_service_map(network)
         print("done")
 
-        print("Defining environment(s) and beginning training:", end="\n\n")
-
-        env_funcs = [make_env(self.env, self.args, self.networks, i, False) for i in range(self.args.num_envs)]
+        # Asynchronous workers attach to a snapshot of the network's topology and share
+        # its hosts and technique maps, so the parent doesn't fork and pickle one Network
+        # (and service mapping) per worker
+        if self.batched_env:
+            # CyberwheelVecEnv attaches every environment to one topology of the network
+            self.networks = network
+            self.args.service_mapping = service_mapping
+        elif self.actor_learner or self.args.async_env:
+            self.networks = NetworkSnapshot(network, service_mapping)
+            self.args.service_mapping = self.networks.service_mapping
+        else:
+            self.networks = [network.fork() for i in range(self.args.num_envs)]
+            self.args.service_mapping = service_mapping
 
-        self.envs = (
-            async_call(env_funcs)
-            if self.args.async_env
-            else gym.vector.SyncVectorEnv(env_funcs)
-        )
+        print("Defining environment(s) and beginning training:", end="\n\n")
 
-        self.max_action_space_size = env_funcs[0].max_action_space_size
+        if self.actor_learner:
+            # Actor processes own the training environments. The learner only keeps
+            # one to get the spaces from.
+            env_funcs = [make_env(self.env, self.args, [network.fork()], 0, False)]
+            self.envs = gym.vector.SyncVectorEnv(env_funcs)
+            self.max_action_space_size = env_funcs[0].max_action_space_size
+        elif self.batched_env:
+            vec_env = getattr(importlib.import_module("cyberwheel.cyberwheel_envs"), "CyberwheelVecEnv")
+            self.envs = vec_env(self.args, self.args.num_envs, network=network, copy=False)
+            self.max_action_space_size = self.envs.max_action_space_size
+        else:
+            env_funcs = [make_env(self.env, self.args, self.networks, i, False) for i in range(self.args.num_envs)]
+
+            # Observations are converted into tensors as soon as they're returned, so
+            # the vector envs don't need to copy them first
+            self.envs = (
+                async_call(env_funcs, copy=False)
+                if self.args.async_env
+                else gym.vector.SyncVectorEnv(env_funcs, copy=False)
+            )
+            self.max_action_space_size = env_funcs[0].max_action_space_size
 
         assert isinstance(
             self.envs.single_action_space, gym.spaces.Discrete
@@ -203,40 +235,59 @@ class Trainer:
         self.action_masks = torch.zeros(
             (self.args.num_steps, self.args.num_envs, self.max_action_space_size), dtype=torch.bool
         ).to(self.device)
+        self.action_ids = torch.arange(self.max_action_space_size, device=self.device)
+        # Per-phase timings, written as TensorBoard histograms after every update
+        self.timer = StepTimer(self.args.step_timing if hasattr(self.args, "step_timing") else False)
         self.global_step = 0
         self.start_time = time.time()
-        self.resets = np.array(self.envs.reset(seed=[self.seed + i for i in range(self.args.num_envs)])[0])
-        self.next_obs = torch.Tensor(self.resets).to(self.device)
         self.next_done = torch.zeros(self.args.num_envs).to(self.device)
+        if self.actor_learner:
+            self.next_obs = torch.zeros(
+                (self.args.num_envs,) + self.envs.single_observation_space.shape
+            ).to(self.device)
+            self.policy_push_interval = self.args.policy_push_interval if hasattr(self.args, "policy_push_interval") else 1
+            self.actor_pool = ActorPool(
+                self.args,
+                self.networks,
+                self.agent,
+                self.envs.single_observation_space.shape,
+                self.max_action_space_size,
+                seed=self.seed,
+            )
+        else:
+            self.resets = self.envs.reset(seed=[self.seed + i for i in range(self.args.num_envs)])[0]
+            self.next_obs = torch.as_tensor(self.resets, dtype=torch.float32, device=self.device)
+
+        # Checkpoints are evaluated in background processes, which build their
+        # environments from a snapshot of the network
+        self.eval_workers = self.args.eval_workers if hasattr(self.args, "eval_workers") else 0
+        if self.eval_workers > 0:
+            self.eval_network = self.networks if isinstance(self.networks, NetworkSnapshot) else NetworkSnapshot(network, service_mapping)
+            self.eval_pool = EvalPool(self.args, self.eval_network)
+
+    def update_action_space_sizes(self, info):
+        """
+        Keeps the sizes of the environments' action spaces, which every step and reset
+        returns in `info`, for building the next action masks.
+        """
+        self.action_space_sizes = torch.as_tensor(info["action_space_size"], device=self.device)
+
+    def collect_rollout(self):
+        """
+        Runs an episode of `num_steps` steps in each environment with the current policy.
+        """
+        self.resets, info = self.envs.reset()
+        self.next_obs = torch.as_tensor(self.resets, dtype=torch.float32, device=self.device)
+        self.update_action_space_sizes(info)
 
-    def train(self, update):
-        self.resets = np.array(self.envs.reset()[0])
-        self.next_obs = torch.Tensor(self.resets).to(self.device)
-
-        # Annealing the rate if instructed to do so.
-        if self.args.anneal_lr:
-            # Decreases the learning rate from args.lr to 0 over the course of training.
-            frac = 1.0 - (update - 1.0) / self.args.num_updates
-            lrnow = frac * self.args.learning_rate
-            self.optimizer.param_groups[0]["lr"] = lrnow
-
-        # Run an episode in each environment. This loop collects experience which is later used for optimization.
-        episode_start = time.time_ns()
         for step in range(0, self.args.num_steps):
 
             if self.deterministic:
                 set_seed(self.seed)
             self.seed += self.args.num_envs
-            
-            if isinstance(self.envs, gym.vector.AsyncVectorEnv):
-                action_space_sizes = self.envs.call("rl_agent_action_space_size")
-            else:
-                action_space_sizes = [
-                    env.unwrapped.rl_agent.action_space._action_space_size for env in self.envs.envs
-                ]
 
-            for i, action_space_size in enumerate(action_space_sizes):
-                self.action_masks[step][i] = self.get_action_mask(action_space_size, self.action_masks[step][i])
+            # Valid actions are a prefix of each environment's action space
+            self.action_masks[step] = self.action_ids < self.action_space_sizes[:, None]
 
             self.global_step += 1 * self.args.num_envs
             self.obs[step] = self.next_obs
@@ -244,6 +295,8 @@ class Trainer:
 
             # ALGO LOGIC: action logic
             # Select an action using the current policy and get a value estimate
+            if self.timer.enabled:
+                start = self.timer.now()
             with torch.no_grad():
                 action, logprob, _, value = self.agent.get_action_and_value(
                     self.next_obs, action_mask=self.action_masks[step]
@@ -255,13 +308,62 @@ class Trainer:
             # TRY NOT TO MODIFY: execute the game and log data.
             # Execute the selected action in the environment to collect experience for training.
             temp_action = action.cpu().numpy()
-            #train_step_start_time = time.time()
-            self.next_obs, reward, done, _, info = self.envs.step(temp_action)
-            #print(f"Training step took: \t\t{time.time() - train_step_start_time}")
+            if self.timer.enabled:
+                start = self.timer.lap("trainer/policy_forward", start)
+            # With asynchronous environments this is mostly waiting on the workers
+            next_obs, reward, done, _, info = self.envs.step(temp_action)
+            if self.timer.enabled:
+                self.timer.lap("trainer/env_step", start)
             self.rewards[step] = torch.tensor(reward).to(self.device).view(-1)
-            self.next_obs, self.next_done = torch.Tensor(self.next_obs).to(self.device), torch.Tensor(
-                done
-            ).to(self.device)
+            self.next_obs = torch.as_tensor(next_obs, dtype=torch.float32, device=self.device)
+            self.next_done = torch.tensor(done, dtype=torch.float32, device=self.device)
+            self.update_action_space_sizes(info)
+
+    def receive_rollouts(self):
+        """
+        Fills the rollout storage with episodes generated by the actor processes.
+        Each actor rollout covers `num_envs // num_actors` of the storage's environments.
+        """
+        envs_per_actor = self.actor_pool.envs_per_actor
+        ring = self.actor_pool.ring
+        if self.timer.enabled:
+            start = self.timer.now()
+        rollouts = self.actor_pool.receive(self.actor_pool.num_actors)
+        if self.timer.enabled:
+            self.timer.lap("trainer/rollout_wait", start)
+        policy_lag = 0
+        for i, (slot, _, version) in enumerate(rollouts):
+            envs = slice(i * envs_per_actor, (i + 1) * envs_per_actor)
+            self.obs[:, envs] = ring.obs[slot]
+            self.actions[:, envs] = ring.actions[slot]
+            self.logprobs[:, envs] = ring.logprobs[slot]
+            self.rewards[:, envs] = ring.rewards[slot]
+            self.dones[:, envs] = ring.dones[slot]
+            self.values[:, envs] = ring.values[slot]
+            self.action_masks[:, envs] = ring.action_masks[slot]
+            self.next_obs[envs] = ring.next_obs[slot]
+            self.next_done[envs] = ring.next_done[slot]
+            self.actor_pool.release(slot)
+            policy_lag += self.actor_pool.policy.version.value - version
+        self.global_step += self.args.num_steps * self.args.num_envs
+        self.writer.add_scalar("charts/policy_lag", policy_lag / len(rollouts), self.global_step)
+        self.writer.add_scalar("charts/dropped_rollouts", self.actor_pool.dropped, self.global_step)
+
+    def train(self, update):
+        # Annealing the rate if instructed to do so.
+        if self.args.anneal_lr:
+            # Decreases the learning rate from args.lr to 0 over the course of training.
+            frac = 1.0 - (update - 1.0) / self.args.num_updates
+            lrnow = frac * self.args.learning_rate
+            self.optimizer.param_groups[0]["lr"] = lrnow
+
+        # Run an episode in each environment. This loop collects experience which is later used for optimization.
+        # In actor-learner mode the actors have been collecting it while the last update ran.
+        episode_start = time.time_ns()
+        if self.actor_learner:
+            self.receive_rollouts()
+        else:
+            self.collect_rollout()
         end_time = time.time_ns()
         episode_time = (end_time - episode_start) / (10**9)
         #print(f"Training ep took: \t\t{episode_time}")
@@ -309,6 +411,8 @@ class Trainer:
         b_action_masks = self.action_masks.reshape(-1, self.action_masks.shape[-1])
 
         # Optimizing the policy and value network
+        if self.timer.enabled:
+            update_start = self.timer.now()
         b_inds = np.arange(self.args.batch_size)
         clipfracs = []
         # Iterate over multiple epochs which each update the policy using all of the batch data
@@ -381,10 +485,16 @@ class Trainer:
                 if approx_kl > self.args.target_kl:
                     break
 
+        if self.timer.enabled:
+            self.timer.lap("trainer/ppo_update", update_start)
+
         y_pred, y_true = b_values.cpu().numpy(), b_returns.cpu().numpy()
         var_y = np.var(y_true)
         explained_var = np.nan if var_y == 0 else 1 - np.var(y_true - y_pred) / var_y
 
+        if self.actor_learner and update % self.policy_push_interval == 0:
+            self.actor_pool.push(self.agent)
+
         # Infrequently save the model and evaluate the agent
         if (update - 1) % self.args.save_frequency == 0:
             start_eval = time.time()
@@ -410,59 +520,16 @@ class Trainer:
                 )
 
             # Run evaluation
-            print("Evaluating Agent...")
-
-            eval_results = self.run_evals(globalstep_path, self.global_step)
-
-            # Log eval results
-            (
-                eval_network_config,
-                eval_decoy_config,
-                eval_reward_function,
-                eval_red_agent,
-                eval_return,
-                eval_step,
-            ) = eval_results
-
-            self.writer.add_scalar(
-                f"evaluation/{eval_network_config.split('.')[0]}_{eval_decoy_config}|{eval_reward_function}reward__{eval_red_agent}_episodic_return",
-                eval_return[0],
-                eval_step
-            )
-
-            self.writer.add_scalar(
-                "charts/eval_time", int(time.time() - start_eval), self.global_step
-            )
-
-            # Metrics for SULI
-
-            # Average Steps Till Impact
-            self.writer.add_scalar(
-                f"evaluation/time_step_till_impact_avg",
-                eval_return[1]["impact_timestep_avg"],
-                eval_step
-            )
-
-            # Total Number of Decoys Impacted (Server Downtime)
-            self.writer.add_scalar(
-                f"evaluation/impacted_decoys_avg",
-                (eval_return[1]["impacted_decoys_avg"]),
-                eval_step
-            )
-
-            # First Step that Decoy is Detected (Decoy Detector)
-            self.writer.add_scalar(
-                f"evaluation/first_step_of_decoy_contact_avg",
-                eval_return[1]["first_step_of_decoy_contact_avg"],
-                eval_step
-            )
+            if self.eval_workers > 0:
+                self.eval_pool.submit(self.agent, self.global_step)
+            else:
+                print("Evaluating Agent...")
+                eval_results = self.run_evals(globalstep_path, self.global_step)
+                self.log_eval_results(eval_results, time.time() - start_eval)
 
-            # Average steps delayed (when attacker targets a decoy)
-            self.writer.add_scalar(
-                f"evaluation/steps_delayed_avg",
-                eval_return[1]["delay_avg"],
-                eval_step
-            )
+        if self.eval_workers > 0:
+            for eval_step, eval_return, eval_time in self.eval_pool.poll():
+                self.log_eval_results(self.eval_results(eval_return, eval_step), eval_time)
 
         # TRY NOT TO MODIFY: record rewards for plotting purposes
         self.writer.add_scalar(
@@ -479,7 +546,34 @@ class Trainer:
         self.writer.add_scalar(
             "charts/SPS", int(self.global_step / (time.time() - self.start_time)), self.global_step
         )
+        if self.timer.enabled:
+            self.log_step_timings()
+
+    def log_step_timings(self):
+        """
+        Writes a histogram, in milliseconds, of every phase timed since the last update.
+        Environment phases are collected from all training environments with one call.
+        """
+        timings = {phase: [durations] for phase, durations in self.timer.drain().items()}
+        # Actor processes own their environments, so only the learner's phases are logged
+        if not self.actor_learner:
+            for env_timings in self.envs.call("get_step_timings"):
+                for phase, durations in env_timings.items():
+                    timings.setdefault(f"env/{phase}", []).append(durations)
+        for phase, durations in timings.items():
+            self.writer.add_histogram(f"timing/{phase}", np.concatenate(durations) * 1000, self.global_step)
 
     def close(self) -> None:
+        if self.actor_learner:
+            self.actor_pool.close()
+        if self.eval_workers > 0:
+            # Log the evaluations that are still running before stopping the workers
+            for eval_step, eval_return, eval_time in self.eval_pool.poll(block=True):
+                self.log_eval_results(self.eval_results(eval_return, eval_step), eval_time)
+            self.eval_pool.close()
+            if self.eval_network is not self.networks:
+                self.eval_network.unlink()
         self.envs.close()
+        if isinstance(self.networks, NetworkSnapshot):
+            self.networks.unlink()
         self.writer.close()
\ No newline at end of file